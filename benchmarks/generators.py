@@ -0,0 +1,107 @@
+"""Seeded synthetic graphs for the benchmarks, built straight into CSRGraphs.
+
+Every generator takes a target number of edges `m` and a seed and returns a
+simple undirected graph with about `m` edges (loops and repeated pairs are
+dropped), in vectorized NumPy, so 10M edges take seconds:
+
+    er      Erdos-Renyi G(n, m), average degree 10
+    ba      Barabasi-Albert preferential attachment, 5 edges per new node
+    powerlaw  configuration model with a power-law degree sequence (exponent 2.5)
+    road    road-like grid: a square lattice with some streets removed and a
+            few local diagonals added
+"""
+import numpy as np
+from scripts.core.graph import CSRGraph
+
+
+def erdos_renyi(m, seed, degree=10):
+    """G(n, m) with n = 2m / degree: m distinct pairs drawn uniformly."""
+    rng = np.random.default_rng(seed)
+    n = max(2 * m // degree, 2)
+    keys = np.zeros(0, dtype=np.int64)
+    while len(keys) < m:
+        # pairs rarely collide at this density: draw a few more than needed
+        u = rng.integers(0, n, (m - len(keys)) * 21 // 20 + 16)
+        v = rng.integers(0, n, len(u))
+        fresh = np.minimum(u, v) * n + np.maximum(u, v)
+        # sort-based: np.unique's hash table is several times slower here
+        keys = np.sort(np.concatenate([keys, fresh[u != v]]))
+        keys = keys[np.r_[True, keys[1:] != keys[:-1]]]
+    keys = rng.permutation(keys)[:m]
+    return CSRGraph.from_labels(keys // n, keys % n, node_ids=np.arange(n))
+
+
+def barabasi_albert(m, seed, attach=5):
+    """Preferential attachment: node t links to `attach` earlier nodes.
+
+    Batagelj-Brandes: edge i goes from its new node to the endpoint at a
+    uniform position r_i < 2i of the list of all earlier endpoints, which is
+    degree-proportional. A position on the target side points back to an
+    earlier r, so the targets are resolved by following those pointers, all
+    edges at once.
+    """
+    rng = np.random.default_rng(seed)
+    edges = np.arange(m, dtype=np.int64)
+    source = attach + edges // attach
+    # r_i uniform in [0, 2i]: even positions are sources, odd ones targets
+    pointer = (rng.random(m) * (2 * edges + 1)).astype(np.int64)
+    target = pointer.copy()
+    odd = np.flatnonzero(target & 1)
+    while len(odd):
+        target[odd] = pointer[target[odd] >> 1]
+        odd = odd[target[odd] & 1 == 1]
+    target = source[target >> 1]
+    keep = source != target
+    return CSRGraph.from_labels(source[keep], target[keep], node_ids=np.arange(attach + m // attach + 1))
+
+
+def powerlaw_configuration(m, seed, exponent=2.5, min_degree=2):
+    """Configuration model on degrees P(d) ~ d^-exponent, d >= min_degree.
+
+    Degrees are drawn until they add up to 2m stubs (capped at sqrt(2m) so
+    the graph stays simple-ish); the stubs are shuffled and paired.
+    """
+    rng = np.random.default_rng(seed)
+    cap = max(int(np.sqrt(2 * m)), min_degree)
+    mean = min_degree * (exponent - 1) / (exponent - 2)
+    degrees = np.zeros(0, dtype=np.int64)
+    while degrees.sum() < 2 * m:
+        count = int((2 * m - degrees.sum()) / mean) + 16
+        more = np.floor(min_degree * (1 - rng.random(count)) ** (-1 / (exponent - 1))).astype(np.int64)
+        degrees = np.concatenate([degrees, np.minimum(more, cap)])
+    stops = np.cumsum(degrees)
+    n = int(np.searchsorted(stops, 2 * m)) + 1
+    stubs = rng.permutation(np.repeat(np.arange(n), degrees[:n]))[:2 * m]
+    u, v = stubs[0::2], stubs[1::2]
+    keep = u != v
+    return CSRGraph.from_labels(u[keep], v[keep], node_ids=np.arange(n))
+
+
+def road_grid(m, seed, removed=0.2, diagonals=0.05):
+    """Square lattice missing `removed` of its streets, plus local diagonals."""
+    rng = np.random.default_rng(seed)
+    side = max(int(np.sqrt(m / (2 * (1 - removed) + diagonals))), 2)
+    ids = np.arange(side * side).reshape(side, side)
+    u = np.concatenate([ids[:, :-1].ravel(), ids[:-1, :].ravel()])
+    v = np.concatenate([ids[:, 1:].ravel(), ids[1:, :].ravel()])
+    keep = rng.random(len(u)) >= removed
+    corners = ids[:-1, :-1].ravel()
+    picked = corners[rng.random(len(corners)) < diagonals]
+    u = np.concatenate([u[keep], picked])
+    v = np.concatenate([v[keep], picked + side + 1])
+    return CSRGraph.from_labels(u, v, node_ids=np.arange(side * side))
+
+
+GENERATORS = {
+    "er": erdos_renyi,
+    "ba": barabasi_albert,
+    "powerlaw": powerlaw_configuration,
+    "road": road_grid,
+}
+
+
+def generate(name, m, seed=0):
+    """Graph `name` (see GENERATORS) with about `m` edges."""
+    if name not in GENERATORS:
+        raise ValueError(f"Unknown generator {name!r}; choose from {', '.join(GENERATORS)}")
+    return GENERATORS[name](int(m), seed)
@@ -0,0 +1,108 @@
+"""Incremental vs full utility recomputation after a small perturbation.
+
+    python -m benchmarks.incremental --graph grid --nodes 5000 --edges 12000 -k 1,5,20
+
+For every k, perturbs a random graph with k degree-preserving switch
+attempts (random_add_delete), then times core numbers, closeness and all
+exact centralities of the result computed from scratch and updated from
+the input's (`scripts/core/incremental.py`), checks that both agree and
+prints the speedups.
+"""
+import argparse
+import time
+import numpy as np
+from scripts.core import closeness, cores, evaluate, incremental
+from scripts.core.graph import CSRGraph
+from scripts.core.pipeline import import_script, load_scripts
+
+KEYS = ("betweenness", "closeness", "harmonic", "core")
+
+
+def random_graph(n, m, seed):
+    """Uniform random (small-world) graph with about m edges."""
+    rng = np.random.default_rng(seed)
+    u, v = rng.integers(0, n, m), rng.integers(0, n, m)
+    keep = u != v
+    return CSRGraph.from_labels(u[keep], v[keep], node_ids=np.arange(n))
+
+
+def grid_graph(n, m, seed):
+    """Square grid of about n nodes plus m - 2n random short-range edges."""
+    rng = np.random.default_rng(seed)
+    side = max(int(np.sqrt(n)), 2)
+    ids = np.arange(side * side).reshape(side, side)
+    u = np.concatenate([ids[:, :-1].ravel(), ids[:-1, :].ravel()])
+    v = np.concatenate([ids[:, 1:].ravel(), ids[1:, :].ravel()])
+    extra = max(m - len(u), 0)
+    a = rng.integers(0, side * side, extra)
+    b = np.clip(a + rng.integers(-2, 3, extra) * side + rng.integers(-2, 3, extra), 0, side * side - 1)
+    keep = a != b
+    return CSRGraph.from_labels(np.r_[u, a[keep]], np.r_[v, b[keep]], node_ids=np.arange(side * side))
+
+
+GRAPHS = {"random": random_graph, "grid": grid_graph}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--nodes", type=int, default=5000)
+    parser.add_argument("--edges", type=int, default=12000)
+    parser.add_argument("-k", default="1,5,20", help="comma-separated numbers of switch attempts")
+    parser.add_argument("--graph", choices=sorted(GRAPHS), default="grid",
+                        help="grid (local structure) or random (small world)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    anonymizer = import_script(load_scripts()["Anonymization"]["random_add_delete"])
+    graph = GRAPHS[args.graph](args.nodes, args.edges, args.seed)
+    print(f"graph: {graph.number_of_nodes()} nodes, {graph.number_of_edges()} edges")
+
+    start = time.perf_counter()
+    base = evaluate.centralities(graph, mode="exact", workers=args.workers)
+    print(f"input centralities: {time.perf_counter() - start:.2f}s")
+
+    print(f"{'k':>6} {'changed':>8} {'cc aff':>7} {'bc aff':>7} "
+          f"{'core':>15} {'closeness':>15} {'all metrics':>15} {'max error':>10}")
+    for k in [int(x) for x in args.k.split(",") if x]:
+        out, _ = anonymizer.anonymize(graph, k, seed=args.seed)
+        removed, added = incremental.edge_diff(graph, out)
+
+        core_full = timed(cores.core_number, out)
+        core_inc = timed(incremental.update_core_number, graph, base["core"], removed, added)
+
+        def closeness_incremental():
+            affected, _ = incremental.affected_sources(graph, removed, added)
+            sources = np.flatnonzero(affected)
+            return closeness.source_sums(out, sources, args.workers)
+
+        cc_full = timed(closeness.distance_sums, out, np.arange(out.number_of_nodes()), args.workers)
+        cc_inc = timed(closeness_incremental)
+
+        start = time.perf_counter()
+        full = evaluate.centralities(out, mode="exact", workers=args.workers)
+        full_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        inc = incremental.update(graph, out, base, workers=args.workers)
+        inc_seconds = time.perf_counter() - start
+
+        error = max(float(np.abs(inc[key] - full[key]).max()) for key in KEYS)
+        print(f"{k:>6} {len(removed[0]) + len(added[0]):>8} {inc['affected_closeness']:>7} "
+              f"{inc['affected_betweenness']:>7} {speedup(core_full, core_inc):>15} "
+              f"{speedup(cc_full, cc_inc):>15} {speedup(full_seconds, inc_seconds):>15} "
+              f"{error:>10.2e}")
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def speedup(full_seconds, inc_seconds):
+    """A "full->incremental seconds, speedup" table cell."""
+    return f"{full_seconds:.2f}->{inc_seconds:.2f}s {full_seconds / max(inc_seconds, 1e-9):.1f}x"
+
+
+if __name__ == "__main__":
+    main()
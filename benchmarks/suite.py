@@ -0,0 +1,259 @@
+"""Time every anonymizer on seeded synthetic graphs and flag regressions.
+
+    python -m benchmarks.suite --sizes 1k,100k,1M --out results.json
+    python -m benchmarks.suite --generators er,road --scripts random_walk --baseline baseline.json
+    python -m benchmarks.suite --compare results.json --baseline baseline.json
+
+For every generator and size (in edges, 1k to 10M) the graph is generated
+once (`benchmarks/generators.py`) and written as .mtx. Every anonymization
+script then runs on it in a fresh process, through five timed stages: load
+(the .mtx, bypassing the binary cache), anonymize (the script's
+`anonymize()`), save (`save_graph_as_mtx`), verify (the integrity checks of
+`scripts/core/verify.py` on the output and the saved file; a failed check
+fails the case) and evaluate (original against
+anonymized, `scripts/core/evaluate.py`; approximate centralities unless
+--evaluate-mode says otherwise, so large sizes stay feasible). Peak RSS is
+read after each stage.
+
+Results are written as JSON. With --baseline, every stage time and peak RSS
+is compared with the baseline's for the same generator, size and script,
+and anything more than --tolerance worse is flagged as a regression; the
+exit status is then 1. --compare compares two result files without
+running anything.
+"""
+import argparse
+import datetime
+import inspect
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+from benchmarks.generators import GENERATORS, generate
+from scripts.core import evaluate, verify
+from scripts.core.pipeline import import_script, load_scripts
+from scripts.utils.util_mtx import load_graph, save_graph_as_mtx
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+STAGES = ("load", "anonymize", "save", "verify", "evaluate")
+# random_walk takes a walk length; the other anonymizers get edges / K_DIVISOR edits.
+WALK_LENGTH = 5
+K_DIVISOR = 100
+# Differences below these are noise, whatever the ratio.
+MIN_SECONDS = 0.05
+MIN_RSS_MB = 16
+SUFFIXES = {"k": 10 ** 3, "m": 10 ** 6, "g": 10 ** 9}
+
+
+def parse_size(text):
+    """Edge count from "5000", "10k" or "1M"."""
+    text = text.strip().lower()
+    if text[-1:] in SUFFIXES:
+        return int(float(text[:-1]) * SUFFIXES[text[-1]])
+    return int(text)
+
+
+def names(value):
+    return [name for name in value.split(",") if name]
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MiB (None if unknown)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+def default_k(script, edges):
+    return WALK_LENGTH if script == "random_walk" else max(1, edges // K_DIVISOR)
+
+
+def check(original, anonymized, script, file_path):
+    """Integrity checks of one output; raises ValueError if any fails."""
+    report = verify.verify(original, anonymized, script, file_path=file_path)
+    failed = [f"{c['name']} ({c['detail']})" for c in report["checks"] if not c["ok"]]
+    if failed:
+        raise ValueError(f"integrity check(s) failed: {'; '.join(failed)}")
+
+
+def run_case(file_path, script_path, k, seed, workers, evaluate_mode):
+    """One script on one graph, stage by stage (runs in a fresh process)."""
+    record = {"stages": {}, "error": None}
+
+    def stage(name, fn):
+        start = time.perf_counter()
+        value = fn()
+        record["stages"][name] = {"seconds": time.perf_counter() - start, "peak_rss_mb": peak_rss_mb()}
+        return value
+
+    try:
+        module = import_script(script_path)
+        params = inspect.signature(module.anonymize).parameters
+        options = {key: value for key, value in (("seed", seed), ("workers", workers)) if key in params}
+        graph = stage("load", lambda: load_graph(file_path, use_cache=False))
+        out = stage("anonymize", lambda: module.anonymize(graph, k, **options))
+        if isinstance(out, tuple):
+            out = out[0]
+        script = os.path.splitext(os.path.basename(script_path))[0]
+        with tempfile.TemporaryDirectory() as tmp:
+            out_path = os.path.join(tmp, "out.mtx")
+            stage("save", lambda: save_graph_as_mtx(out, out_path, remap_to_one_based=False))
+            stage("verify", lambda: check(graph, out, script, out_path))
+        if evaluate_mode != "off":
+            stage("evaluate", lambda: evaluate.evaluate(graph, out, k, mode=evaluate_mode, seed=seed, workers=workers))
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+    record["peak_rss_mb"] = peak_rss_mb()
+    return record
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def run_suite(generators, sizes, script_names, seed=0, workers=1, evaluate_mode="approximate", log=print):
+    """Run every (generator, size, script) case; returns the results dict."""
+    scripts = load_scripts()["Anonymization"]
+    missing = [name for name in script_names if name not in scripts]
+    if missing:
+        raise ValueError(f"Unknown anonymization script(s): {', '.join(missing)}")
+
+    results = {"environment": environment(), "seed": seed, "workers": workers,
+               "evaluate_mode": evaluate_mode, "results": []}
+    # a fresh process per case, so peak RSS belongs to that case alone
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(1, maxtasksperchild=1) as pool, tempfile.TemporaryDirectory() as tmp:
+        for name in generators:
+            for size in sizes:
+                graph = generate(name, size, seed)
+                file_path = os.path.join(tmp, f"{name}_{size}.mtx")
+                # generators number nodes from 0; Matrix Market labels start at 1
+                save_graph_as_mtx(graph, file_path)
+                nodes, edges = graph.number_of_nodes(), graph.number_of_edges()
+                del graph
+                for script in script_names:
+                    k = default_k(script, edges)
+                    record = pool.apply(run_case, (file_path, scripts[script], k, seed, workers, evaluate_mode))
+                    record = dict(generator=name, size=size, nodes=nodes, edges=edges, script=script, k=k, **record)
+                    results["results"].append(record)
+                    log(format_record(record))
+    return results
+
+
+def format_record(record):
+    cells = [f"{record['generator']:>8} {record['size']:>9} {record['script']:<20}"]
+    for name in STAGES:
+        stage = record["stages"].get(name)
+        cells.append(f"{name} {stage['seconds']:.3f}s" if stage else f"{name} -")
+    if record["peak_rss_mb"] is not None:
+        cells.append(f"peak {record['peak_rss_mb']:.0f} MiB")
+    if record["error"]:
+        cells.append(f"FAILED: {record['error']}")
+    return "  ".join(cells)
+
+
+def _key(record):
+    return record["generator"], record["size"], record["script"]
+
+
+def compare(results, baseline, tolerance=0.2):
+    """Rows (generator, size, script, metric, before, after, regressed) for
+    the cases and metrics present in both result dicts. Evaluate times are
+    only compared when both ran the same --evaluate-mode."""
+    before = {_key(r): r for r in baseline["results"] if not r["error"]}
+    stages = STAGES if results.get("evaluate_mode") == baseline.get("evaluate_mode") else STAGES[:-1]
+    rows = []
+    for record in results["results"]:
+        old = before.get(_key(record))
+        if old is None or record["error"]:
+            continue
+        for name in stages:
+            a, b = old["stages"].get(name), record["stages"].get(name)
+            if a and b:
+                a, b = a["seconds"], b["seconds"]
+                rows.append(_key(record) + (f"{name} s", a, b, b > a * (1 + tolerance) and b - a > MIN_SECONDS))
+        a, b = old["peak_rss_mb"], record["peak_rss_mb"]
+        if a is not None and b is not None:
+            rows.append(_key(record) + ("peak MiB", a, b, b > a * (1 + tolerance) and b - a > MIN_RSS_MB))
+    return rows
+
+
+def print_comparison(rows, log=print):
+    log(f"{'graph':>8} {'size':>9} {'script':<20} {'metric':<14} {'baseline':>10} {'now':>10} {'change':>8}")
+    for generator, size, script, metric, a, b, regressed in rows:
+        change = f"{(b - a) / a:+.0%}" if a else "n/a"
+        flag = "  REGRESSION" if regressed else ""
+        log(f"{generator:>8} {size:>9} {script:<20} {metric:<14} {a:>10.3f} {b:>10.3f} {change:>8}{flag}")
+    regressions = sum(row[-1] for row in rows)
+    log(f"{regressions} regression(s) in {len(rows)} comparisons")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--generators", type=names, default=list(GENERATORS), metavar="A,B",
+                        help=f"graph generators (default: {','.join(GENERATORS)})")
+    parser.add_argument("--sizes", type=names, default=["1k", "10k", "100k"], metavar="A,B",
+                        help="edge counts, e.g. 1k,100k,10M (default: 1k,10k,100k)")
+    parser.add_argument("--scripts", type=names, default=None, metavar="A,B",
+                        help="anonymization scripts (default: all)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--evaluate-mode", choices=("approximate", "exact", "auto", "off"), default="approximate",
+                        help="centralities of the evaluate stage, or off to skip it (default approximate)")
+    parser.add_argument("--out", default="benchmark_results.json", help="results file (default benchmark_results.json)")
+    parser.add_argument("--baseline", default=None, help="results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="relative slowdown or growth flagged as a regression (default 0.2)")
+    parser.add_argument("--compare", default=None, metavar="RESULTS",
+                        help="compare this results file with --baseline instead of running")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        if not args.baseline:
+            parser.error("--compare needs --baseline")
+        with open(args.compare) as fh:
+            results = json.load(fh)
+    else:
+        unknown = [name for name in args.generators if name not in GENERATORS]
+        if unknown:
+            parser.error(f"unknown generator(s): {', '.join(unknown)}")
+        script_names = args.scripts or sorted(load_scripts()["Anonymization"])
+        results = run_suite(args.generators, [parse_size(s) for s in args.sizes], script_names,
+                            seed=args.seed, workers=args.workers, evaluate_mode=args.evaluate_mode)
+        with open(args.out, "w") as fh:
+            json.dump(results, fh, indent=2)
+        print(f"Saved results to: {args.out}")
+
+    if args.baseline:
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)
+        if print_comparison(compare(results, baseline, args.tolerance)):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
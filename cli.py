@@ -0,0 +1,208 @@
+"""Headless batch runner for NetGUC script chains.
+
+Runs the same ordered chain as the GUI (anonymization -> utilities ->
+helpers, each script's output file piped into the next) over many input
+files, without Tkinter:
+
+    python cli.py -k 10 --anonymize random_switch --utils util_k_core,util_k_shell data/*.mtx
+    python cli.py -k 5 --anonymize random_walk --jobs 8 --seed 1 "graphs/**/*.mtx"
+
+Input arguments may be files or glob patterns. Files are fanned out over
+`--jobs` worker processes; per-stage timings are printed as each file
+finishes, and the exit status is non-zero if any stage failed.
+"""
+import argparse
+import glob
+import io
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stdout
+
+# Scripts draw with matplotlib; never open windows from the batch runner.
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+from scripts.core import registry
+from scripts.core.pipeline import CATEGORY_ORDER, StageError, load_scripts, run_chain
+
+
+def names(value):
+    return [name for name in value.split(",") if name]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run NetGUC script chains without the GUI.")
+    parser.add_argument("inputs", nargs="*", help="input files or glob patterns")
+    parser.add_argument("-k", type=int, default=10, help="k value passed to every script (default 10)")
+    parser.add_argument("--anonymize", type=names, default=[], metavar="A,B", help="comma-separated anonymization scripts")
+    parser.add_argument("--utils", type=names, default=[], metavar="A,B", help="comma-separated utility scripts")
+    parser.add_argument("--helpers", type=names, default=[], metavar="A,B", help="comma-separated helper scripts")
+    parser.add_argument("--jobs", type=int, default=1, help="input files processed in parallel")
+    parser.add_argument("--seed", type=int, default=None, help="seed for scripts that accept one")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes per script, where supported")
+    parser.add_argument("--render", choices=("off", "thumbnail", "full"), default=None,
+                        help="figure policy for all scripts (default: NETGUC_RENDER or thumbnail)")
+    parser.add_argument("--betweenness", choices=("auto", "exact", "approximate"), default=None,
+                        help="betweenness algorithm (default: NETGUC_BC_MODE or auto)")
+    parser.add_argument("--epsilon", type=float, default=None, help="error bound of approximate betweenness/closeness")
+    parser.add_argument("--delta", type=float, default=None, help="failure probability of approximate betweenness/closeness")
+    parser.add_argument("--closeness", choices=("auto", "exact", "approximate"), default=None,
+                        help="closeness algorithm (default: NETGUC_CC_MODE or auto)")
+    parser.add_argument("--harmonic", action="store_true", help="use harmonic closeness")
+    parser.add_argument("--sweep", action="store_true", help="k-core/k-shell: print the sizes for every k")
+    parser.add_argument("--naive-order", choices=("random", "degree", "index"), default=None,
+                        help="new node IDs of naive_anonymization (default: NETGUC_NAIVE_ORDER or random)")
+    parser.add_argument("--permutation-dir", default=None, metavar="DIR",
+                        help="save naive_anonymization's relabeling key here, for util_verify (it undoes the anonymization)")
+    parser.add_argument("--switch-mode", choices=("sequential", "batch"), default=None,
+                        help="engine of random_add_delete; batch is faster but only approximates the sequential chain "
+                             "(default: NETGUC_SWITCH_MODE or sequential)")
+    parser.add_argument("--out-of-core", choices=("auto", "on", "off"), default=None,
+                        help="anonymize on disk (default: NETGUC_OUT_OF_CORE or auto, above the memory budget)")
+    parser.add_argument("--memory-budget", type=int, default=None, metavar="BYTES",
+                        help="working memory of out-of-core anonymization once the input is cached; the first load parses in memory (default: NETGUC_MEMORY_BUDGET or 2 GiB)")
+    parser.add_argument("--telemetry", default=None, metavar="FILE",
+                        help="append spans, counters and peak memory per stage to this JSON-lines file")
+    parser.add_argument("--profile", type=names, default=None, metavar="A,B",
+                        help="with --telemetry: cprofile and/or tracemalloc for every stage")
+    parser.add_argument("--quiet", action="store_true", help="do not echo script output")
+    parser.add_argument("--list", action="store_true", help="list available scripts and exit")
+    return parser.parse_args(argv)
+
+
+def expand_inputs(patterns):
+    """Expand glob patterns (recursive `**` allowed), keeping order and dropping repeats."""
+    files = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern, recursive=True)) if glob.has_magic(pattern) else [pattern]
+        files.extend(m for m in matches if m not in files)
+    return files
+
+
+def process_file(file_path, steps, k, options, capture):
+    """Run the chain on one file; returns (file, stages, error, output text)."""
+    scripts = load_scripts()
+    buffer = io.StringIO()
+    try:
+        if capture:
+            with redirect_stdout(buffer):
+                stages = run_chain(file_path, steps, k, scripts, options=options)
+        else:
+            stages = run_chain(file_path, steps, k, scripts, options=options)
+        return file_path, stages, None, buffer.getvalue()
+    except StageError as e:
+        failed = dict(e.stage, error=str(e.error))
+        return file_path, e.results + [failed], str(e), buffer.getvalue()
+    except Exception as e:
+        return file_path, [], str(e), buffer.getvalue()
+
+
+def report(file_path, stages, error, text, quiet):
+    if text and not quiet:
+        sys.stdout.write(text if text.endswith("\n") else text + "\n")
+    print(f"== {file_path}")
+    total = 0.0
+    for stage in stages:
+        total += stage["seconds"]
+        status = f"FAILED: {stage['error']}" if "error" in stage else (os.path.basename(stage["output"]) if stage["output"] else "-")
+        print(f"   {stage['category']:<13} {stage['name']:<30} {stage['seconds']:9.3f}s  {status}")
+    if error and not any("error" in s for s in stages):
+        print(f"   FAILED: {error}")
+    print(f"   {'total':<44} {total:9.3f}s")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    scripts = load_scripts()
+
+    if args.list:
+        # read from the scripts' sources; nothing is imported
+        found = registry.discover()
+        for category in CATEGORY_ORDER:
+            print(f"{category}:")
+            for name, script in sorted(found[category].items()):
+                print(f"  {name:<30} {script['description']}")
+        return 0
+
+    steps = [("Anonymization", n) for n in args.anonymize]
+    steps += [("Utilities", n) for n in args.utils]
+    steps += [("Helpers", n) for n in args.helpers]
+    if not steps:
+        print("error: choose at least one script (--anonymize/--utils/--helpers)", file=sys.stderr)
+        return 2
+    unknown = [name for category, name in steps if name not in scripts[category]]
+    if unknown:
+        print(f"error: unknown script(s): {', '.join(unknown)} (see --list)", file=sys.stderr)
+        return 2
+
+    files = expand_inputs(args.inputs)
+    if not files:
+        print("error: no input files given", file=sys.stderr)
+        return 2
+    missing = [f for f in files if not os.path.isfile(f)]
+    if missing:
+        print(f"error: no such input file(s): {', '.join(missing)}", file=sys.stderr)
+        return 2
+
+    if args.render:
+        # read by scripts/core/render.py, here and in --jobs workers
+        os.environ["NETGUC_RENDER"] = args.render
+    # read by scripts/core/betweenness.py and scripts/core/closeness.py
+    if args.betweenness:
+        os.environ["NETGUC_BC_MODE"] = args.betweenness
+    if args.closeness:
+        os.environ["NETGUC_CC_MODE"] = args.closeness
+    if args.harmonic:
+        os.environ["NETGUC_CC_HARMONIC"] = "1"
+    if args.epsilon is not None:
+        os.environ["NETGUC_BC_EPSILON"] = os.environ["NETGUC_CC_EPSILON"] = str(args.epsilon)
+    if args.delta is not None:
+        os.environ["NETGUC_BC_DELTA"] = os.environ["NETGUC_CC_DELTA"] = str(args.delta)
+    # read by scripts/anonymization/naive_anonymization.py
+    if args.naive_order:
+        os.environ["NETGUC_NAIVE_ORDER"] = args.naive_order
+    # read by scripts/utils/util_mtx.py (naive_anonymization and util_verify)
+    if args.permutation_dir:
+        os.environ["NETGUC_PERMUTATION_DIR"] = os.path.abspath(args.permutation_dir)
+    # read by scripts/anonymization/random_add_delete.py
+    if args.switch_mode:
+        os.environ["NETGUC_SWITCH_MODE"] = args.switch_mode
+    # read by scripts/core/external.py
+    if args.out_of_core:
+        os.environ["NETGUC_OUT_OF_CORE"] = args.out_of_core
+    if args.memory_budget is not None:
+        os.environ["NETGUC_MEMORY_BUDGET"] = str(args.memory_budget)
+    # read by scripts/core/telemetry.py
+    if args.telemetry:
+        os.environ["NETGUC_TELEMETRY"] = os.path.abspath(args.telemetry)
+    if args.profile:
+        os.environ["NETGUC_PROFILE"] = ",".join(args.profile)
+
+    options = {}
+    if args.seed is not None:
+        options["seed"] = args.seed
+    if args.workers is not None:
+        options["workers"] = args.workers
+    if args.sweep:
+        options["sweep"] = True
+
+    failures = 0
+    if args.jobs <= 1:
+        for file_path in files:
+            result = process_file(file_path, steps, args.k, options, capture=args.quiet)
+            report(*result, quiet=args.quiet)
+            failures += result[2] is not None
+    else:
+        with ProcessPoolExecutor(args.jobs) as pool:
+            futures = [pool.submit(process_file, f, steps, args.k, options, True) for f in files]
+            for future in as_completed(futures):
+                result = future.result()
+                report(*result, quiet=args.quiet)
+                failures += result[2] is not None
+
+    print(f"{len(files) - failures}/{len(files)} file(s) succeeded.")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
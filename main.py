@@ -1,60 +1,24 @@
+import base64
+import multiprocessing
 import os
-import importlib.util
+import queue
+import threading
 import tkinter as tk
 from tkinter import filedialog, messagebox
-import builtins
-try:
-    import matplotlib.pyplot as plt
-    plt.ion()
-except Exception:
-    # matplotlib may not be present in some environments; scripts will handle their own imports
-    pass
-
-SCRIPTS_DIR = "scripts"
-
-def load_scripts():
-    """Load scripts grouped by category from `scripts/` subfolders.
-
-    Expected subfolders (case-insensitive):
-      - anonymization -> Anonymization
-      - utils or utility -> Utilities
-      - helpers or helper -> Helpers
-
-    Returns a dict: { 'Anonymization': {name: path, ...}, 'Utilities': {...}, 'Helpers': {...} }
-    """
-    categories = {'Anonymization': {}, 'Utilities': {}, 'Helpers': {}}
-
-    # scan top-level subdirectories
-    for entry in os.listdir(SCRIPTS_DIR):
-        full = os.path.join(SCRIPTS_DIR, entry)
-        if not os.path.isdir(full):
-            continue
-
-        key = None
-        en = entry.lower()
-        if 'anonym' in en:
-            key = 'Anonymization'
-        elif 'util' in en or 'utility' in en:
-            key = 'Utilities'
-        elif 'help' in en:
-            key = 'Helpers'
-        else:
-            # skip unknown folders
-            continue
+# Scripts draw in the worker thread, off screen; their figures come back as
+# images and are shown from the Tk thread (see show_figure). Setting the
+# backend this way leaves matplotlib unimported until a script draws.
+os.environ["MPLBACKEND"] = "Agg"
 
-        for filename in os.listdir(full):
-            if filename.endswith('.py'):
-                name = os.path.splitext(filename)[0]
-                categories[key][name] = os.path.join(full, filename)
+from scripts.core import progress, render
+from scripts.core.pipeline import StageError, load_scripts, order_steps, run_chain
 
-    return categories
+# How often (ms) the Tk thread reads the running job's events.
+POLL_MS = 100
 
-def import_script(script_path):
-    """Import a script file dynamically"""
-    spec = importlib.util.spec_from_file_location("dynamic_script", script_path)
-    module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module)
-    return module
+# The running job, if any: event queue, cancel event, progress tracker and
+# what to report when it ends.
+job = {}
 
 def run_selected_script():
     # Collect selected scripts from the three category listboxes.
@@ -91,48 +55,112 @@ def run_selected_script():
     if not file_path:
         return
 
-    # Run selected scripts sequentially, piping output of one as input to the next
-    current_file = file_path
-    for category, script_name in selected:
-        script_path = scripts.get(category, {}).get(script_name)
+    # Run selected scripts sequentially in a worker thread, piping output of
+    # one as input to the next; the window stays responsive meanwhile
+    events = multiprocessing.Queue()
+    cancel = multiprocessing.Event()
+    job.update(events=events, cancel=cancel, tracker=progress.Tracker(),
+               count=len(selected), k=k_value, file_path=file_path)
+    worker = threading.Thread(
+        target=run_job, args=(file_path, order_steps(selected), k_value, events, cancel), daemon=True
+    )
+    run_button.config(state=tk.DISABLED)
+    cancel_button.config(state=tk.NORMAL)
+    worker.start()
+    root.after(POLL_MS, poll_job)
+
+def run_job(file_path, steps, k_value, events, cancel):
+    # Worker thread: never touches Tk, everything goes through `events`
+    render.set_sink(lambda png: events.put(("figure", png)))
+    try:
+        with progress.listening(events, cancel):
+            results = run_chain(file_path, steps, k_value, scripts, output=lambda text: events.put(("print", text)))
+        events.put(("done", results))
+    except progress.Cancelled:
+        events.put(("cancelled",))
+    except StageError as e:
+        events.put(("failed", e.stage['name'], str(e.error)))
+    except Exception as e:
+        events.put(("failed", "the chain", str(e)))
+    finally:
+        render.set_sink(None)
+
+def poll_job():
+    # Tk thread: show what the worker reported since the last poll
+    while True:
         try:
-            module = import_script(script_path)
-
-            if hasattr(module, "run"):
-                # Capture script output by replacing print() with ui_print()
-                old_print = builtins.print
-                def custom_print(*args, **kwargs):
-                    message = " ".join(str(a) for a in args)
-                    ui_print(message)
-
-                builtins.print = custom_print
-                try:
-                    result = module.run(current_file, k_value)
-                finally:
-                    builtins.print = old_print  # restore after script finishes
-
-                # If the script returns a path, use it as the input for the next script
-                if isinstance(result, str) and os.path.exists(result):
-                    current_file = result
-                else:
-                    # If no path returned, keep using current_file (scripts may overwrite files)
-                    pass
-            else:
-                messagebox.showerror("Error", f"{script_name}.py does not have a compatible run() function.")
-                return
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to run {script_name}:\n{e}")
+            event = job['events'].get_nowait()
+        except queue.Empty:
+            break
+        if event[0] in ("start", "advance"):
+            tracker = job['tracker']
+            show_progress(tracker.describe(tracker.update(event)))
+        elif event[0] == "print":
+            ui_print(event[1])
+        elif event[0] == "figure":
+            show_figure(event[1])
+        else:
+            finish_job(event)
             return
+    root.after(POLL_MS, poll_job)
+
+def finish_job(event):
+    clear_progress()
+    run_button.config(state=tk.NORMAL)
+    cancel_button.config(state=tk.DISABLED)
+    finished = dict(job)
+    job.clear()
+
+    if event[0] == "cancelled":
+        ui_print("Cancelled.")
+        return
+    if event[0] == "failed":
+        messagebox.showerror("Error", f"Failed to run {event[1]}:\n{event[2]}")
+        return
+
+    # The last script that returned a path produced the final output
+    current_file = finished['file_path']
+    for stage in event[1]:
+        if stage['output']:
+            current_file = stage['output']
 
     messagebox.showinfo(
         "Success",
-        f"Ran {len(selected)} script(s) with k={k_value} on:\n{os.path.basename(file_path)}\nFinal output: {os.path.basename(current_file)}"
+        f"Ran {finished['count']} script(s) with k={finished['k']} on:\n{os.path.basename(finished['file_path'])}\nFinal output: {os.path.basename(current_file)}"
     )
 
+def cancel_job():
+    # The worker stops at its next progress report; see scripts/core/progress.py
+    if job:
+        job['cancel'].set()
+        cancel_button.config(state=tk.DISABLED)
+        ui_print("Cancelling...")
+
+def show_figure(png):
+    window = tk.Toplevel(root)
+    window.title("NetGUC figure")
+    image = tk.PhotoImage(master=window, data=base64.b64encode(png))
+    label = tk.Label(window, image=image)
+    label.image = image  # keep a reference, Tk does not
+    label.pack()
+
 def ui_print(text):
-    console.insert(tk.END, text + "\n")
+    # script output goes above the progress line, if one is shown
+    ranges = console.tag_ranges("progress")
+    console.insert(ranges[0] if ranges else tk.END, text + "\n")
     console.see(tk.END)  # auto-scroll
 
+def show_progress(text):
+    # a single progress line at the end of the console, rewritten in place
+    clear_progress()
+    console.insert(tk.END, text + "\n", "progress")
+    console.see(tk.END)
+
+def clear_progress():
+    ranges = console.tag_ranges("progress")
+    if ranges:
+        console.delete(ranges[0], ranges[-1])
+
 def clear_console():
     try:
         console.delete('1.0', tk.END)
@@ -232,7 +260,19 @@ run_button = tk.Button(
     relief="flat",
     width=20, height=2
 )
-run_button.pack(pady=20)
+run_button.pack(pady=(20, 5))
+
+cancel_button = tk.Button(
+    content,
+    text="Cancel",
+    command=cancel_job,
+    font=("Arial", 11),
+    bg="#6c757d", fg="black",
+    relief="flat",
+    width=12,
+    state=tk.DISABLED
+)
+cancel_button.pack(pady=(0, 15))
 
 # (single output console is defined below)
 
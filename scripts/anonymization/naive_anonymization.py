@@ -1,64 +1,134 @@
-import io
 import os
-import random
-import networkx as nx
-import matplotlib.pyplot as plt
-from scripts.utils.util_mtx import save_graph_as_mtx
+import numpy as np
+from scripts.core import render, telemetry
+from scripts.core.graph import CSRGraph, build_csr, index_dtype
+from scripts.core.parallel import spawn_rngs
+from scripts.utils.util_mtx import base_name, load_graph, permutation_dir, permutation_path, save_graph_as_mtx
+
+# Registry metadata, read without importing this file (scripts/core/registry.py)
+SCRIPT = {"category": "Anonymization", "outputs_graph": True, "description": "Relabel the nodes with anonymous IDs (random, degree or index order)"}
 
 ## naive anonymization function
 
-def run(file_path, k):
-    # Open whatever file the user selected in the GUI
-    with open(file_path) as f:
-        lines = [l for l in f if not l.startswith('%') and not l.startswith('%%')]
+# New node IDs, chosen by NETGUC_NAIVE_ORDER:
+#   random  a seeded random permutation (the default); IDs say nothing about
+#           the input
+#   degree  canonical order: by degree, ties by original label
+#   index   the rank of the original label (the old behaviour; keeps the
+#           input's node order)
+ORDERS = ("random", "degree", "index")
+
+
+def default_order():
+    """Relabeling order from NETGUC_NAIVE_ORDER (default random)."""
+    value = os.environ.get("NETGUC_NAIVE_ORDER", "random").strip().lower()
+    if value not in ORDERS:
+        raise ValueError(f"NETGUC_NAIVE_ORDER must be one of {', '.join(ORDERS)}, not {value!r}")
+    return value
+
+
+def new_ids(graph, order, seed=None):
+    """New ID of every compact node under `order` (None for "index")."""
+    n = graph.number_of_nodes()
+    if order == "index":
+        return None
+    if order == "random":
+        return spawn_rngs(seed, 1)[0].permutation(n).astype(index_dtype(n))
+    if order == "degree":
+        ids = np.empty(n, dtype=index_dtype(n))
+        ids[np.argsort(graph.degree(), kind="stable")] = np.arange(n)
+        return ids
+    raise ValueError(f"Unknown relabeling order: {order!r}")
+
+
+@telemetry.timed("relabel")
+def anonymize(graph, k=None, order=None, seed=None):
+    """Relabel a CSRGraph's nodes 1..n in `order` (see ORDERS; default from
+    NETGUC_NAIVE_ORDER); k is unused. The output is reproducible for the same
+    `seed`.
 
-    # Parse the MTX metadata
-    _, _, num_edges = map(int, lines[0].split())
+    The new IDs are applied to the edge arrays with one gather; the CSR
+    adjacency is built from those, and the edge list (sorted by new ID) is
+    read back off its rows, so the edges are sorted only once.
 
-    # Convert each remaining line into a tuple (u, v)
-    edges_data = [tuple(map(int, line.split())) for line in lines[1:]]
+    New IDs are 1-based, as Matrix Market labels are, so the output is
+    written verbatim without a node-mapping sidecar.
 
-    print(f"Loaded {len(edges_data)} edges.")
+    Returns (anonymized CSRGraph, stats); `stats["ids"]` holds the new ID of
+    every input node, in compact (label) order.
+    """
+    n = graph.number_of_nodes()
+    order = order or default_order()
+    ids = new_ids(graph, order, seed)
+    if ids is None:
+        # the compact indices already are 0..n-1 in label order
+        labels = np.arange(1, n + 1, dtype=index_dtype(n + 1))
+        anon = CSRGraph(labels, graph.src, graph.dst,
+                        indptr=graph.indptr, indices=graph.indices)
+        return anon, {"relabeled": n, "order": order, "ids": labels}
 
-    # Create graph
-    G = nx.Graph()
-    G.add_edges_from(edges_data)
+    indptr, indices = build_csr(ids[graph.src], ids[graph.dst], n)
+    # every edge once: the entries on or above the diagonal, in row order
+    rows = np.repeat(np.arange(n, dtype=indices.dtype), np.diff(indptr))
+    upper = indices >= rows
+    labels = np.arange(1, n + 1, dtype=index_dtype(n + 1))
+    anon = CSRGraph(labels, rows[upper], indices[upper], indptr=indptr, indices=indices)
+    return anon, {"relabeled": n, "order": order, "ids": labels[ids]}
 
-  
 
-    ## make a copy of G (our graph above)
-    cpyG = G.copy()
-    
+def run(file_path, k, seed=None):
+    # Stream whatever file the user selected in the GUI into the CSR core
+    graph = load_graph(file_path)
+
+    print(f"Loaded {graph.number_of_edges()} edges.")
+
     # Naive anonymization: simply relabel nodes with anonymous IDs
     # This removes node identities but preserves all structural properties
-    mapping = {old_node: i for i, old_node in enumerate(cpyG.nodes())}
-    cpyG = nx.relabel_nodes(cpyG, mapping)
-
-    # Deterministic layout (after relabeling to match new node IDs)
-    pos = nx.spring_layout(cpyG, seed=42)
-    
-
-    plt.figure(figsize=(8,8))
-    nx.draw(
-        cpyG,
-        pos,
-        with_labels=True,
-        node_color="lightyellow",
-        node_size=600,
-        edge_color="gray",
-        )
-    try:
-        plt.show(block=False)
-    except TypeError:
-        plt.show()
+    anon, stats = anonymize(graph, seed=seed)
+    print(f"Relabeled {stats['relabeled']} nodes ({stats['order']} order).")
+
+    # Draw per the render policy (layout after relabeling to match new node IDs)
+    view = render.view(anon)
+    if view is not None:
+        plt = render.pyplot()
+        nx = render.networkx()
+        plt.figure(figsize=(8,8))
+        nx.draw(
+            view.G,
+            view.pos,
+            with_labels=view.labels,
+            node_color="lightyellow",
+            node_size=view.node_size(600),
+            edge_color="gray",
+            )
+        view.show()
 
     # Save modified graph as .mtx next to the input file
     try:
-        base = os.path.splitext(os.path.basename(file_path))[0]
+        base = base_name(file_path)
         out_path = os.path.join(os.path.dirname(file_path), f"{base}_anonymized.mtx")
-        save_graph_as_mtx(cpyG, out_path, comment="naive_anonymization output", remap_to_one_based=False)
+        # the labels already are 1..n; remapping would only add a sidecar
+        save_graph_as_mtx(anon, out_path, comment="naive_anonymization output", remap_to_one_based=False)
         print(f"Saved anonymized graph to: {out_path}")
-        return out_path
     except Exception as e:
         print(f"Failed to save .mtx: {e}")
         return None
+    save_key(out_path, stats["ids"])
+    return out_path
+
+
+def save_key(out_path, ids):
+    """Write the relabeling to NETGUC_PERMUTATION_DIR, if set, so util_verify
+    can prove the output isomorphic. The key de-anonymizes the output, so it
+    is never written next to it."""
+    directory = permutation_dir()
+    if directory is None:
+        return None
+    if directory == os.path.dirname(os.path.abspath(out_path)):
+        print("Not saving the relabeling key: NETGUC_PERMUTATION_DIR is the output's directory.")
+        return None
+    os.makedirs(directory, exist_ok=True)
+    path = permutation_path(out_path, directory)
+    np.save(path, ids)
+    print(f"Saved relabeling key to: {path}")
+    return path
@@ -1,83 +1,104 @@
-import io
 import os
-import random
-import networkx as nx
-import matplotlib.pyplot as plt
-from scripts.utils.util_mtx import save_graph_as_mtx
+from scripts.core.batch_switch import batch_switch
+from scripts.core.edge_store import EdgeStore, switch_edges
+from scripts.core import external, render
+from scripts.core.parallel import STREAMS, spawn_rngs
+from scripts.utils.util_mtx import base_name, load_graph, save_graph_as_mtx
+
+# Registry metadata, read without importing this file (scripts/core/registry.py)
+SCRIPT = {"category": "Anonymization", "outputs_graph": True, "description": "k degree-preserving edge switches"}
 
 ## rand add/del function
 
-def run(file_path, k):
-    # Open whatever file the user selected in the GUI
-    with open(file_path) as f:
-        lines = [l for l in f if not l.startswith('%') and not l.startswith('%%')]
-
-    # Parse the MTX metadata
-    _, _, num_edges = map(int, lines[0].split())
-
-    # Convert each remaining line into a tuple (u, v)
-    edges_data = [tuple(map(int, line.split())) for line in lines[1:]]
-
-    print(f"Loaded {len(edges_data)} edges.")
-
-    # Create graph
-    G = nx.Graph()
-    G.add_edges_from(edges_data)
-
-    # Deterministic layout
-    pos = nx.spring_layout(G, seed=42)
-
-    ## make a copy of G (our graph above)
-    cpyG = G.copy()
-    edges = list(cpyG.edges())
-
-    for _ in range(k):
-        # choose a random edge from the set
-        # choose another edge
-        e1 = random.choice(list(edges))
-        e2 = random.choice(list(edges))
-
-        if(e1 == e2):
-            continue
-
-        a, b = e1
-        c, d = e2
-
-        ## check to make sure all nodes are distinct
-        if len({a,b,c,d}) < 4:
-            continue
-
-        if(a, d) in cpyG.edges() or (d, a) in cpyG.edges():
-            continue
-        if(b, c) in cpyG.edges() or (c, b) in cpyG.edges():
-            continue
-
-        # swap
-        cpyG.remove_edge(a,b)
-        cpyG.remove_edge(c,d)
-        cpyG.add_edge(a,d)
-        cpyG.add_edge(b,c)
-
-        edges = list(cpyG.edges())
-    plt.figure(figsize=(8,8))
-    nx.draw(
-        cpyG,
-        pos,
-        with_labels=True,
-        node_color="lightblue",
-        node_size=600,
-        edge_color="gray",
-        )
-    try:
-        plt.show(block=False)
-    except TypeError:
-        plt.show()
+# Switch engines, chosen by NETGUC_SWITCH_MODE:
+#   sequential  the classic one-switch-at-a-time chain (the default)
+#   batch       the vectorized engine of scripts/core/batch_switch.py: much
+#               faster for large k, but a different Markov chain whose
+#               output only approximates the sequential chain's
+#               distribution, so it is only used when asked for
+MODES = ("sequential", "batch")
+
+
+def default_mode():
+    """Switch engine from NETGUC_SWITCH_MODE (default sequential)."""
+    value = os.environ.get("NETGUC_SWITCH_MODE", "sequential").strip().lower()
+    if value not in MODES:
+        raise ValueError(f"NETGUC_SWITCH_MODE must be one of {', '.join(MODES)}, not {value!r}")
+    return value
+
+
+def anonymize(graph, k, mode=None, batch_size=None, seed=None, workers=1):
+    """Apply k degree-preserving edge switch attempts to a CSRGraph.
+
+    mode="sequential" runs the classic one-switch-at-a-time chain on an
+    indexed edge store; mode="batch" uses the vectorized engine in
+    `scripts/core/batch_switch.py`, drawing the candidates of every batch in
+    `workers` processes (see MODES; default from NETGUC_SWITCH_MODE). The
+    output is reproducible for the same `seed`, whatever `workers` is.
+
+    Returns (anonymized CSRGraph on the same node set, stats dict with
+    `attempted`, `accepted` and `acceptance_rate`).
+    """
+    rngs = spawn_rngs(seed, STREAMS)
+    rng = rngs[0]
+    mode = mode or default_mode()
+
+    if mode == "batch":
+        src, dst, stats = batch_switch(graph.src, graph.dst, graph.number_of_nodes(), k, rngs, batch_size, workers)
+    elif mode == "sequential":
+        store = EdgeStore(graph.src, graph.dst, graph.number_of_nodes())
+        accepted = switch_edges(store, k, rng)
+        src, dst = store.arrays()
+        stats = {"attempted": k, "accepted": accepted, "acceptance_rate": accepted / k if k > 0 else 0.0}
+    else:
+        raise ValueError(f"Unknown switch mode: {mode!r}")
+
+    return graph.with_edges(src, dst), stats
+
+
+def run(file_path, k, mode=None, batch_size=None, seed=None, workers=1):
+    # Stream whatever file the user selected in the GUI into the CSR core
+    graph = load_graph(file_path)
+
+    print(f"Loaded {graph.number_of_edges()} edges.")
+
+    if external.enabled(graph):
+        # Larger than the memory budget: switch on disk and stream the result out
+        # (always the batched chain; see scripts/core/external.py)
+        out_path = os.path.join(os.path.dirname(file_path), f"{base_name(file_path)}_randadddel.mtx")
+        stats = external.switch_to_mtx(graph, k, out_path, spawn_rngs(seed, 1)[0], batch_size=batch_size,
+                                       comment="random_add_delete output")
+        print(f"Accepted {stats['accepted']} of {stats['attempted']} switch attempts "
+              f"(acceptance rate {stats['acceptance_rate']:.4f}, out of core).")
+        print(f"Saved modified graph to: {out_path}")
+        return out_path
+
+    # Switch edges (indexed edge store or vectorized batches)
+    out, stats = anonymize(graph, k, mode=mode, batch_size=batch_size, seed=seed, workers=workers)
+    print(f"Accepted {stats['accepted']} of {stats['attempted']} switch attempts "
+          f"(acceptance rate {stats['acceptance_rate']:.4f}).")
+
+    # Draw per the render policy, positioned by the original graph's layout
+    view = render.view(out, layout_graph=graph)
+    if view is not None:
+        plt = render.pyplot()
+        nx = render.networkx()
+        plt.figure(figsize=(8,8))
+        nx.draw(
+            view.G,
+            view.pos,
+            with_labels=view.labels,
+            node_color="lightblue",
+            node_size=view.node_size(600),
+            edge_color="gray",
+            )
+        view.show()
 
     # Save modified graph as .mtx next to the input file
     try:
-        base = os.path.splitext(os.path.basename(file_path))[0]
+        base = base_name(file_path)
         out_path = os.path.join(os.path.dirname(file_path), f"{base}_randadddel.mtx")
-        save_graph_as_mtx(cpyG, out_path, comment="random_add_delete output", remap_to_one_based=False)
+        save_graph_as_mtx(out, out_path, comment="random_add_delete output", remap_to_one_based=False)
         print(f"Saved modified graph to: {out_path}")
         return out_path
     except Exception as e:
@@ -1,85 +1,167 @@
-import io
 import os
-import random
-import networkx as nx
-import matplotlib.pyplot as plt
-from scripts.utils.util_mtx import save_graph_as_mtx
+import numpy as np
+from scripts.core.edge_store import EdgeStore
+from scripts.core import progress, render, telemetry
+from scripts.core.overlay import OverlayGraph
+from scripts.core.parallel import STREAMS, WorkerPool, spawn_rngs
+from scripts.utils.util_mtx import base_name, load_graph, save_graph_as_mtx
 
-## rand add/del function
-
-def run(file_path, k):
-    # Open whatever file the user selected in the GUI
-    with open(file_path) as f:
-        lines = [l for l in f if not l.startswith('%') and not l.startswith('%%')]
-
-    # Parse the MTX metadata
-    _, _, num_edges = map(int, lines[0].split())
-
-    # Convert each remaining line into a tuple (u, v)
-    edges_data = [tuple(map(int, line.split())) for line in lines[1:]]
+# Registry metadata, read without importing this file (scripts/core/registry.py)
+SCRIPT = {"category": "Anonymization", "outputs_graph": True, "description": "Add k random non-edges and delete k random edges"}
 
-    print(f"Loaded {len(edges_data)} edges.")
-    
-    # Create graph
-    G = nx.Graph()
-    G.add_edges_from(edges_data)
-
-    # Deterministic layout
-    pos = nx.spring_layout(G, seed=42)
-
-    # Create graph
-    cpyG = G.copy()
-    nodes = list(cpyG.nodes())
+## rand add/del function
 
+# Fall back to enumerating the non-edges once the graph is this dense: below
+# it, rejection sampling needs fewer than 1 / (1 - DENSE_FRACTION) draws.
+DENSE_FRACTION = 0.75
+# Random numbers are drawn from NumPy in blocks of this size.
+DRAW_CHUNK = 1 << 14
+# The add/delete loop reports progress every this many iterations.
+PROGRESS_EVERY = 1 << 12
+
+
+def _uniform(rng, size):
+    """Endless stream of uniform floats in [0, 1), drawn in blocks."""
+    while True:
+        yield from rng.random(size).tolist()
+
+
+def _draw_pairs(count, n, rng):
+    """`count` random node pairs with distinct endpoints (runs in a worker)."""
+    u = rng.integers(0, n, size=count)
+    v = rng.integers(0, n, size=count)
+    keep = u != v
+    return u[keep], v[keep]
+
+
+def _candidates(pairs, rng, n, overlay):
+    """Pre-drawn candidate pairs in stream order, then pairs from `rng`.
+
+    Yields (u, v, in_base): whether the pair is an edge of the input graph
+    is looked up for a whole block at once.
+    """
+    for u, v in pairs:
+        yield from zip(u.tolist(), v.tolist(), overlay.base_has_edges(u, v).tolist())
+    while True:
+        u, v = _draw_pairs(DRAW_CHUNK, n, rng)
+        yield from zip(u.tolist(), v.tolist(), overlay.base_has_edges(u, v).tolist())
+
+
+def _enumerate_nonedges(store, n):
+    """EdgeStore with every missing pair u < v (only used on dense graphs)."""
+    u, v = np.triu_indices(n, 1)
+    src, dst = store.arrays()
+    present = np.sort(np.minimum(src, dst) * n + np.maximum(src, dst))
+    keys = u.astype(np.int64) * n + v
+    missing = ~np.isin(keys, present, assume_unique=True)
+    return EdgeStore(u[missing], v[missing], n)
+
+
+@telemetry.timed("add/delete")
+def anonymize(graph, k, seed=None, workers=1):
+    """Add k random non-edges and delete k random existing edges of a CSRGraph.
+
+    Every iteration adds one pair that is not an edge, then deletes one of
+    the edges that existed before that addition. The edits are kept in an
+    `OverlayGraph` over the input, which is never copied. Non-edges are drawn
+    by rejection sampling (candidates are checked against the input's CSR a
+    block at a time, then against the overlay's edits); above DENSE_FRACTION
+    of all pairs the non-edges are enumerated once and maintained alongside
+    the edges instead.
+
+    The candidate pairs for the rejection sampler are drawn up front in
+    STREAMS chunks, each from its own generator spawned from `seed`, on
+    `workers` processes; the add/delete chain itself is sequential. The
+    output is reproducible for the same `seed`, whatever `workers` is.
+
+    Returns (anonymized CSRGraph on the same node set, iterations done).
+    """
+    rngs = spawn_rngs(seed, STREAMS + 1)
+    rng = rngs[0]
+    n = graph.number_of_nodes()
+    store = OverlayGraph(graph)
+    m = len(store)
+    total_pairs = n * (n - 1) // 2
+    loops = int(np.count_nonzero(np.asarray(graph.src) == np.asarray(graph.dst)))
+
+    # Enough candidates for k additions at the starting rejection rate.
+    free = total_pairs - (m - loops)
+    pairs = []
+    if k > 0 and free > (1 - DENSE_FRACTION) * total_pairs:
+        per_stream = int(np.ceil(1.1 * k * total_pairs / free / STREAMS)) + 16
+        with WorkerPool({}, workers) as pool:
+            pairs = pool.map(_draw_pairs, [(per_stream, n, r) for r in rngs[1:]])
+    candidates = _candidates(pairs, rng, max(n, 1), store)
+    uniform = _uniform(rng, DRAW_CHUNK)
+    nonedges = None
+
+    done = 0
+    progress.start("edits", k)
     for _ in range(k):
-
-        # get all possible node pairs
-        possibleEdges = set((u, v) for i, u in enumerate(nodes)
-                                        for v in nodes[i+1:])
-
-        #find existing edges
-        edges = set(cpyG.edges())
-
-        # false edges possibilities (all edges that could exist but don't)
-        nonedges = list(possibleEdges - edges)
-
+        pair_edges = len(store) - loops
         # no more possibilities (there are no remaining possible edges that dont exist)
-        if not nonedges:
-            break
-        # take a random edge from the list we just made
-        newedge = random.choice(nonedges)
-
-        # add this edge to the graph copy
-        cpyG.add_edge(*newedge)
-
-        # delete one edge at random
-        trueEdges = list(cpyG.edges())
-
-        # error handling if there are no more true edges (this shouldn't really happen)
-        if not trueEdges:
+        if pair_edges >= total_pairs or m == 0:
             break
 
-        edgeToRemove = random.choice(list(edges))
-        cpyG.remove_edge(*edgeToRemove)
-    plt.figure(figsize=(8,8))
-    nx.draw(
-        cpyG,
-        pos,
-        with_labels=True,
-        node_color="lightblue",
-        node_size=600,
-        edge_color="gray",
-        )
-    try:
-        plt.show(block=False)
-    except TypeError:
-        plt.show()
+        if nonedges is None and pair_edges > DENSE_FRACTION * total_pairs:
+            nonedges = _enumerate_nonedges(store, n)
+
+        # take a random non-edge
+        if nonedges is not None:
+            u, v = nonedges.remove_at(int(rng.integers(len(nonedges))))
+        else:
+            for u, v, in_base in candidates:
+                if not store.has_edge(u, v, in_base):
+                    break
+
+        # delete one of the edges that existed before the addition: its slot
+        # is drawn first, and adding never moves an existing edge
+        r = store.random_slot(uniform)
+        store.add(u, v)
+        x, y = store.remove_at(r)
+        if x == y:
+            loops -= 1
+        elif nonedges is not None:
+            nonedges.add(x, y)
+        done += 1
+        if not done % PROGRESS_EVERY:
+            progress.advance("edits", PROGRESS_EVERY)
+
+    telemetry.count("add/delete iterations", done)
+    telemetry.count("add/delete overlay edits", len(store.removed) + len(store.src))
+    return store.to_graph(), done
+
+
+def run(file_path, k, seed=None, workers=1):
+    # Stream whatever file the user selected in the GUI into the CSR core
+    graph = load_graph(file_path)
+
+    print(f"Loaded {graph.number_of_edges()} edges.")
+
+    out, done = anonymize(graph, k, seed=seed, workers=workers)
+    print(f"Added and deleted {done} edges.")
+
+    # Draw per the render policy, positioned by the original graph's layout
+    view = render.view(out, layout_graph=graph)
+    if view is not None:
+        plt = render.pyplot()
+        nx = render.networkx()
+        plt.figure(figsize=(8,8))
+        nx.draw(
+            view.G,
+            view.pos,
+            with_labels=view.labels,
+            node_color="lightblue",
+            node_size=view.node_size(600),
+            edge_color="gray",
+            )
+        view.show()
 
     # Save modified graph as .mtx next to the input file
     try:
-        base = os.path.splitext(os.path.basename(file_path))[0]
+        base = base_name(file_path)
         out_path = os.path.join(os.path.dirname(file_path), f"{base}_randswitch.mtx")
-        save_graph_as_mtx(cpyG, out_path, comment="random_switch output", remap_to_one_based=False)
+        save_graph_as_mtx(out, out_path, comment="random_switch output", remap_to_one_based=False)
         print(f"Saved modified graph to: {out_path}")
         return out_path
     except Exception as e:
@@ -1,142 +1,88 @@
-import io
-import random
-import networkx as nx
-import matplotlib.pyplot as plt
-
-
-
-def run(file_path, k):
-    # Open whatever file the user selected in the GUI
-    with open(file_path) as f:
-        lines = [l for l in f if not l.startswith('%') and not l.startswith('%%')]
-
-    # Parse the MTX metadata
-    _, _, num_edges = map(int, lines[0].split())
-
-    # Convert each remaining line into a tuple (u, v)
-    edges_data = [tuple(map(int, line.split())) for line in lines[1:]]
-
-    print(f"Loaded {len(edges_data)} edges.")
-    print(f"Random Walk Anonymization with walk length k={k}")
-
-    # Create original graph
-    G = nx.Graph()
-    G.add_edges_from(edges_data)
-
-    # Deterministic layout (computed on original graph for consistency)
-    pos = nx.spring_layout(G, seed=42)
-
-    # Make a copy of G for anonymization (preserve original)
-    cpyG = G.copy()
-    
-    # Get list of edges to process (from original graph structure)
-    # We iterate over original edges to ensure each edge is processed exactly once
-    edges_to_process = list(G.edges())
-    
-    # Track statistics
-    self_loops_avoided = 0
-    duplicates_avoided = 0
-    
-    # For each edge (u, v) in original graph, perform random walk anonymization
-    for u, v in edges_to_process:
-        # Perform a random walk of length k starting from v
-        # Walk is performed on ORIGINAL graph G to maintain proper statistics
-        current = v
-        
-        # Random walk: start at v, take k steps
-        for step in range(k):
-            # Get neighbors of current node in original graph
-            neighbors = list(G.neighbors(current))
-            
-            # If no neighbors (isolated node), cannot continue walk
-            # Endpoint remains at current node
-            if not neighbors:
-                break
-            
-            # Move to random neighbor (uniform random choice)
-            # This naturally preserves degree distribution: high-degree nodes
-            # are visited more frequently
-            current = random.choice(neighbors)
-        
-        # Endpoint of random walk
-        endpoint = current
-        
-        # Remove original edge (u, v) from anonymized graph
-        if cpyG.has_edge(u, v):
-            cpyG.remove_edge(u, v)
-        
-        # Add anonymized edge (u, endpoint) with constraints:
-        # 1. Avoid self-loops: u != endpoint
-        # 2. Avoid duplicates: edge (u, endpoint) should not already exist
-        
-        # Check for self-loop
-        if u == endpoint:
-            # Self-loop detected: keep original edge or use a neighbor of u
-            # Strategy: use a random neighbor of u (if available) instead
-            u_neighbors = list(G.neighbors(u))
-            if u_neighbors:
-                # Exclude v to avoid recreating original edge
-                candidates = [n for n in u_neighbors if n != v]
-                if candidates:
-                    endpoint = random.choice(candidates)
-                else:
-                    # If only v is available, use it (better than self-loop)
-                    endpoint = v
-            else:
-                # u has no neighbors, cannot avoid self-loop
-                # Keep original edge in this case
-                cpyG.add_edge(u, v)
-                self_loops_avoided += 1
-                continue
-        
-        # Check for duplicate edge
-        if cpyG.has_edge(u, endpoint):
-            # Duplicate detected: try to find alternative endpoint
-            # Strategy: continue walk one more step or use different neighbor
-            endpoint_neighbors = list(G.neighbors(endpoint))
-            if endpoint_neighbors:
-                # Take one more step to avoid duplicate
-                alternative_endpoint = random.choice(endpoint_neighbors)
-                if alternative_endpoint != u and not cpyG.has_edge(u, alternative_endpoint):
-                    endpoint = alternative_endpoint
-                else:
-                    # If alternative also creates duplicate/self-loop, keep original edge
-                    cpyG.add_edge(u, v)
-                    duplicates_avoided += 1
-                    continue
-            else:
-                # No alternative, keep original edge
-                cpyG.add_edge(u, v)
-                duplicates_avoided += 1
-                continue
-        
-        # Add the anonymized edge (u, endpoint)
-        # This preserves the number of edges (one-to-one replacement)
-        cpyG.add_edge(u, endpoint)
-    
-    # Print statistics
-    print(f"Anonymization complete.")
-    print(f"  Original edges: {G.number_of_edges()}")
-    print(f"  Anonymized edges: {cpyG.number_of_edges()}")
-    print(f"  Self-loops avoided: {self_loops_avoided}")
-    print(f"  Duplicates avoided: {duplicates_avoided}")
-    
-    # Check connectivity
-    if not nx.is_connected(cpyG):
-        num_components = nx.number_connected_components(cpyG)
-        print(f"  Warning: Graph has {num_components} connected components")
-    else:
-        print(f"  Graph remains connected")
-    
-    # Visualize anonymized graph
-    plt.figure(figsize=(8,8))
-    nx.draw(
-        cpyG,
-        pos,
-        with_labels=True,
-        node_color="lightcoral",
-        node_size=600,
-        edge_color="gray",
-        )
-    plt.title(f"Random Walk Anonymization (k={k})")
-    plt.show()
+import os
+from scripts.core import external, render
+from scripts.core.parallel import STREAMS, spawn_rngs
+from scripts.core.walk_engine import parallel_walks, walk_anonymize
+from scripts.utils.util_mtx import base_name, load_graph, save_graph_as_mtx
+
+# Registry metadata, read without importing this file (scripts/core/registry.py)
+SCRIPT = {"category": "Anonymization", "outputs_graph": True, "description": "Replace every edge by the end of a k-step random walk"}
+
+
+
+def anonymize(graph, k, seed=None, workers=1):
+    """Random walk anonymization of a CSRGraph with walk length k.
+
+    Every edge (u, v) becomes (u, x) where x ends a k-step walk from v; all
+    walkers advance together on the CSR arrays (see
+    `scripts/core/walk_engine.py`), split across `workers` processes. The
+    output is reproducible for the same `seed` and `workers`.
+    Returns (anonymized CSRGraph, stats).
+    """
+    rngs = spawn_rngs(seed, STREAMS + 1)
+    endpoints = parallel_walks(graph, graph.dst, k, rngs[1:], workers)
+    src, dst, stats = walk_anonymize(graph, k, rngs[0], endpoints=endpoints)
+    return graph.with_edges(src, dst), stats
+
+
+def run(file_path, k, seed=None, workers=1):
+    # Stream whatever file the user selected in the GUI into the CSR core
+    graph = load_graph(file_path)
+
+    print(f"Loaded {graph.number_of_edges()} edges.")
+    print(f"Random Walk Anonymization with walk length k={k}")
+
+    if external.enabled(graph):
+        # Larger than the memory budget: walk chunk by chunk and sort on disk
+        out_path = os.path.join(os.path.dirname(file_path), f"{base_name(file_path)}_randwalk.mtx")
+        stats = external.walk_to_mtx(graph, k, out_path, spawn_rngs(seed, 1)[0], comment="random_walk output")
+        print(f"Anonymization complete (out of core).")
+        print(f"  Self-loops avoided: {stats['self_loops_redirected']}")
+        print(f"  Duplicates avoided: {stats['duplicates_avoided']}")
+        print(f"Saved anonymized graph to: {out_path}")
+        return out_path
+
+    # All walks advance together; self-loop and duplicate fallbacks are
+    # resolved afterwards in vectorized passes
+    out, stats = anonymize(graph, k, seed=seed, workers=workers)
+
+    # Print statistics
+    print(f"Anonymization complete.")
+    print(f"  Original edges: {graph.number_of_edges()}")
+    print(f"  Anonymized edges: {out.number_of_edges()}")
+    print(f"  Self-loops avoided: {stats['self_loops_redirected']}")
+    print(f"  Duplicates avoided: {stats['duplicates_avoided']}")
+    
+    # Check connectivity
+    num_components = out.number_connected_components()
+    if num_components > 1:
+        print(f"  Warning: Graph has {num_components} connected components")
+    else:
+        print(f"  Graph remains connected")
+    
+    # Visualize anonymized graph (layout computed on original graph for consistency)
+    view = render.view(out, layout_graph=graph)
+    if view is not None:
+        plt = render.pyplot()
+        nx = render.networkx()
+        plt.figure(figsize=(8,8))
+        nx.draw(
+            view.G,
+            view.pos,
+            with_labels=view.labels,
+            node_color="lightcoral",
+            node_size=view.node_size(600),
+            edge_color="gray",
+            )
+        plt.title(f"Random Walk Anonymization (k={k})")
+        view.show()
+
+    # Save modified graph as .mtx next to the input file
+    base = base_name(file_path)
+    out_path = os.path.join(os.path.dirname(file_path), f"{base}_randwalk.mtx")
+    try:
+        save_graph_as_mtx(out, out_path, comment="random_walk output", remap_to_one_based=False)
+        print(f"Saved anonymized graph to: {out_path}")
+        return out_path
+    except (OSError, ValueError, ImportError) as e:
+        print(f"Failed to save .mtx: {e}")
+        return None
@@ -0,0 +1,177 @@
+import numpy as np
+from scripts.core import progress, telemetry
+from scripts.core.parallel import WorkerPool, shared_arrays, split
+
+## Batched degree-preserving edge switches
+#
+# A batch draws B candidate pairs of edge slots (i, j) at once. Candidate
+# (a, b), (c, d) -> (a, d), (b, c) is rejected when
+#   - i == j or the four endpoints are not distinct          ("invalid")
+#   - (a, d) or (b, c) is already an edge at batch start    ("existing")
+#   - it shares a slot or a new edge with an earlier valid
+#     candidate of the same batch                           ("conflict")
+# and every surviving candidate is applied in one vectorized step.
+#
+# The survivors touch disjoint slots and create distinct new edges, so they
+# can be applied together: the result is always a simple graph with the
+# degree sequence preserved. It is not what the sequential chain would
+# produce, though. The existing-edge check only sees the graph at batch
+# start, and a losing candidate still blocks its slots for the rest of the
+# batch, so the batched process is a different Markov chain. Its
+# distribution only approximates the sequential chain's, more closely for
+# small batches (B << m), and the acceptance rate drops as B grows;
+# `stats["conflict"]` reports how many attempts were lost that way.
+
+
+def _keys(u, v, n):
+    return np.minimum(u, v) * n + np.maximum(u, v)
+
+
+def _first_owner(first, second):
+    """Earliest candidate touching each value, for both values of every candidate.
+
+    Candidate t owns values `first[t]` and `second[t]`. Returns two arrays
+    with, for each of them, the smallest t that touches the same value.
+    """
+    values = np.column_stack((first, second)).ravel()
+    # A stable sort keeps equal values in candidate order, so the head of
+    # each run of equal values belongs to the earliest candidate.
+    order = np.argsort(values, kind="stable")
+    sorted_values = values[order]
+    starts = np.ones(len(values), dtype=bool)
+    starts[1:] = sorted_values[1:] != sorted_values[:-1]
+    head = order[starts][np.cumsum(starts) - 1] // 2
+    owner = np.empty(len(values), dtype=np.int64)
+    owner[order] = head
+    return owner[0::2], owner[1::2]
+
+
+def default_batch_size(m):
+    """Batch size that keeps the conflict rate around 5%."""
+    return int(max(256, min(1 << 20, m // 80)))
+
+
+def propose(src, dst, keys, n, size, rng):
+    """Draw `size` candidate switches and drop invalid ones and existing edges.
+
+    Returns (i, j, new_ad, new_bc, invalid, existing): the surviving slot
+    pairs and their new edge keys in draw order, and the rejection counts.
+    """
+    m = len(src)
+    i = rng.integers(0, m, size)
+    j = rng.integers(0, m, size)
+    a, b = src[i], dst[i]
+    c, d = src[j], dst[j]
+
+    valid = (i != j) & (a != b) & (c != d) & (a != c) & (a != d) & (b != c) & (b != d)
+    new_ad = _keys(a, d, n)
+    new_bc = _keys(b, c, n)
+    exists = _contains(keys, np.concatenate([new_ad, new_bc]))
+    exists = exists[:size] | exists[size:]
+
+    keep = valid & ~exists
+    invalid = size - int(valid.sum())
+    existing = int((valid & exists).sum())
+    return i[keep], j[keep], new_ad[keep], new_bc[keep], invalid, existing
+
+
+def _propose_task(size, n, rng):
+    arrays = shared_arrays()
+    return propose(arrays["src"], arrays["dst"], arrays["keys"], n, size, rng), rng
+
+
+@telemetry.timed("switch")
+def batch_switch(src, dst, n, k, rng, batch_size=None, workers=None):
+    """Attempt `k` degree-preserving switches in vectorized batches.
+
+    `rng` is a NumPy generator, or a list of generators that draw the
+    candidates of every batch in shares on `workers` processes (default: one
+    per generator). Share w of each batch always comes from `rng[w]`, so
+    results only depend on the generators, not on `workers`. Conflict
+    resolution and updates happen in this process.
+
+    `src`/`dst` are compact endpoint arrays and are not modified; returns
+    `(src, dst, stats)` with the new edge arrays and a dict of counters:
+    `attempted`, `accepted`, `invalid`, `existing`, `conflict` and
+    `acceptance_rate` (accepted / attempted).
+    """
+    rngs = list(rng) if isinstance(rng, (list, tuple)) else [rng]
+    src = np.array(src, dtype=np.int64)
+    dst = np.array(dst, dtype=np.int64)
+    m = len(src)
+    stats = {"attempted": 0, "accepted": 0, "invalid": 0, "existing": 0, "conflict": 0}
+    if m < 2 or k <= 0:
+        stats["acceptance_rate"] = 0.0
+        return src, dst, stats
+
+    batch_size = batch_size or default_batch_size(m)
+    keys = np.sort(_keys(src, dst, n))
+
+    with WorkerPool({"src": src, "dst": dst, "keys": keys}, workers or len(rngs)) as pool:
+        # work on the (possibly shared) views so the workers see every update
+        src, dst, keys = pool.arrays["src"], pool.arrays["dst"], pool.arrays["keys"]
+
+        remaining = k
+        progress.start("switch attempts", k)
+        while remaining > 0:
+            size = min(batch_size, remaining)
+            remaining -= size
+            stats["attempted"] += size
+            progress.advance("switch attempts", size)
+
+            shares = [(stop - start, n, r) for (start, stop), r in zip(split(size, len(rngs)), rngs)]
+            results = pool.map(_propose_task, shares)
+            rngs = [r for _, r in results]
+            parts = [p for p, _ in results]
+            i, j, new_ad, new_bc = (np.concatenate([p[f] for p in parts]) for f in range(4))
+            stats["invalid"] += sum(p[4] for p in parts)
+            stats["existing"] += sum(p[5] for p in parts)
+            if len(i) == 0:
+                continue
+
+            # Earliest candidate wins every slot and every new edge it touches.
+            t = np.arange(len(i))
+            slot_i, slot_j = _first_owner(i, j)
+            key_ad, key_bc = _first_owner(new_ad, new_bc)
+            wins = (slot_i == t) & (slot_j == t) & (key_ad == t) & (key_bc == t)
+            stats["conflict"] += len(i) - int(wins.sum())
+            if not wins.any():
+                continue
+            stats["accepted"] += int(wins.sum())
+
+            i, j, new_ad, new_bc = i[wins], j[wins], new_ad[wins], new_bc[wins]
+            a, b = src[i], dst[i]
+            c, d = src[j], dst[j]
+
+            # Update the sorted key set: drop the old edges, insert the new ones.
+            old = np.sort(np.concatenate([_keys(a, b, n), _keys(c, d, n)]))
+            kept = np.delete(keys, np.searchsorted(keys, old))
+            new = np.sort(np.concatenate([new_ad, new_bc]))
+            keys[:] = np.insert(kept, np.searchsorted(kept, new), new)
+
+            # slot i becomes (a, d), slot j becomes (b, c)
+            dst[i] = d
+            src[j] = b
+            dst[j] = c
+
+        src, dst = src.copy(), dst.copy()
+
+    stats["acceptance_rate"] = stats["accepted"] / stats["attempted"] if stats["attempted"] else 0.0
+    for key in ("attempted", "accepted", "invalid", "existing", "conflict"):
+        telemetry.count(f"switch {key}", stats[key])
+    return src, dst, stats
+
+
+def _contains(sorted_keys, queries):
+    """Vectorized membership test of `queries` in a sorted key array.
+
+    Queries are sorted first: binary searches over ascending queries hit the
+    same cache lines, which is several times faster on large key arrays.
+    """
+    order = np.argsort(queries)
+    q = queries[order]
+    idx = np.searchsorted(sorted_keys, q)
+    idx[idx == len(sorted_keys)] = 0
+    found = np.empty(len(queries), dtype=bool)
+    found[order] = sorted_keys[idx] == q
+    return found
@@ -0,0 +1,285 @@
+import math
+import os
+import numpy as np
+from scripts.core import progress, telemetry
+from scripts.core.graph import connected_components, expand
+from scripts.core.parallel import STREAMS, WorkerPool, shared_arrays, spawn_rngs, split
+
+## Betweenness centrality on the CSR arrays
+#
+# Values are normalized like `nx.betweenness_centrality(G, normalized=True)`
+# for an undirected graph: the sum over ordered pairs (s, t) of the fraction
+# of shortest s-t paths through v, divided by (n - 1)(n - 2).
+#
+# `exact` is Brandes' algorithm with one level-synchronous BFS per source,
+# the sources split across worker processes.
+#
+# `approximate` is the Riondato-Kornaropoulos estimator: it samples
+#   r = ceil(c / eps^2 * (floor(log2(VD - 2)) + 1 + ln(1 / delta)))
+# node pairs (s, t) uniformly, one uniformly random shortest s-t path per
+# pair, and credits 1 / r to every interior node of the path. VD is an upper
+# bound on the vertex diameter (nodes on a longest shortest path), from one
+# BFS per connected component. With probability at least 1 - delta every
+# node's estimate is within eps of its betweenness (the RK normalization by
+# n(n - 1), i.e. within eps * n / (n - 2) on the scale above), at once for
+# all nodes. The number of samples does not depend on the size of the graph.
+
+#
+# NETGUC_BC_MODE picks the algorithm used by util_betweenness_centrality:
+# `exact`, `approximate`, or `auto` (the default: exact up to
+# NETGUC_BC_EXACT_MAX_NODES nodes, approximate above). NETGUC_BC_EPSILON and
+# NETGUC_BC_DELTA set the approximation guarantee.
+
+MODES = ("auto", "exact", "approximate")
+EXACT_MAX_NODES = 5000
+EPSILON = 0.05
+DELTA = 0.1
+RK_CONSTANT = 0.5
+
+
+def mode():
+    """Current betweenness mode from NETGUC_BC_MODE (default "auto")."""
+    value = os.environ.get("NETGUC_BC_MODE", "auto").strip().lower()
+    if value not in MODES:
+        raise ValueError(f"NETGUC_BC_MODE must be one of {', '.join(MODES)}, not {value!r}")
+    return value
+
+
+def exact_max_nodes():
+    return int(os.environ.get("NETGUC_BC_EXACT_MAX_NODES", EXACT_MAX_NODES))
+
+
+def default_epsilon():
+    return float(os.environ.get("NETGUC_BC_EPSILON", EPSILON))
+
+
+def default_delta():
+    return float(os.environ.get("NETGUC_BC_DELTA", DELTA))
+
+
+def _bfs(indptr, indices, source, targets=None):
+    """BFS from `source` counting shortest paths.
+
+    Returns (dist, sigma, levels, edges): levels[d] holds the nodes at
+    distance d (sorted) and edges[d] = (owner, nbrs) the DAG edges from
+    level d to level d + 1, owner being positions in levels[d]. With
+    `targets`, stops once all of them have been reached.
+    """
+    n = len(indptr) - 1
+    dist = np.full(n, -1, dtype=np.int32)
+    sigma = np.zeros(n, dtype=np.float64)
+    dist[source] = 0
+    sigma[source] = 1.0
+    frontier = np.array([source], dtype=np.int64)
+    levels, edges = [frontier], []
+    depth = 0
+    while len(frontier):
+        if targets is not None and (dist[targets] >= 0).all():
+            break
+        owner, nbrs = expand(indptr, indices, frontier)
+        nxt = np.unique(nbrs[dist[nbrs] < 0])
+        dist[nxt] = depth + 1
+        on_dag = dist[nbrs] == depth + 1
+        owner, nbrs = owner[on_dag], nbrs[on_dag]
+        # sigma(w) = sum of sigma over w's predecessors
+        sigma[nxt] = np.bincount(np.searchsorted(nxt, nbrs), weights=sigma[frontier[owner]], minlength=len(nxt))
+        edges.append((owner, nbrs))
+        levels.append(nxt)
+        frontier = nxt
+        depth += 1
+    return dist, sigma, levels, edges
+
+
+def _dependencies(n, sigma, levels, edges):
+    """Brandes' backward pass: delta(v) for every node of the BFS DAG."""
+    delta = np.zeros(n, dtype=np.float64)
+    for depth in range(len(edges) - 1, -1, -1):
+        owner, nbrs = edges[depth]
+        if not len(owner):
+            continue
+        level = levels[depth]
+        share = sigma[level[owner]] / sigma[nbrs] * (1.0 + delta[nbrs])
+        delta[level] += np.bincount(owner, weights=share, minlength=len(level))
+    return delta
+
+
+def _add_distances(dist, dist_sum, harm_sum, weight=1):
+    """Add one BFS's distances to the per-node closeness sums."""
+    reached = np.flatnonzero(dist > 0)
+    d = dist[reached].astype(np.float64)
+    dist_sum[reached] += weight * d
+    harm_sum[reached] += weight / d
+
+
+def _exact_task(start, stop, with_distances=False):
+    arrays = shared_arrays()
+    indptr, indices, sources = arrays["indptr"], arrays["indices"], arrays["sources"]
+    n = len(indptr) - 1
+    total = np.zeros(n, dtype=np.float64)
+    dist_sum = np.zeros(n if with_distances else 0, dtype=np.float64)
+    harm_sum = np.zeros(n if with_distances else 0, dtype=np.float64)
+    for source in sources[start:stop].tolist():
+        dist, sigma, levels, edges = _bfs(indptr, indices, source)
+        delta = _dependencies(n, sigma, levels, edges)
+        delta[source] = 0.0
+        total += delta
+        if with_distances:
+            _add_distances(dist, dist_sum, harm_sum)
+        progress.advance("BFS sources")
+    return total, dist_sum, harm_sum
+
+
+@telemetry.timed("betweenness")
+def exact(graph, workers=1, sources=None, with_distances=False):
+    """Exact normalized betweenness of every node (Brandes on CSR).
+
+    With `sources`, only shortest paths starting at them are counted; the
+    result keeps the same scaling, so it is a partial sum of the exact value.
+    With `with_distances`, returns (values, dist_sum, harm_sum), the sums of
+    d(s, v) and 1 / d(s, v) over the sources s reaching v, collected from
+    the same BFS runs (see `scripts/core/closeness.py`).
+    """
+    n = graph.number_of_nodes()
+    sources = np.arange(n) if sources is None else np.asarray(sources, dtype=np.int64)
+    arrays = {"indptr": graph.indptr, "indices": graph.indices, "sources": sources}
+    progress.start("BFS sources", len(sources))
+    telemetry.count("BFS sources", len(sources))
+    with WorkerPool(arrays, workers) as pool:
+        tasks = [(a, b, with_distances) for a, b in split(len(sources), pool.workers)]
+        parts = pool.map(_exact_task, tasks)
+    total = np.sum([p[0] for p in parts], axis=0) if parts else np.zeros(n)
+    values = total / ((n - 1) * (n - 2)) if n > 2 else np.zeros(n)
+    if not with_distances:
+        return values
+    dist_sum = np.sum([p[1] for p in parts], axis=0) if parts else np.zeros(n)
+    harm_sum = np.sum([p[2] for p in parts], axis=0) if parts else np.zeros(n)
+    return values, dist_sum, harm_sum
+
+
+def vertex_diameter_bound(graph):
+    """Upper bound on the number of nodes of any shortest path.
+
+    A BFS from the smallest node of every component (all run together, level
+    by level) gives each root's eccentricity e; within a component no shortest
+    path is longer than 2e edges, i.e. 2e + 1 nodes.
+    """
+    indptr, indices = graph.indptr, graph.indices
+    n = graph.number_of_nodes()
+    roots = np.unique(connected_components(indptr, indices))
+    seen = np.zeros(n, dtype=bool)
+    seen[roots] = True
+    frontier, depth = roots, 0
+    while True:
+        _, nbrs = expand(indptr, indices, frontier)
+        frontier = np.unique(nbrs[~seen[nbrs]])
+        if not len(frontier):
+            return 2 * depth + 1
+        seen[frontier] = True
+        depth += 1
+
+
+def sample_size(vertex_diameter, epsilon, delta, c=RK_CONSTANT):
+    """Number of RK samples for an (epsilon, delta) guarantee."""
+    vc = int(math.floor(math.log2(vertex_diameter - 2))) + 1 if vertex_diameter > 2 else 1
+    return int(math.ceil(c / epsilon ** 2 * (vc + math.log(1 / delta))))
+
+
+def _sample_path(indptr, indices, dist, sigma, target, rng):
+    """Interior nodes of a uniformly random shortest path ending at `target`."""
+    interior = []
+    node = target
+    while dist[node] > 1:
+        nbrs = indices[indptr[node]:indptr[node + 1]]
+        preds = nbrs[dist[nbrs] == dist[node] - 1]
+        # predecessor p is on a fraction sigma(p) / sigma(node) of the paths
+        cumulative = np.cumsum(sigma[preds])
+        node = int(preds[np.searchsorted(cumulative, rng.random() * cumulative[-1], side="right")])
+        interior.append(node)
+    return interior
+
+
+def _sample_task(start, stop, rng, with_distances=False):
+    arrays = shared_arrays()
+    indptr, indices, pairs = arrays["indptr"], arrays["indices"], arrays["pairs"]
+    n = len(indptr) - 1
+    hits = np.zeros(n, dtype=np.int64)
+    dist_sum = np.zeros(n if with_distances else 0, dtype=np.float64)
+    harm_sum = np.zeros(n if with_distances else 0, dtype=np.float64)
+    chunk = pairs[start:stop]
+    # all pairs with the same source share one (truncated) BFS
+    order = np.argsort(chunk[:, 0], kind="stable")
+    chunk = chunk[order]
+    bounds = np.flatnonzero(np.diff(chunk[:, 0])) + 1
+    for group in np.split(chunk, bounds):
+        if not len(group):
+            continue
+        source, targets = int(group[0, 0]), group[:, 1]
+        # a full BFS doubles as closeness pivot, once per pair drawn
+        dist, sigma, _, _ = _bfs(indptr, indices, source, targets=None if with_distances else targets)
+        if with_distances:
+            _add_distances(dist, dist_sum, harm_sum, weight=len(group))
+        for target in targets.tolist():
+            if dist[target] > 1:
+                hits[_sample_path(indptr, indices, dist, sigma, target, rng)] += 1
+        progress.advance("sampled pairs", len(group))
+    return hits, dist_sum, harm_sum
+
+
+@telemetry.timed("betweenness")
+def approximate(graph, epsilon=EPSILON, delta=DELTA, seed=None, workers=1, with_distances=False):
+    """RK estimate of the normalized betweenness of every node.
+
+    Returns (values, info); info has `samples`, `vertex_diameter` and
+    `epsilon`, the half-width of the simultaneous confidence band on the
+    returned (nx-normalized) values, which holds with probability
+    1 - delta. Reproducible for the same seed, whatever `workers` is.
+
+    The sources of the sampled pairs are uniform, so they also serve as
+    closeness pivots: with `with_distances` the BFS runs are not truncated
+    and info gets `dist_sum` and `harm_sum` over the `samples` sources.
+    """
+    n = graph.number_of_nodes()
+    if n < 3:
+        info = {"samples": 0, "vertex_diameter": n, "epsilon": 0.0, "delta": delta}
+        if with_distances:
+            info.update(dist_sum=np.zeros(n), harm_sum=np.zeros(n))
+        return np.zeros(n), info
+    vd = vertex_diameter_bound(graph)
+    r = sample_size(vd, epsilon, delta)
+
+    rngs = spawn_rngs(seed, STREAMS + 1)
+    s = rngs[0].integers(0, n, size=r)
+    t = rngs[0].integers(0, n - 1, size=r)
+    t[t >= s] += 1  # t uniform over the other n - 1 nodes
+    pairs = np.stack([s, t], axis=1)
+
+    arrays = {"indptr": graph.indptr, "indices": graph.indices, "pairs": pairs}
+    progress.start("sampled pairs", r)
+    telemetry.count("sampled pairs", r)
+    with WorkerPool(arrays, workers) as pool:
+        tasks = [(a, b, rng, with_distances) for (a, b), rng in zip(split(r, STREAMS), rngs[1:])]
+        results = pool.map(_sample_task, tasks)
+    hits = np.sum([res[0] for res in results], axis=0)
+
+    # RK estimates are normalized by n(n - 1); rescale to (n - 1)(n - 2)
+    scale = n / (n - 2)
+    info = {"samples": r, "vertex_diameter": vd, "epsilon": epsilon * scale, "delta": delta}
+    if with_distances:
+        info["dist_sum"] = np.sum([res[1] for res in results], axis=0)
+        info["harm_sum"] = np.sum([res[2] for res in results], axis=0)
+    return hits / r * scale, info
+
+
+def utility_interval(values, threshold, epsilon):
+    """Bounds on the share of nodes with betweenness >= threshold.
+
+    If every estimate is within epsilon of the true value, the true share
+    lies between the share of estimates >= threshold + epsilon and the share
+    of estimates >= threshold - epsilon.
+    """
+    n = len(values)
+    if n == 0:
+        return 0.0, 0.0
+    low = np.count_nonzero(values >= threshold + epsilon) / n
+    high = np.count_nonzero(values >= threshold - epsilon) / n
+    return low, high
@@ -0,0 +1,214 @@
+import hashlib
+import json
+import os
+import struct
+import tempfile
+import numpy as np
+from scripts.core.graph import CSRGraph
+
+## Binary graph cache
+#
+# Parsed graphs are stored as one `<key>.csr` file per source file:
+#
+#   8 bytes   magic  b"NETGUCSR"
+#   4 bytes   format version (little-endian uint32)
+#   8 bytes   length of the JSON header (little-endian uint64)
+#   JSON      source identity, graph meta and the dtype/shape/offset of every array
+#   arrays    raw little-endian arrays, each starting on a 64-byte boundary
+#
+# Entries are opened with `numpy.memmap`, so a warm load only reads the header
+# and the OS shares the pages between processes that open the same graph.
+#
+# Environment:
+#   NETGUC_CACHE=0              disable the cache
+#   NETGUC_CACHE_DIR            cache directory (default ~/.cache/netguc)
+#   NETGUC_CACHE_MAX_BYTES      size limit, least recently used entries are evicted
+
+MAGIC = b"NETGUCSR"
+VERSION = 1
+ALIGN = 64
+DEFAULT_MAX_BYTES = 8 << 30
+# Bytes hashed from the start, middle and end of the source file.
+SAMPLE_BYTES = 1 << 20
+
+_PREFIX = struct.Struct("<8sIQ")
+_ARRAYS = ("node_ids", "src", "dst", "weights", "indptr", "indices")
+
+
+def enabled():
+    return os.environ.get("NETGUC_CACHE", "1").lower() not in ("0", "false", "no", "off")
+
+
+def cache_dir():
+    return os.environ.get("NETGUC_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "netguc")
+
+
+def max_bytes():
+    try:
+        return int(os.environ.get("NETGUC_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES))
+    except ValueError:
+        return DEFAULT_MAX_BYTES
+
+
+def fingerprint(file_path, size=None):
+    """Content hash of `file_path` from its size and three sampled blocks.
+
+    Hashing the first, middle and last `SAMPLE_BYTES` keeps validation cheap
+    on multi-GB inputs; together with the mtime this catches in-place edits.
+    """
+    if size is None:
+        size = os.path.getsize(file_path)
+    h = hashlib.sha1(str(size).encode())
+    with open(file_path, "rb") as fh:
+        for offset in sorted({0, max(0, size // 2 - SAMPLE_BYTES // 2), max(0, size - SAMPLE_BYTES)}):
+            fh.seek(offset)
+            h.update(fh.read(SAMPLE_BYTES))
+    return h.hexdigest()
+
+
+def _source_info(file_path):
+    path = os.path.abspath(file_path)
+    st = os.stat(path)
+    return {"path": path, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def entry_path(file_path):
+    """Cache file used for `file_path` (keyed by path, size and mtime)."""
+    info = _source_info(file_path)
+    key = hashlib.sha1(f"{info['path']}\0{info['size']}\0{info['mtime_ns']}".encode()).hexdigest()[:32]
+    return os.path.join(cache_dir(), key + ".csr")
+
+
+def _read_header(fh):
+    magic, version, header_len = _PREFIX.unpack(fh.read(_PREFIX.size))
+    if magic != MAGIC or version != VERSION:
+        return None
+    return json.loads(fh.read(header_len).decode("utf-8"))
+
+
+def load(file_path):
+    """Open the cached graph for `file_path`, or return None on a miss.
+
+    Stale or unreadable entries count as a miss.
+    """
+    path = entry_path(file_path)
+    try:
+        with open(path, "rb") as fh:
+            header = _read_header(fh)
+    except (OSError, ValueError, struct.error):
+        return None
+    if header is None:
+        return None
+
+    source = header["source"]
+    info = _source_info(file_path)
+    if any(source[k] != info[k] for k in ("path", "size", "mtime_ns")):
+        return None
+    if source["fingerprint"] != fingerprint(file_path, info["size"]):
+        return None
+
+    arrays = {}
+    for name, spec in header["arrays"].items():
+        shape = tuple(spec["shape"])
+        if spec["nbytes"] == 0:
+            arrays[name] = np.empty(shape, dtype=spec["dtype"])
+        else:
+            arrays[name] = np.memmap(path, dtype=spec["dtype"], mode="r", offset=spec["offset"], shape=shape)
+
+    # Touch the entry so eviction sees it as recently used (atime is unreliable).
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+    return CSRGraph(
+        arrays["node_ids"], arrays["src"], arrays["dst"],
+        weights=arrays.get("weights"),
+        indptr=arrays["indptr"], indices=arrays["indices"],
+        meta=header["meta"],
+    )
+
+
+def store(file_path, graph):
+    """Write `graph` as the cache entry for `file_path` and enforce the size limit.
+
+    Returns the entry path, or None if the cache directory is not writable.
+    """
+    info = _source_info(file_path)
+    info["fingerprint"] = fingerprint(file_path, info["size"])
+
+    arrays = {}
+    for name in _ARRAYS:
+        value = getattr(graph, name)
+        if value is not None:
+            arrays[name] = np.ascontiguousarray(value, dtype=np.asarray(value).dtype.newbyteorder("<"))
+
+    # Offsets depend on the header length, so lay out twice until it is stable.
+    specs = {}
+    header_len = 0
+    while True:
+        offset = _align(_PREFIX.size + header_len)
+        for name, arr in arrays.items():
+            specs[name] = {"dtype": arr.dtype.str, "shape": list(arr.shape), "offset": offset, "nbytes": arr.nbytes}
+            offset = _align(offset + arr.nbytes)
+        header = json.dumps({"source": info, "meta": _jsonable(graph.meta), "arrays": specs}).encode("utf-8")
+        if len(header) == header_len:
+            break
+        header_len = len(header)
+
+    directory = cache_dir()
+    path = entry_path(file_path)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(_PREFIX.pack(MAGIC, VERSION, header_len))
+                fh.write(header)
+                for name, arr in arrays.items():
+                    fh.seek(specs[name]["offset"])
+                    arr.tofile(fh)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+    except OSError:
+        return None
+
+    evict(keep=path)
+    return path
+
+
+def evict(limit=None, keep=None):
+    """Delete least recently used entries until the cache fits in `limit` bytes."""
+    limit = max_bytes() if limit is None else limit
+    try:
+        entries = []
+        with os.scandir(cache_dir()) as it:
+            for entry in it:
+                if entry.name.endswith(".csr"):
+                    st = entry.stat()
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+    except OSError:
+        return
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= limit:
+            break
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
+
+
+def _align(offset):
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+
+def _jsonable(meta):
+    return {k: v for k, v in meta.items() if isinstance(v, (str, int, float, bool, type(None)))}
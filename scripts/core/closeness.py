@@ -0,0 +1,272 @@
+import math
+import os
+import numpy as np
+from scripts.core import progress, telemetry
+from scripts.core.betweenness import vertex_diameter_bound
+from scripts.core.graph import connected_components, expand
+from scripts.core.parallel import WorkerPool, shared_arrays, spawn_rngs, split
+
+## Closeness and harmonic centrality on the CSR arrays
+#
+# BFS runs 64 sources at a time (bit-parallel multi-source BFS): every node
+# holds one uint64 word whose bit b says "reached by source b", and a level is
+# one OR-reduction of the frontier words over each node's neighbours. The
+# graph is undirected, so the distances found from the sources can be summed
+# per *reached* node: after BFS from every node, S(v) = sum of d(u, v) and
+# H(v) = sum of 1 / d(u, v) over the nodes u that reach v.
+#
+# Values match networkx:
+#   closeness(v) = r / S(v) * r / (n - 1)   with r = size of v's component - 1
+#                  (Wasserman-Faust scaling, `nx.closeness_centrality`)
+#   harmonic(v)  = H(v) / (n - 1)           (`nx.harmonic_centrality` / (n - 1))
+# Harmonic closeness needs no special case for disconnected graphs.
+#
+# `approximate` is the Eppstein-Wang estimator: BFS from p pivots drawn
+# uniformly with replacement and scale the sums by n / p. With
+#   p = ceil(ln(2n / delta) / (2 eps^2))
+# Hoeffding and a union bound give, with probability at least 1 - delta for
+# all nodes at once: the estimated average distance S(v) / (n - 1) is within
+# eps * D * n / (n - 1) of the true one (D bounds the diameter in edges), and
+# the harmonic value is within eps * n / (n - 1).
+#
+# NETGUC_CC_MODE (`auto`, `exact`, `approximate`), NETGUC_CC_EXACT_MAX_NODES,
+# NETGUC_CC_EPSILON, NETGUC_CC_DELTA and NETGUC_CC_HARMONIC configure
+# util_closeness_centrality, like NETGUC_BC_* for betweenness.
+
+MODES = ("auto", "exact", "approximate")
+EXACT_MAX_NODES = 20000
+EPSILON = 0.05
+DELTA = 0.1
+WORD = 64
+
+_POPCOUNT8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.int64)
+
+
+def mode():
+    """Current closeness mode from NETGUC_CC_MODE (default "auto")."""
+    value = os.environ.get("NETGUC_CC_MODE", "auto").strip().lower()
+    if value not in MODES:
+        raise ValueError(f"NETGUC_CC_MODE must be one of {', '.join(MODES)}, not {value!r}")
+    return value
+
+
+def exact_max_nodes():
+    return int(os.environ.get("NETGUC_CC_EXACT_MAX_NODES", EXACT_MAX_NODES))
+
+
+def default_epsilon():
+    return float(os.environ.get("NETGUC_CC_EPSILON", EPSILON))
+
+
+def default_delta():
+    return float(os.environ.get("NETGUC_CC_DELTA", DELTA))
+
+
+def default_harmonic():
+    return os.environ.get("NETGUC_CC_HARMONIC", "0").lower() in ("1", "true", "yes", "on")
+
+
+def popcount(words):
+    """Number of set bits of every uint64 in `words`."""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words).astype(np.int64)
+    return _POPCOUNT8[words.view(np.uint8)].reshape(-1, 8).sum(axis=1)
+
+
+def _bit_counts(words, width):
+    """For b < width, the number of `words` with bit b set."""
+    bits = np.unpackbits(np.ascontiguousarray(words).view(np.uint8), bitorder="little")
+    return bits.reshape(-1, WORD)[:, :width].sum(axis=0)
+
+
+def _msbfs(indptr, indices, sources, dist_sum, harm_sum, per_source=False):
+    """One bit-parallel BFS from up to 64 `sources`; adds into the sums.
+
+    The sums are indexed by reached node, or with `per_source` by source
+    (position in `sources`), as returned by `source_sums`.
+    """
+    n = len(indptr) - 1
+    deg = np.diff(indptr)
+    bits = np.left_shift(np.uint64(1), np.arange(len(sources), dtype=np.uint64))
+    full = np.bitwise_or.reduce(bits)
+    frontier = np.zeros(n, dtype=np.uint64)
+    np.bitwise_or.at(frontier, sources, bits)
+    seen = frontier.copy()
+    depth = 0
+    while True:
+        depth += 1
+        # pull: only nodes some source has not reached yet can change
+        active = np.flatnonzero((seen != full) & (deg > 0))
+        if not len(active):
+            return
+        owner, nbrs = expand(indptr, indices, active)
+        starts = np.flatnonzero(np.r_[True, owner[1:] != owner[:-1]])
+        new = np.bitwise_or.reduceat(frontier[nbrs], starts) & ~seen[active]
+        if not new.any():
+            return
+        seen[active] |= new
+        frontier[:] = 0
+        frontier[active] = new
+        if per_source:
+            hits = _bit_counts(new, len(sources))
+            dist_sum += depth * hits
+            harm_sum += hits / depth
+        else:
+            hits = popcount(new)
+            dist_sum[active] += depth * hits
+            harm_sum[active] += hits / depth
+
+
+def _sums_task(start, stop, per_source=False):
+    arrays = shared_arrays()
+    indptr, indices, sources = arrays["indptr"], arrays["indices"], arrays["sources"]
+    size = stop - start if per_source else len(indptr) - 1
+    dist_sum = np.zeros(size, dtype=np.float64)
+    harm_sum = np.zeros(size, dtype=np.float64)
+    for lo in range(start, stop, WORD):
+        hi = min(lo + WORD, stop)
+        if per_source:
+            _msbfs(indptr, indices, sources[lo:hi], dist_sum[lo - start:hi - start],
+                   harm_sum[lo - start:hi - start], per_source=True)
+        else:
+            _msbfs(indptr, indices, sources[lo:hi], dist_sum, harm_sum)
+        progress.advance("BFS sources", hi - lo)
+    return dist_sum, harm_sum
+
+
+def _run_sums(graph, sources, workers, per_source):
+    sources = np.asarray(sources, dtype=np.int64)
+    arrays = {"indptr": graph.indptr, "indices": graph.indices, "sources": sources}
+    progress.start("BFS sources", len(sources))
+    telemetry.count("BFS sources", len(sources))
+    with WorkerPool(arrays, workers) as pool:
+        # whole words per task, so no batch runs half empty
+        words = split(-(-len(sources) // WORD), pool.workers)
+        tasks = [(a * WORD, min(b * WORD, len(sources)), per_source) for a, b in words]
+        return pool.map(_sums_task, tasks)
+
+
+def distance_sums(graph, sources, workers=1):
+    """(S, H): sums of d(s, v) and 1 / d(s, v) over `sources` s reaching v."""
+    n = graph.number_of_nodes()
+    parts = _run_sums(graph, sources, workers, per_source=False)
+    dist_sum = np.sum([p[0] for p in parts], axis=0) if parts else np.zeros(n)
+    harm_sum = np.sum([p[1] for p in parts], axis=0) if parts else np.zeros(n)
+    return dist_sum, harm_sum
+
+
+def source_sums(graph, sources, workers=1):
+    """(S, H) per source: sums of d(s, v) and 1 / d(s, v) over the v s reaches.
+
+    On an undirected graph these are the `distance_sums` of a BFS from every
+    node, read at the nodes `sources`, for the cost of BFS from `sources`.
+    """
+    parts = _run_sums(graph, sources, workers, per_source=True)
+    if not parts:
+        return np.zeros(0), np.zeros(0)
+    return np.concatenate([p[0] for p in parts]), np.concatenate([p[1] for p in parts])
+
+
+def _reach(graph):
+    """Number of other nodes in each node's connected component."""
+    labels = connected_components(graph.indptr, graph.indices)
+    return np.bincount(labels, minlength=len(labels))[labels] - 1
+
+
+def _closeness(reach, dist_sum, n):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        values = reach / dist_sum * reach / (n - 1)
+    return np.where(dist_sum > 0, values, 0.0)
+
+
+def from_sums(graph, dist_sum, harm_sum, harmonic=False):
+    """Exact values from the sums of a BFS from every node."""
+    n = graph.number_of_nodes()
+    if n < 2:
+        return np.zeros(n)
+    if harmonic:
+        return harm_sum / (n - 1)
+    return _closeness(_reach(graph), dist_sum, n)
+
+
+@telemetry.timed("closeness")
+def exact(graph, harmonic=False, workers=1):
+    """Exact closeness (or normalized harmonic) centrality of every node."""
+    n = graph.number_of_nodes()
+    if n < 2:
+        return np.zeros(n)
+    dist_sum, harm_sum = distance_sums(graph, np.arange(n), workers)
+    return from_sums(graph, dist_sum, harm_sum, harmonic)
+
+
+def sample_size(n, epsilon, delta):
+    """Number of pivots for an (epsilon, delta) guarantee on n nodes."""
+    return int(math.ceil(math.log(2 * n / delta) / (2 * epsilon ** 2)))
+
+
+def pivot_error(n, pivots, delta):
+    """The epsilon that `pivots` pivots guarantee (inverse of `sample_size`)."""
+    return math.sqrt(math.log(2 * n / delta) / (2 * pivots))
+
+
+def from_pivot_sums(graph, dist_sum, harm_sum, pivots, harmonic=False, delta=DELTA):
+    """Estimates, bounds and info from the sums over `pivots` uniform pivots.
+
+    See `approximate`; the sums may come from any BFS runs whose sources
+    were drawn uniformly with replacement (e.g. betweenness samples).
+    """
+    n = graph.number_of_nodes()
+    epsilon = pivot_error(n, pivots, delta)
+    scale = n / pivots
+    if harmonic:
+        values = harm_sum * scale / (n - 1)
+        err = epsilon * n / (n - 1)
+        info = {"pivots": pivots, "epsilon": err, "delta": delta}
+        return values, np.maximum(values - err, 0.0), np.minimum(values + err, 1.0), info
+
+    reach = _reach(graph)
+    diameter = vertex_diameter_bound(graph) - 1
+    err = epsilon * diameter * n / (n - 1)
+    # bounds on the average distance S / (n - 1), then on closeness
+    avg = dist_sum * scale / (n - 1)
+    # nodes with neighbours are at least at distance 1 on average over reach
+    floor = reach / (n - 1)
+    values = _closeness(reach, avg * (n - 1), n)
+    high = _closeness(reach, np.maximum(avg - err, floor) * (n - 1), n)
+    low = _closeness(reach, (avg + err) * (n - 1), n)
+    info = {"pivots": pivots, "epsilon": err, "delta": delta}
+    # a component no pivot reached estimates 0, below its positive low bound
+    return values, np.minimum(low, values), np.maximum(high, values), info
+
+
+@telemetry.timed("closeness")
+def approximate(graph, harmonic=False, epsilon=EPSILON, delta=DELTA, seed=None, workers=1):
+    """Pivot-sampling estimate of closeness (or harmonic) centrality.
+
+    Returns (values, low, high, info): with probability 1 - delta the true
+    value of every node lies in [low, high]. info has `pivots`, `delta` and
+    `epsilon`, the additive error of the normalized harmonic values or of
+    the average distance (in edges) behind the closeness values.
+    Reproducible for the same seed.
+    """
+    n = graph.number_of_nodes()
+    if n < 2:
+        zeros = np.zeros(n)
+        return zeros, zeros, zeros, {"pivots": 0, "epsilon": 0.0, "delta": delta}
+    p = sample_size(n, epsilon, delta)
+    if p >= n:
+        # as many BFS runs as the exact computation
+        values = exact(graph, harmonic, workers)
+        return values, values, values, {"pivots": n, "epsilon": 0.0, "delta": delta}
+
+    pivots = spawn_rngs(seed, 1)[0].integers(0, n, size=p)
+    dist_sum, harm_sum = distance_sums(graph, pivots, workers)
+    return from_pivot_sums(graph, dist_sum, harm_sum, p, harmonic, delta)
+
+
+def utility_interval(low, high, threshold):
+    """Bounds on the share of nodes with centrality >= threshold."""
+    n = len(low)
+    if n == 0:
+        return 0.0, 0.0
+    return np.count_nonzero(low >= threshold) / n, np.count_nonzero(high >= threshold) / n
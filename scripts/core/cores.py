@@ -0,0 +1,82 @@
+import numpy as np
+from scripts.core import progress, telemetry
+
+## Core decomposition on the CSR arrays
+#
+# `core_number` runs the Batagelj-Zaversnik bucket algorithm once, in O(n + m):
+# nodes are kept sorted by current degree in one array (`vert`) with the start
+# of every degree bucket in `bins`; peeling a node moves each neighbour with a
+# larger degree one bucket down by swapping it with the first node of its
+# bucket. Self loops are ignored (networkx refuses graphs that have them).
+#
+# Everything else is a lookup over the resulting array: the k-core is the set
+# of nodes with core number >= k and the k-shell those with core number == k.
+
+
+@telemetry.timed("core number")
+def core_number(graph):
+    """Core number of every node of a CSRGraph, as an int array."""
+    n = graph.number_of_nodes()
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    indptr, indices = graph.indptr, graph.indices
+    rows = np.repeat(np.arange(n), np.diff(indptr))
+    loops = np.bincount(rows[indices == rows], minlength=n)
+    deg = (np.diff(indptr) - loops).astype(np.int64)
+
+    # bucket sort the nodes by degree
+    bins = np.zeros(int(deg.max()) + 2, dtype=np.int64)
+    np.cumsum(np.bincount(deg), out=bins[1:])
+    vert = np.argsort(deg, kind="stable")
+    pos = np.empty(n, dtype=np.int64)
+    pos[vert] = np.arange(n)
+
+    # plain lists: the loop below touches every edge once from Python
+    deg, bins, vert, pos = deg.tolist(), bins.tolist(), vert.tolist(), pos.tolist()
+    ptr, nbrs = indptr.tolist(), indices.tolist()
+    progress.start("nodes peeled", n)
+    telemetry.count("nodes peeled", n)
+    for i in range(n):
+        if not i & 0xFFFF:
+            progress.advance("nodes peeled", min(0x10000, n - i))
+        v = vert[i]
+        dv = deg[v]
+        for j in range(ptr[v], ptr[v + 1]):
+            u = nbrs[j]
+            du = deg[u]
+            if du > dv:
+                # swap u with the first node of its bucket, then shrink the bucket
+                pu, pw = pos[u], bins[du]
+                w = vert[pw]
+                if u != w:
+                    pos[u], pos[w] = pw, pu
+                    vert[pu], vert[pw] = w, u
+                bins[du] += 1
+                deg[u] = du - 1
+    return np.asarray(deg, dtype=np.int64)
+
+
+def shell_sizes(core):
+    """shell_sizes(core)[k] = number of nodes whose core number is exactly k."""
+    return np.bincount(core) if len(core) else np.zeros(1, dtype=np.int64)
+
+
+def core_sizes(core):
+    """core_sizes(core)[k] = number of nodes in the k-core (core number >= k)."""
+    shells = shell_sizes(core)
+    return np.cumsum(shells[::-1])[::-1]
+
+
+def profile(core):
+    """Rows (k, k-core size, k-shell size) for k = 0..max core number."""
+    shells, cores = shell_sizes(core), core_sizes(core)
+    return [(k, int(cores[k]), int(shells[k])) for k in range(len(shells))]
+
+
+def profile_table(core):
+    """The `profile` of `core` as printable lines, with utilities (size / n)."""
+    n = max(len(core), 1)
+    lines = [f"{'k':>6} {'k-core':>10} {'U_k':>8} {'k-shell':>10} {'U_kShell':>9}"]
+    for k, core_size, shell_size in profile(core):
+        lines.append(f"{k:>6} {core_size:>10} {core_size / n:>8.4f} {shell_size:>10} {shell_size / n:>9.4f}")
+    return lines
@@ -0,0 +1,134 @@
+import numpy as np
+from scripts.core import progress, telemetry
+
+
+class EdgeStore:
+    """Mutable undirected edge set with O(1) expected sample, lookup and update.
+
+    Edges live in two parallel slot lists (`src`, `dst`) so a uniform random
+    edge is one random index. `pos` maps the packed key `min(u, v) * n +
+    max(u, v)` of every edge to its slot; it doubles as the hash set used for
+    existence checks and lets `remove` swap the last slot into the hole.
+
+    Nodes are compact indices 0..n-1 (see `CSRGraph`). Python lists are used
+    rather than NumPy arrays because scalar access from a Python loop is
+    several times faster on lists.
+    """
+
+    def __init__(self, src, dst, n):
+        self.n = n
+        self.src = np.asarray(src).tolist()
+        self.dst = np.asarray(dst).tolist()
+        key = self.key
+        self.pos = {key(u, v): i for i, (u, v) in enumerate(zip(self.src, self.dst))}
+
+    def key(self, u, v):
+        return u * self.n + v if u <= v else v * self.n + u
+
+    def __len__(self):
+        return len(self.src)
+
+    def has_edge(self, u, v):
+        return self.key(u, v) in self.pos
+
+    def edge_at(self, i):
+        return self.src[i], self.dst[i]
+
+    def add(self, u, v):
+        """Append edge (u, v); returns False if it already exists."""
+        k = self.key(u, v)
+        if k in self.pos:
+            return False
+        self.pos[k] = len(self.src)
+        self.src.append(u)
+        self.dst.append(v)
+        return True
+
+    def remove_at(self, i):
+        """Remove the edge in slot `i` by moving the last slot into it."""
+        u, v = self.src[i], self.dst[i]
+        del self.pos[self.key(u, v)]
+        last = len(self.src) - 1
+        if i != last:
+            lu, lv = self.src[last], self.dst[last]
+            self.src[i], self.dst[i] = lu, lv
+            self.pos[self.key(lu, lv)] = i
+        self.src.pop()
+        self.dst.pop()
+        return u, v
+
+    def remove(self, u, v):
+        """Remove edge (u, v); returns False if it does not exist."""
+        i = self.pos.get(self.key(u, v))
+        if i is None:
+            return False
+        self.remove_at(i)
+        return True
+
+    def replace_at(self, i, u, v):
+        """Overwrite slot `i` with edge (u, v), which must not exist yet."""
+        del self.pos[self.key(self.src[i], self.dst[i])]
+        self.src[i], self.dst[i] = u, v
+        self.pos[self.key(u, v)] = i
+
+    def arrays(self):
+        """Current edges as (src, dst) int64 arrays."""
+        return np.array(self.src, dtype=np.int64), np.array(self.dst, dtype=np.int64)
+
+
+@telemetry.timed("switch")
+def switch_edges(store, k, rng, chunk=1 << 16):
+    """Attempt `k` degree-preserving switches on `store`; returns the accepted count.
+
+    Each attempt picks two random edges (a, b) and (c, d) and replaces them
+    with (a, d) and (b, c) when all four nodes are distinct and neither new
+    edge exists yet. Slot indices are drawn `chunk` at a time from the NumPy
+    generator `rng`, which keeps the Python loop down to the hash lookups.
+    """
+    src, dst, pos, n = store.src, store.dst, store.pos, store.n
+    m = len(src)
+    if m < 2:
+        return 0
+
+    accepted = 0
+    remaining = k
+    progress.start("switch attempts", k)
+    while remaining > 0:
+        size = min(chunk, remaining)
+        remaining -= size
+        progress.advance("switch attempts", size)
+        picks = rng.integers(0, m, size=(size, 2)).tolist()
+
+        for i, j in picks:
+            if i == j:
+                continue
+
+            a = src[i]
+            b = dst[i]
+            c = src[j]
+            d = dst[j]
+
+            ## all four nodes must be distinct
+            if a == c or a == d or b == c or b == d or a == b or c == d:
+                continue
+
+            ad = a * n + d if a <= d else d * n + a
+            if ad in pos:
+                continue
+            bc = b * n + c if b <= c else c * n + b
+            if bc in pos:
+                continue
+
+            # swap in place: slot i becomes (a, d), slot j becomes (b, c)
+            del pos[a * n + b if a <= b else b * n + a]
+            del pos[c * n + d if c <= d else d * n + c]
+            dst[i] = d
+            src[j] = b
+            dst[j] = c
+            pos[ad] = i
+            pos[bc] = j
+            accepted += 1
+
+    telemetry.count("switch attempted", k)
+    telemetry.count("switch accepted", accepted)
+    return accepted
@@ -0,0 +1,186 @@
+import time
+import numpy as np
+from scripts.core import betweenness, closeness, cores, incremental, telemetry
+
+## Privacy/utility evaluation in one pass per graph
+#
+# `measure` computes every utility metric of one graph with a single set of
+# BFS sweeps: the BFS runs of the betweenness computation (exact Brandes from
+# every node, or the RK samples, whose sources are uniform and so double as
+# closeness pivots) also collect the distance sums behind closeness and
+# harmonic closeness. k-core and k-shell come from one core decomposition.
+# `evaluate` measures the original and the anonymized graph and adds the
+# anonymized / original ratios and differences of every metric.
+#
+# `centralities` (the traversals) does not depend on the threshold k, so
+# callers that need many k values of one graph keep its result and call
+# `utilities` per k (see `scripts/core/sweep.py`). Given the centralities of
+# the graph an anonymized one was made from (`base`), exact mode updates them
+# from the edge diff instead (`scripts/core/incremental.py`).
+
+# Metrics compared between the two graphs, in report order.
+METRICS = (
+    "betweenness_utility", "closeness_utility", "harmonic_utility",
+    "k_core_utility", "k_shell_utility",
+    "avg_betweenness", "avg_closeness", "avg_harmonic", "avg_degree",
+    "components", "max_core",
+)
+
+
+def _share(values, k):
+    return float(np.count_nonzero(values >= k) / len(values)) if len(values) else 0.0
+
+
+@telemetry.timed("centralities")
+def centralities(graph, mode=None, epsilon=None, delta=None, seed=None, workers=1, base=None):
+    """The threshold-independent part of `measure`: per-node values, as a dict.
+
+    Holds `betweenness`, `closeness`, `harmonic` and `core` arrays, the
+    bounds behind the approximate intervals and the error parameters.
+    `mode`, `epsilon` and `delta` default to the NETGUC_BC_* settings (see
+    `scripts/core/betweenness.py`). `base` is an optional (graph, values)
+    pair for the graph `graph` was derived from, to update incrementally.
+    """
+    n = graph.number_of_nodes()
+    mode = mode or betweenness.mode()
+    if mode == "auto":
+        mode = "exact" if n <= betweenness.exact_max_nodes() else "approximate"
+    epsilon = betweenness.default_epsilon() if epsilon is None else epsilon
+    delta = betweenness.default_delta() if delta is None else delta
+
+    start = time.perf_counter()
+    if mode == "exact" and base is not None:
+        result = incremental.update(base[0], graph, base[1], workers=workers)
+        if result is not None:
+            result["traversal_seconds"] = result["seconds"] = time.perf_counter() - start
+            return result
+
+    result = {"nodes": n, "edges": graph.number_of_edges(), "mode": mode}
+    if mode == "exact":
+        bc, dist_sum, harm_sum = betweenness.exact(graph, workers=workers, with_distances=True)
+        result["closeness"] = closeness.from_sums(graph, dist_sum, harm_sum)
+        result["harmonic"] = closeness.from_sums(graph, dist_sum, harm_sum, harmonic=True)
+        result["dist_sum"], result["harm_sum"] = dist_sum, harm_sum
+    else:
+        bc, info = betweenness.approximate(graph, epsilon=epsilon, delta=delta, seed=seed,
+                                           workers=workers, with_distances=True)
+        sums = (info.pop("dist_sum"), info.pop("harm_sum"), info["samples"])
+        cc, cc_low, cc_high, cc_info = closeness.from_pivot_sums(graph, *sums, delta=delta)
+        hc, hc_low, hc_high, hc_info = closeness.from_pivot_sums(graph, *sums, harmonic=True, delta=delta)
+        result.update(
+            closeness=cc, closeness_bounds=(cc_low, cc_high),
+            harmonic=hc, harmonic_bounds=(hc_low, hc_high),
+            samples=info["samples"], delta=delta,
+            betweenness_epsilon=info["epsilon"],
+            closeness_distance_epsilon=cc_info["epsilon"],
+            harmonic_epsilon=hc_info["epsilon"],
+        )
+    result["betweenness"] = bc
+    result["traversal_seconds"] = time.perf_counter() - start
+    result["core"] = cores.core_number(graph)
+    result["components"] = graph.number_connected_components()
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def utilities(values, k):
+    """Report of the metrics at threshold k from `centralities` output."""
+    n = values["nodes"]
+    bc, cc, hc, core = values["betweenness"], values["closeness"], values["harmonic"], values["core"]
+    report = {key: values[key] for key in (
+        "nodes", "edges", "mode", "samples", "delta", "betweenness_epsilon",
+        "closeness_distance_epsilon", "harmonic_epsilon", "traversal_seconds",
+    ) if key in values}
+    if values["mode"] != "exact":
+        report["betweenness_utility_interval"] = betweenness.utility_interval(bc, k, values["betweenness_epsilon"])
+        report["closeness_utility_interval"] = closeness.utility_interval(*values["closeness_bounds"], k)
+        report["harmonic_utility_interval"] = closeness.utility_interval(*values["harmonic_bounds"], k)
+    report.update(
+        betweenness_utility=_share(bc, k),
+        closeness_utility=_share(cc, k),
+        harmonic_utility=_share(hc, k),
+        k_core_utility=_share(core, k),
+        k_shell_utility=float(np.count_nonzero(core == k) / n) if n else 0.0,
+        avg_betweenness=float(bc.mean()) if n else 0.0,
+        avg_closeness=float(cc.mean()) if n else 0.0,
+        avg_harmonic=float(hc.mean()) if n else 0.0,
+        avg_degree=2 * values["edges"] / n if n else 0.0,
+        components=values["components"],
+        max_core=int(core.max()) if n else 0,
+        seconds=values["seconds"],
+    )
+    return report
+
+
+def measure(graph, k, mode=None, epsilon=None, delta=None, seed=None, workers=1):
+    """All utility metrics of a CSRGraph at threshold k, as a dict.
+
+    In approximate mode the dict also has `*_interval` entries, each holding
+    with probability 1 - delta.
+    """
+    return utilities(centralities(graph, mode, epsilon, delta, seed, workers), k)
+
+
+def edge_overlap(original, anonymized):
+    """Share of the original edges (by node label) kept in the anonymized graph."""
+    if not original.number_of_edges():
+        return 1.0
+    keys = []
+    for graph in (original, anonymized):
+        u, v = graph.edge_labels()
+        lo, hi = np.minimum(u, v), np.maximum(u, v)
+        keys.append(np.unique(np.stack([lo, hi], axis=1), axis=0))
+    both = np.concatenate(keys)
+    _, counts = np.unique(both, axis=0, return_counts=True)
+    return float(np.count_nonzero(counts == 2) / len(keys[0]))
+
+
+def compare(before, after):
+    """(ratio, delta) dicts of every metric, anonymized against original."""
+    ratio, diff = {}, {}
+    for key in METRICS:
+        diff[key] = after[key] - before[key]
+        ratio[key] = after[key] / before[key] if before[key] else None
+    return ratio, diff
+
+
+def evaluate(original, anonymized, k, mode=None, epsilon=None, delta=None, seed=None, workers=1):
+    """Compare two CSRGraphs; returns {"k", "original", "anonymized", "ratio", "delta", ...}."""
+    options = dict(mode=mode, epsilon=epsilon, delta=delta, seed=seed, workers=workers)
+    values = centralities(original, **options)
+    before = utilities(values, k)
+    after = utilities(centralities(anonymized, base=(original, values), **options), k)
+    ratio, diff = compare(before, after)
+    return {
+        "k": k,
+        "original": before,
+        "anonymized": after,
+        "ratio": ratio,
+        "delta": diff,
+        "edge_overlap": edge_overlap(original, anonymized),
+        "degree_sequence_equal": bool(np.array_equal(np.sort(original.degree()), np.sort(anonymized.degree()))),
+    }
+
+
+def format_report(report):
+    """Printable lines: one row per metric, original vs anonymized."""
+    before, after = report["original"], report["anonymized"]
+    lines = [
+        f"k = {report['k']}; original {before['nodes']} nodes / {before['edges']} edges ({before['mode']}), "
+        f"anonymized {after['nodes']} nodes / {after['edges']} edges ({after['mode']})",
+        f"{'metric':<22} {'original':>12} {'anonymized':>12} {'ratio':>8} {'delta':>10}",
+    ]
+    for key in METRICS:
+        ratio = report["ratio"][key]
+        ratio = f"{ratio:>8.4f}" if ratio is not None else f"{'-':>8}"
+        lines.append(f"{key:<22} {before[key]:>12.4f} {after[key]:>12.4f} {ratio} {report['delta'][key]:>10.4f}")
+    for key in ("betweenness_utility_interval", "closeness_utility_interval", "harmonic_utility_interval"):
+        if key in after:
+            lo0, hi0 = before[key]
+            lo1, hi1 = after[key]
+            lines.append(f"{key:<28} [{lo0:.4f}, {hi0:.4f}] -> [{lo1:.4f}, {hi1:.4f}] "
+                         f"(probability >= {1 - after['delta']:.2f})")
+    lines.append(f"edge overlap: {report['edge_overlap']:.4f}; "
+                 f"degree sequence {'preserved' if report['degree_sequence_equal'] else 'changed'}")
+    lines.append(f"time: original {before['seconds']:.3f}s, anonymized {after['seconds']:.3f}s")
+    return lines
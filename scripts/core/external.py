@@ -0,0 +1,457 @@
+import os
+import shutil
+import tempfile
+import numpy as np
+from scripts.core import progress, telemetry
+from scripts.core.batch_switch import _first_owner, _keys, default_batch_size
+from scripts.core.walk_engine import _first_occurrence, random_neighbor, random_walks
+from scripts.utils.util_mtx import write_mtx
+
+## Out-of-core anonymization
+#
+# For graphs whose edge arrays do not fit in memory next to the anonymizer's
+# working copies. The input is read from the memory-mapped CSR of the graph
+# cache (`scripts/core/cache.py`) and never copied whole; everything sized by
+# the edge count lives in scratch files, and every pass works on chunks of
+# `chunk_edges(budget)` edges, so resident memory stays around the budget.
+# The result is streamed straight to the output .mtx.
+#
+# The budget only holds once the input is cached. A cold load (no cache
+# entry yet, or NETGUC_CACHE=0) parses the whole file in memory through
+# `util_mtx.load_graph`, at roughly 170 bytes per edge at peak, before any of
+# this runs; only later runs on the same unchanged file are memory-mapped.
+#
+# Edge switches (`switch_to_mtx`): the current edge list is a sorted file of
+# edge keys min(u, v) * n + max(u, v) (one generation). Accepted switches are
+# appended to a delta log (+key for an added edge, -key - 1 for a removed
+# one) and indexed in memory: the net added and removed keys and the new key
+# of every rewired slot, which is all the batched chain of
+# `scripts/core/batch_switch.py` needs for its lookups. When the index grows
+# past half the budget, the log is merged into the next generation in one
+# sorted pass (the log is reduced to net changes by key, then merged with the
+# old generation chunk by chunk) and the index is dropped. Slots are
+# renumbered by the merge, which keeps proposals uniform over the edges. The
+# orientation of the second edge is drawn at random, so both rewirings of a
+# pair are proposed.
+#
+# Random walks (`walk_to_mtx`): the proposals of `walk_engine.walk_anonymize`
+# are computed chunk by chunk into a key file, then externally sorted by key
+# range (ranges from sampled quantiles) to find the first proposal of every
+# key. The fallbacks then only touch the rejected proposals, which are few:
+# they are kept in memory, checked against the sorted accepted keys on disk.
+#
+# Environment:
+#   NETGUC_OUT_OF_CORE=auto|on|off   auto (default): when the in-memory
+#                                    anonymizer would need more than the budget
+#   NETGUC_MEMORY_BUDGET             working memory in bytes (default 2 GiB)
+#   NETGUC_SCRATCH_DIR               scratch files (default: the temp directory)
+
+MODES = ("auto", "on", "off")
+DEFAULT_BUDGET = 2 << 30
+# Bytes per edge held by the in-memory anonymizers (edge and key arrays, the
+# output graph and its CSR).
+IN_MEMORY_BYTES_PER_EDGE = 96
+# Bytes per edge of a chunk in the out-of-core passes.
+CHUNK_BYTES_PER_EDGE = 64
+# Proposals sampled to pick the key ranges of the external sort.
+SAMPLE_SIZE = 1 << 16
+
+
+def mode():
+    """Current out-of-core mode from NETGUC_OUT_OF_CORE (default "auto")."""
+    value = os.environ.get("NETGUC_OUT_OF_CORE", "auto").strip().lower()
+    if value not in MODES:
+        raise ValueError(f"NETGUC_OUT_OF_CORE must be one of {', '.join(MODES)}, not {value!r}")
+    return value
+
+
+def memory_budget():
+    try:
+        return int(os.environ.get("NETGUC_MEMORY_BUDGET", DEFAULT_BUDGET))
+    except ValueError:
+        return DEFAULT_BUDGET
+
+
+def scratch_dir():
+    return os.environ.get("NETGUC_SCRATCH_DIR") or tempfile.gettempdir()
+
+
+def enabled(graph, budget=None):
+    """True when `graph` should be anonymized out of core."""
+    value = mode()
+    if value != "auto":
+        return value == "on"
+    budget = memory_budget() if budget is None else budget
+    return graph.number_of_edges() * IN_MEMORY_BYTES_PER_EDGE > budget
+
+
+def chunk_edges(budget):
+    return max(1 << 12, int(budget) // CHUNK_BYTES_PER_EDGE)
+
+
+class Scratch:
+    """Temporary directory of memory-mapped arrays, removed on exit."""
+
+    def __init__(self, parent=None):
+        parent = parent or scratch_dir()
+        os.makedirs(parent, exist_ok=True)
+        self.path = tempfile.mkdtemp(prefix="netguc-", dir=parent)
+
+    def file(self, name):
+        return os.path.join(self.path, name)
+
+    def array(self, name, dtype, length):
+        return np.lib.format.open_memmap(self.file(name + ".npy"), mode="w+", dtype=dtype, shape=(length,))
+
+    def remove(self, name):
+        os.remove(self.file(name + ".npy"))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+def _member(sorted_keys, queries):
+    """Membership of `queries` in a sorted (possibly memory-mapped) key array."""
+    if not len(sorted_keys) or not len(queries):
+        return np.zeros(len(queries), dtype=bool)
+    order = np.argsort(queries)
+    q = queries[order]
+    idx = np.searchsorted(sorted_keys, q)
+    idx[idx == len(sorted_keys)] = 0
+    found = np.empty(len(queries), dtype=bool)
+    found[order] = np.asarray(sorted_keys[idx]) == q
+    return found
+
+
+def _insert_sorted(sorted_keys, keys):
+    """Union of a sorted array and keys it does not contain, still sorted."""
+    keys = np.sort(keys)
+    return np.insert(sorted_keys, np.searchsorted(sorted_keys, keys), keys)
+
+
+def _edge_keys(graph, scratch, name, chunk):
+    """Sorted key file of the graph's edges (src/dst are already sorted)."""
+    n = max(graph.number_of_nodes(), 1)
+    keys = scratch.array(name, np.int64, graph.number_of_edges())
+    for start in range(0, len(keys), chunk):
+        stop = min(start + chunk, len(keys))
+        keys[start:stop] = np.asarray(graph.src[start:stop], dtype=np.int64) * n + graph.dst[start:stop]
+    return keys
+
+
+def _label_chunks(graph, keys, chunk):
+    """(u, v) label arrays of a key file, chunk by chunk, for `write_mtx`."""
+    n = max(graph.number_of_nodes(), 1)
+    for start in range(0, len(keys), chunk):
+        part = np.asarray(keys[start:start + chunk])
+        yield np.asarray(graph.node_ids[part // n]), np.asarray(graph.node_ids[part % n])
+
+
+def _write(graph, keys, out_path, chunk, comment):
+    top = int(graph.node_ids[-1]) if graph.number_of_nodes() else 0
+    return write_mtx(out_path, top, len(keys), _label_chunks(graph, keys, chunk), comment)
+
+
+class _DeltaLog:
+    """Accepted switches against one generation of the sorted key file."""
+
+    def __init__(self, path):
+        self.path = path
+        self.fh = open(path, "wb")
+        self._clear()
+
+    def _clear(self):
+        empty = np.empty(0, dtype=np.int64)
+        self.added, self.removed, self.slots, self.slot_keys = empty, empty, empty, empty
+
+    def nbytes(self):
+        return 8 * (len(self.added) + len(self.removed)) + 16 * len(self.slots)
+
+    def current(self, gen, slots):
+        """Keys now held by `slots`."""
+        keys = np.asarray(gen[slots])
+        if len(self.slots):
+            pos = np.minimum(np.searchsorted(self.slots, slots), len(self.slots) - 1)
+            hit = self.slots[pos] == slots
+            keys[hit] = self.slot_keys[pos[hit]]
+        return keys
+
+    def exists(self, gen, keys):
+        return (_member(gen, keys) & ~_member(self.removed, keys)) | _member(self.added, keys)
+
+    def apply(self, slots, old, new):
+        """Slots `slots` (distinct) change from keys `old` to keys `new`."""
+        np.concatenate([new, -old - 1]).tofile(self.fh)
+        back = _member(self.added, old)
+        self.added = np.setdiff1d(self.added, old[back], assume_unique=True)
+        self.removed = _insert_sorted(self.removed, old[~back])
+        back = _member(self.removed, new)
+        self.removed = np.setdiff1d(self.removed, new[back], assume_unique=True)
+        self.added = _insert_sorted(self.added, new[~back])
+
+        pos = np.searchsorted(self.slots, slots)
+        hit = pos < len(self.slots)
+        hit[hit] = self.slots[pos[hit]] == slots[hit]
+        self.slot_keys[pos[hit]] = new[hit]
+        order = np.argsort(slots[~hit])
+        fresh, fresh_keys = slots[~hit][order], new[~hit][order]
+        at = np.searchsorted(self.slots, fresh)
+        self.slots = np.insert(self.slots, at, fresh)
+        self.slot_keys = np.insert(self.slot_keys, at, fresh_keys)
+
+    def merge(self, gen, out, chunk):
+        """Write the next generation (gen plus the logged changes) to `out`."""
+        self._clear()
+        self.fh.close()
+        log = np.fromfile(self.path, dtype=np.int64)
+        self.fh = open(self.path, "wb")
+        # a key alternates between added and removed, so its net change is
+        # the sum of its signs
+        order = np.argsort(np.where(log >= 0, log, -log - 1))
+        log = log[order]
+        keys = np.where(log >= 0, log, -log - 1)
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        net = np.add.reduceat(np.where(log >= 0, 1, -1), starts) if len(keys) else np.zeros(0, dtype=np.int64)
+        keys = keys[starts] if len(keys) else keys
+        added, removed = keys[net > 0], keys[net < 0]
+        del log, order, starts, net
+
+        written, first = 0, 0
+        for start in range(0, len(gen), chunk):
+            stop = min(start + chunk, len(gen))
+            part = np.asarray(gen[start:stop])
+            part = part[~_member(removed, part)]
+            last = np.searchsorted(added, gen[stop]) if stop < len(gen) else len(added)
+            part = _insert_sorted(part, added[first:last])
+            first = last
+            out[written:written + len(part)] = part
+            written += len(part)
+        out.flush()
+        return out
+
+
+@telemetry.timed("switch")
+def switch_to_mtx(graph, k, out_path, rng, budget=None, batch_size=None, comment=None):
+    """Out-of-core `batch_switch`: attempt k degree-preserving switches and
+    write the result to `out_path` as .mtx (labels as in the input).
+
+    Returns the stats dict of `batch_switch` (plus `generations`).
+    """
+    budget = memory_budget() if budget is None else budget
+    chunk = chunk_edges(budget)
+    n = graph.number_of_nodes()
+    m = graph.number_of_edges()
+    stats = {"attempted": 0, "accepted": 0, "invalid": 0, "existing": 0, "conflict": 0, "generations": 1}
+
+    with Scratch() as scratch:
+        gen = _edge_keys(graph, scratch, "gen0", chunk)
+        log = _DeltaLog(scratch.file("delta.log"))
+        batch_size = min(batch_size or default_batch_size(m), chunk)
+        remaining = k if m >= 2 else 0
+        progress.start("switch attempts", remaining)
+        while remaining > 0:
+            size = min(batch_size, remaining)
+            remaining -= size
+            stats["attempted"] += size
+            progress.advance("switch attempts", size)
+
+            i = rng.integers(0, m, size)
+            j = rng.integers(0, m, size)
+            flip = rng.random(size) < 0.5
+            ki, kj = log.current(gen, i), log.current(gen, j)
+            a, b = ki // n, ki % n
+            c, d = kj // n, kj % n
+            c, d = np.where(flip, d, c), np.where(flip, c, d)
+
+            valid = (i != j) & (a != b) & (c != d) & (a != c) & (a != d) & (b != c) & (b != d)
+            new_ad, new_bc = _keys(a, d, n), _keys(b, c, n)
+            exists = log.exists(gen, np.concatenate([new_ad, new_bc]))
+            exists = exists[:size] | exists[size:]
+            keep = valid & ~exists
+            stats["invalid"] += size - int(valid.sum())
+            stats["existing"] += int((valid & exists).sum())
+            i, j, ki, kj, new_ad, new_bc = i[keep], j[keep], ki[keep], kj[keep], new_ad[keep], new_bc[keep]
+            if not len(i):
+                continue
+
+            # earliest candidate wins every slot and every new edge it touches
+            t = np.arange(len(i))
+            slot_i, slot_j = _first_owner(i, j)
+            key_ad, key_bc = _first_owner(new_ad, new_bc)
+            wins = (slot_i == t) & (slot_j == t) & (key_ad == t) & (key_bc == t)
+            stats["conflict"] += len(i) - int(wins.sum())
+            stats["accepted"] += int(wins.sum())
+            log.apply(np.concatenate([i[wins], j[wins]]), np.concatenate([ki[wins], kj[wins]]),
+                      np.concatenate([new_ad[wins], new_bc[wins]]))
+
+            if log.nbytes() > budget // 2:
+                name = f"gen{stats['generations']}"
+                gen = log.merge(gen, scratch.array(name, np.int64, m), chunk)
+                scratch.remove(f"gen{stats['generations'] - 1}")
+                stats["generations"] += 1
+
+        gen = log.merge(gen, scratch.array("final", np.int64, m), chunk)
+        log.fh.close()
+        _write(graph, gen, out_path, chunk, comment)
+
+    stats["acceptance_rate"] = stats["accepted"] / stats["attempted"] if stats["attempted"] else 0.0
+    for key in ("attempted", "accepted", "invalid", "existing", "conflict", "generations"):
+        telemetry.count(f"switch {key}", stats[key])
+    return stats
+
+
+def _proposals(graph, k, rng, keys, chunk):
+    """Walk proposals of every edge into `keys` (-1 where the walk stays on u)."""
+    n = graph.number_of_nodes()
+    loops = 0
+    progress.start("walk steps", k * len(keys))
+    for start in range(0, len(keys), chunk):
+        stop = min(start + chunk, len(keys))
+        u = np.asarray(graph.src[start:stop], dtype=np.int64)
+        v = np.asarray(graph.dst[start:stop], dtype=np.int64)
+        x = random_walks(graph.indptr, graph.indices, v, k, rng)
+        loop = x == u
+        if loop.any():
+            alt, ok = random_neighbor(graph.indptr, graph.indices, u[loop], rng, exclude=v[loop])
+            x[loop] = np.where(ok, alt, v[loop])
+        loops += int(loop.sum())
+        keys[start:stop] = np.where(x != u, np.minimum(u, x) * n + np.maximum(u, x), -1)
+    return loops
+
+
+def _key_ranges(keys, parts):
+    """Upper bounds (exclusive) of `parts` key ranges with about equal numbers of keys."""
+    if parts <= 1:
+        return [np.iinfo(np.int64).max]
+    sample = np.asarray(keys[np.linspace(0, len(keys) - 1, min(SAMPLE_SIZE, len(keys))).astype(np.int64)])
+    sample = sample[sample >= 0]
+    bounds = np.unique(np.quantile(sample, np.linspace(0, 1, parts + 1)[1:-1]).astype(np.int64)) if len(sample) else []
+    return [int(b) for b in bounds] + [np.iinfo(np.int64).max]
+
+
+def _first_proposals(keys, scratch, chunk):
+    """External sort of the proposals by key: the first (lowest edge id)
+    proposal of every key is accepted.
+
+    One pass distributes (key, edge id) pairs into bucket files by key range;
+    each bucket is then sorted in memory. Returns (accepted keys, their edge
+    ids) as sorted scratch arrays and the ids of every other edge.
+    """
+    m = len(keys)
+    bounds = np.asarray(_key_ranges(keys, -(-m // chunk)))
+    buckets = [open(scratch.file(f"bucket{b}"), "wb") for b in range(len(bounds))]
+    rejected = []
+    for start in range(0, m, chunk):
+        block = np.asarray(keys[start:start + chunk])
+        ids = np.arange(start, start + len(block), dtype=np.int64)
+        rejected.append(ids[block < 0])
+        ids, block = ids[block >= 0], block[block >= 0]
+        which = np.searchsorted(bounds, block, side="right")
+        order = np.argsort(which, kind="stable")
+        edges = np.searchsorted(which[order], np.arange(len(bounds) + 1))
+        for b, fh in enumerate(buckets):
+            picked = order[edges[b]:edges[b + 1]]
+            np.stack([block[picked], ids[picked]], axis=1).tofile(fh)
+    for fh in buckets:
+        fh.close()
+
+    acc_keys = scratch.array("accepted_keys", np.int64, m)
+    acc_ids = scratch.array("accepted_ids", np.int64, m)
+    written = 0
+    for b in range(len(bounds)):
+        pairs = np.fromfile(scratch.file(f"bucket{b}"), dtype=np.int64).reshape(-1, 2)
+        os.remove(scratch.file(f"bucket{b}"))
+        order = np.lexsort((pairs[:, 1], pairs[:, 0]))
+        part_keys, part_ids = pairs[order, 0], pairs[order, 1]
+        del pairs
+        first = np.ones(len(part_keys), dtype=bool)
+        first[1:] = part_keys[1:] != part_keys[:-1]
+        count = int(first.sum())
+        acc_keys[written:written + count] = part_keys[first]
+        acc_ids[written:written + count] = part_ids[first]
+        written += count
+        rejected.append(part_ids[~first])
+    return acc_keys[:written], acc_ids[:written], np.sort(np.concatenate(rejected))
+
+
+@telemetry.timed("random walks")
+def walk_to_mtx(graph, k, out_path, rng, budget=None, comment=None):
+    """Out-of-core `walk_anonymize`: replace every edge (u, v) with (u, x),
+    x the end of a k-step walk from v, and write the result to `out_path`.
+
+    Same fallbacks as `walk_anonymize`; the rejected proposals (self loops
+    and duplicates) are held in memory. Returns its stats dict.
+    """
+    budget = memory_budget() if budget is None else budget
+    chunk = chunk_edges(budget)
+    n = max(graph.number_of_nodes(), 1)
+    m = graph.number_of_edges()
+    indptr, indices = graph.indptr, graph.indices
+
+    with Scratch() as scratch:
+        keys = scratch.array("proposals", np.int64, m)
+        loops = _proposals(graph, k, rng, keys, chunk)
+        acc_keys, acc_ids, retry = _first_proposals(keys, scratch, chunk)
+
+        # 2. rejected proposals take one more random step from x
+        u = np.asarray(graph.src[retry], dtype=np.int64)
+        own = u * n + np.asarray(graph.dst[retry], dtype=np.int64)
+        proposed = np.asarray(keys[retry])
+        x = np.where(proposed < 0, u, np.where(proposed // n == u, proposed % n, proposed // n))
+        alt, ok = random_neighbor(indptr, indices, x, rng)
+        alt_keys = np.minimum(u, alt) * n + np.maximum(u, alt)
+        good = ok & (alt != u) & ~_member(acc_keys, alt_keys)
+        good &= _first_occurrence(np.where(good, alt_keys, -1 - np.arange(len(retry))))
+        extra = np.sort(alt_keys[good])
+
+        # 3. keep the original edge where nothing worked, and drop every new
+        #    edge that coincides with a kept original one
+        kept_own = own[~good]
+        dropped = np.zeros(0, dtype=np.int64)
+        while True:
+            kept_own = np.sort(kept_own)
+            pos = np.minimum(np.searchsorted(acc_keys, kept_own), max(len(acc_keys) - 1, 0))
+            clash = (np.asarray(acc_keys[pos]) == kept_own) if len(acc_keys) else np.zeros(len(kept_own), dtype=bool)
+            # an accepted proposal equal to its own original edge is not a clash
+            ids = np.asarray(acc_ids[pos[clash]])
+            self_kept = np.asarray(graph.src[ids], dtype=np.int64) * n + graph.dst[ids] == kept_own[clash]
+            new = np.setdiff1d(pos[clash][~self_kept], dropped)
+            extra_clash = _member(kept_own, extra)
+            if not len(new) and not extra_clash.any():
+                break
+            dropped = np.union1d(dropped, new)
+            # the clashing edges fall back to their own original edges too
+            new_ids = np.asarray(acc_ids[new])
+            lost = np.flatnonzero(good)[np.isin(alt_keys[good], extra[extra_clash])]
+            kept_own = np.concatenate([
+                kept_own,
+                np.asarray(graph.src[new_ids], dtype=np.int64) * n + graph.dst[new_ids],
+                own[lost],
+            ])
+            extra = extra[~extra_clash]
+
+        final = scratch.array("final", np.int64, m)
+        small = np.union1d(extra, kept_own)
+        written, first = 0, 0
+        for start in range(0, len(acc_keys), chunk):
+            stop = min(start + chunk, len(acc_keys))
+            part = np.asarray(acc_keys[start:stop])
+            lo, hi = np.searchsorted(dropped, [start, stop])
+            part = np.delete(part, dropped[lo:hi] - start)
+            last = np.searchsorted(small, acc_keys[stop]) if stop < len(acc_keys) else len(small)
+            part = _insert_sorted(part, small[first:last])
+            first = last
+            final[written:written + len(part)] = part
+            written += len(part)
+        if first < len(small):
+            final[written:written + len(small) - first] = small[first:]
+            written += len(small) - first
+        _write(graph, final[:written], out_path, chunk, comment)
+
+    telemetry.count("walk self loops redirected", loops)
+    telemetry.count("walk duplicates retried", len(retry))
+    telemetry.count("walk originals kept", len(kept_own))
+    return {"self_loops_redirected": loops, "duplicates_avoided": len(kept_own)}
@@ -0,0 +1,244 @@
+import numpy as np
+from scripts.core import telemetry
+
+
+def index_dtype(max_value):
+    """Return the smallest of int32/int64 that can hold `max_value`."""
+    return np.int32 if max_value < np.iinfo(np.int32).max else np.int64
+
+
+def build_csr(src, dst, n):
+    """Build a symmetric CSR adjacency (indptr, indices) from compact edges.
+
+    Every edge (u, v) is stored in both rows u and v; a self loop (u, u) is
+    stored once. Neighbours inside each row are sorted ascending.
+    """
+    src = np.asarray(src, dtype=np.int64)
+    dst = np.asarray(dst, dtype=np.int64)
+    not_loop = src != dst
+    rows = np.concatenate([src, dst[not_loop]])
+    cols = np.concatenate([dst, src[not_loop]])
+
+    # a key determines its column, so sorting the keys (much faster than
+    # argsort) is enough
+    keys = np.sort(rows * max(n, 1) + cols)
+    indices = (keys % max(n, 1)).astype(index_dtype(n), copy=False)
+
+    counts = np.bincount(rows, minlength=n)
+    indptr = np.zeros(n + 1, dtype=index_dtype(len(rows)))
+    np.cumsum(counts, out=indptr[1:])
+    return indptr, indices
+
+
+def expand(indptr, indices, nodes):
+    """All neighbours of `nodes` at once, for level-synchronous traversals.
+
+    Returns (owner, nbrs): nbrs[i] is a neighbour of nodes[owner[i]]. The
+    rows are concatenated in the order of `nodes`.
+    """
+    nodes = np.asarray(nodes, dtype=np.int64)
+    starts = np.asarray(indptr[nodes], dtype=np.int64)
+    counts = np.asarray(indptr[nodes + 1], dtype=np.int64) - starts
+    owner = np.repeat(np.arange(len(nodes)), counts)
+    # position inside each row, then shift to the row's start
+    offsets = np.arange(len(owner)) - np.repeat(np.cumsum(counts) - counts, counts)
+    return owner, indices[starts[owner] + offsets]
+
+
+def csr_contains(indptr, indices, u, v):
+    """Mask of the pairs (u[i], v[i]) that are edges, by a vectorized binary
+    search of every v[i] in the sorted row of u[i]."""
+    u = np.asarray(u, dtype=np.int64)
+    v = np.asarray(v, dtype=np.int64)
+    lo = np.asarray(indptr[u], dtype=np.int64)
+    end = np.asarray(indptr[u + 1], dtype=np.int64)
+    hi = end.copy()
+    while True:
+        open_ = lo < hi
+        if not open_.any():
+            break
+        mid = (lo + hi) // 2
+        right = open_ & (np.asarray(indices[np.minimum(mid, len(indices) - 1)]) < v)
+        lo = np.where(right, mid + 1, lo)
+        hi = np.where(open_ & ~right, mid, hi)
+    found = lo < end
+    found[found] = np.asarray(indices[lo[found]]) == v[found]
+    return found
+
+
+def bfs_distances(indptr, indices, source):
+    """Hop distance from `source` to every node (-1 where unreachable)."""
+    n = len(indptr) - 1
+    dist = np.full(n, -1, dtype=np.int64)
+    dist[source] = 0
+    frontier = np.array([source], dtype=np.int64)
+    depth = 0
+    while len(frontier):
+        depth += 1
+        _, nbrs = expand(indptr, indices, frontier)
+        frontier = np.unique(nbrs[dist[nbrs] < 0])
+        dist[frontier] = depth
+    return dist
+
+
+def connected_components(indptr, indices):
+    """Label connected components of a CSR graph; returns a label per node.
+
+    Vectorized min-label propagation with pointer jumping: every round each
+    node takes the smallest label among itself and its neighbours, then jumps
+    to its label's label. Labels are the smallest node index of each component.
+    """
+    n = len(indptr) - 1
+    labels = np.arange(n, dtype=np.int64)
+    if n == 0 or len(indices) == 0:
+        return labels
+    starts = np.asarray(indptr[:-1])
+    has_nbrs = np.diff(indptr) > 0
+    while True:
+        nbr_min = np.minimum.reduceat(labels[indices], starts[has_nbrs])
+        new = labels.copy()
+        new[has_nbrs] = np.minimum(new[has_nbrs], nbr_min)
+        # propagate the new labels back to the nodes that own them
+        np.minimum.at(new, labels, new)
+        new = new[new]
+        if np.array_equal(new, labels):
+            return labels
+        labels = new
+
+
+def _compact(u, v, node_ids=None):
+    """Return (node_ids, cu, cv): sorted labels and compact endpoint indices.
+
+    Non-negative labels that are reasonably dense are mapped through a lookup
+    table, which is linear time; anything else falls back to binary search.
+    """
+    count = len(u) + len(v)
+    top = max(int(u.max()), int(v.max())) if len(u) else 0
+    low = min(int(u.min()), int(v.min())) if len(u) else 0
+    if node_ids is not None and len(node_ids):
+        top = max(top, int(node_ids[-1]))
+        low = min(low, int(node_ids[0]))
+
+    if low >= 0 and top < 4 * count + 1024:
+        present = np.zeros(top + 1, dtype=bool)
+        if node_ids is None:
+            present[u] = True
+            present[v] = True
+            node_ids = np.flatnonzero(present).astype(u.dtype)
+        else:
+            present[node_ids] = True
+        lookup = np.cumsum(present, dtype=np.int64) - 1
+        return node_ids, lookup[u], lookup[v]
+
+    if node_ids is None:
+        node_ids = np.unique(np.concatenate([u, v]))
+    return node_ids, np.searchsorted(node_ids, u), np.searchsorted(node_ids, v)
+
+
+class CSRGraph:
+    """Compact undirected graph: edge arrays plus a CSR adjacency.
+
+    Nodes are indexed 0..n-1 internally and `node_ids[i]` holds the original
+    label of node i (sorted ascending, so labels map to indices with a binary
+    search). Each undirected edge is stored once in `src`/`dst` as compact
+    indices with src <= dst, sorted by (src, dst). `indptr`/`indices` give the
+    sorted neighbours of node i as `indices[indptr[i]:indptr[i + 1]]`.
+
+    Arrays may be read-only (e.g. memory-mapped); nothing here modifies them.
+    """
+
+    def __init__(self, node_ids, src, dst, weights=None, indptr=None, indices=None, meta=None):
+        self.node_ids = node_ids
+        self.src = src
+        self.dst = dst
+        self.weights = weights
+        self.meta = dict(meta or {})
+        if indptr is None or indices is None:
+            indptr, indices = build_csr(src, dst, len(node_ids))
+        self.indptr = indptr
+        self.indices = indices
+
+    @classmethod
+    @telemetry.timed("build")
+    def from_labels(cls, u, v, weights=None, node_ids=None, meta=None):
+        """Build a graph from endpoint label arrays.
+
+        Reversed duplicates ((u, v) and (v, u)) collapse into one edge, keeping
+        the first weight seen, like `nx.Graph.add_edges_from` would. If
+        `node_ids` is not given the node set is the set of labels that appear
+        in an edge; otherwise every label must be present in `node_ids`.
+        """
+        u = np.asarray(u)
+        v = np.asarray(v)
+        if node_ids is not None:
+            node_ids = np.asarray(node_ids)
+        node_ids, cu, cv = _compact(u, v, node_ids)
+        n = len(node_ids)
+
+        lo = np.minimum(cu, cv).astype(np.int64)
+        hi = np.maximum(cu, cv).astype(np.int64)
+        keys, first = np.unique(lo * max(n, 1) + hi, return_index=True)
+
+        dtype = index_dtype(n)
+        src = (keys // max(n, 1)).astype(dtype)
+        dst = (keys % max(n, 1)).astype(dtype)
+        if weights is not None:
+            weights = np.asarray(weights)[first]
+        return cls(node_ids, src, dst, weights=weights, meta=meta)
+
+    def with_edges(self, src, dst, weights=None, meta=None):
+        """Return a graph on the same node set with a new compact edge list."""
+        src = np.asarray(src, dtype=np.int64)
+        dst = np.asarray(dst, dtype=np.int64)
+        return CSRGraph.from_labels(
+            self.node_ids[src], self.node_ids[dst],
+            weights=weights, node_ids=self.node_ids,
+            meta=self.meta if meta is None else meta,
+        )
+
+    def number_of_nodes(self):
+        return len(self.node_ids)
+
+    def number_of_edges(self):
+        return len(self.src)
+
+    def degree(self):
+        """Number of neighbours of every node, as an array indexed by node."""
+        return np.diff(self.indptr)
+
+    def number_connected_components(self):
+        return len(np.unique(connected_components(self.indptr, self.indices)))
+
+    def neighbors(self, i):
+        """Sorted compact neighbour indices of compact node `i`."""
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def edge_keys(self):
+        """Packed int64 keys src * n + dst, sorted ascending and unique."""
+        n = max(self.number_of_nodes(), 1)
+        return self.src.astype(np.int64) * n + self.dst
+
+    def edge_labels(self):
+        """Return (u, v) arrays of original node labels, one entry per edge."""
+        return self.node_ids[self.src], self.node_ids[self.dst]
+
+    def index_of(self, labels):
+        """Map original labels to compact indices (labels must exist)."""
+        return np.searchsorted(self.node_ids, labels)
+
+    def to_networkx(self):
+        """Build an `nx.Graph` view with the original node labels.
+
+        Only scripts that really need NetworkX (drawing, library algorithms)
+        should call this; it costs roughly 1 KB per edge.
+        """
+        import networkx as nx
+
+        G = nx.Graph()
+        G.add_nodes_from(self.node_ids.tolist())
+        u, v = self.edge_labels()
+        if self.weights is None:
+            G.add_edges_from(zip(u.tolist(), v.tolist()))
+        else:
+            G.add_weighted_edges_from(zip(u.tolist(), v.tolist(), self.weights.tolist()))
+        return G
@@ -0,0 +1,308 @@
+import numpy as np
+from scripts.core import betweenness, closeness, cores, telemetry
+from scripts.core.graph import bfs_distances
+
+## Incremental utilities after a small perturbation
+#
+# The anonymizers keep the node set and change a few edges, so the utilities
+# of their output can be updated from those of the input instead of being
+# recomputed. `edge_diff` gives the removed and added edges of two graphs on
+# the same node set; `update` then produces exactly what
+# `evaluate.centralities` (exact mode) would for the new graph, up to
+# floating-point rounding:
+#
+# - core numbers are maintained one edge at a time (Sariyuce et al.,
+#   "Streaming algorithms for k-core decomposition"): removing or inserting
+#   an edge changes core numbers by at most one, and only inside the
+#   connected region of nodes sharing the lower endpoint's core number;
+# - by symmetry, closeness of v only depends on the BFS from v. Distances
+#   from s only change if a removed edge (a, b) joins consecutive levels of
+#   that BFS and the lower end b has no other neighbour one level up, or an
+#   added edge joins levels two or more apart (or joins s's component to
+#   another). One BFS from the endpoints of every changed edge (and from the
+#   neighbours of removed edges' endpoints) gives these levels for all
+#   sources at once; only the affected sources are re-run;
+# - betweenness also changes for the sources whose shortest-path counts do
+#   (any changed edge between consecutive levels, or an added one between
+#   farther levels): their dependencies are subtracted for the old graph and
+#   added for the new one.
+#
+# On small-world graphs most sources see almost any edge between consecutive
+# levels, so betweenness rarely gains; when more than `max_affected` of the
+# sources are affected that metric is recomputed from scratch instead.
+
+MAX_AFFECTED = 0.5
+ALTERNATIVE_MAX_DEGREE = 32
+
+
+def same_nodes(before, after):
+    """True when both graphs have the same node labels (and so compact indices)."""
+    return np.array_equal(before.node_ids, after.node_ids)
+
+
+def edge_diff(before, after):
+    """(removed, added): (src, dst) arrays of compact indices, before -> after."""
+    if not same_nodes(before, after):
+        raise ValueError("edge_diff needs two graphs on the same node set")
+    n = max(before.number_of_nodes(), 1)
+    old, new = before.edge_keys(), after.edge_keys()
+    removed = np.setdiff1d(old, new, assume_unique=True)
+    added = np.setdiff1d(new, old, assume_unique=True)
+    return (removed // n, removed % n), (added // n, added % n)
+
+
+class _OverBudget(Exception):
+    pass
+
+
+class _Adjacency:
+    """CSR adjacency with per-node overlays of added and removed neighbours.
+
+    Self loops are left out, as in `cores.core_number`. Raises _OverBudget
+    once more than `budget` neighbour entries have been read.
+    """
+
+    def __init__(self, indptr, indices, budget):
+        self.indptr = indptr
+        self.indices = indices
+        self.added = {}
+        self.removed = {}
+        self.budget = budget
+
+    def neighbors(self, w):
+        self.budget -= self.indptr[w + 1] - self.indptr[w]
+        if self.budget < 0:
+            raise _OverBudget
+        row = self.indices[self.indptr[w]:self.indptr[w + 1]].tolist()
+        gone = self.removed.get(w, ())
+        row = [x for x in row if x != w and x not in gone]
+        return row + list(self.added.get(w, ()))
+
+    def add(self, u, v):
+        if u == v:
+            return
+        for a, b in ((u, v), (v, u)):
+            if b in self.removed.get(a, ()):
+                self.removed[a].discard(b)
+            else:
+                self.added.setdefault(a, set()).add(b)
+
+    def remove(self, u, v):
+        if u == v:
+            return
+        for a, b in ((u, v), (v, u)):
+            if b in self.added.get(a, ()):
+                self.added[a].discard(b)
+            else:
+                self.removed.setdefault(a, set()).add(b)
+
+
+def _insert(adj, core, u, v):
+    """Update `core` (a list) for the new edge (u, v)."""
+    if u == v:
+        return
+    adj.add(u, v)
+    k = min(core[u], core[v])
+    roots = [w for w in (u, v) if core[w] == k]
+
+    # candidates: nodes of core number k connected to the roots through
+    # nodes that have more than k neighbours of core number >= k
+    support = {}
+    candidates = set(roots)
+    stack = list(roots)
+    while stack:
+        w = stack.pop()
+        nbrs = adj.neighbors(w)
+        support[w] = sum(1 for x in nbrs if core[x] >= k)
+        if support[w] > k:
+            for x in nbrs:
+                if core[x] == k and x not in candidates:
+                    candidates.add(x)
+                    stack.append(x)
+
+    # count only neighbours above k or among the candidates, then evict
+    for w in candidates:
+        support[w] = sum(1 for x in adj.neighbors(w) if core[x] > k or x in candidates)
+    evicted = set()
+    stack = [w for w in candidates if support[w] <= k]
+    evicted.update(stack)
+    while stack:
+        w = stack.pop()
+        for x in adj.neighbors(w):
+            if x in candidates and x not in evicted:
+                support[x] -= 1
+                if support[x] <= k:
+                    evicted.add(x)
+                    stack.append(x)
+    for w in candidates - evicted:
+        core[w] = k + 1
+
+
+def _remove(adj, core, u, v):
+    """Update `core` (a list) for the removal of edge (u, v)."""
+    if u == v:
+        return
+    adj.remove(u, v)
+    k = min(core[u], core[v])
+    if k == 0:
+        return
+    # support[w]: current number of neighbours with core number >= k, for
+    # the nodes of core number k looked at so far
+    support = {}
+    pending, dropped = [], []
+
+    def look(w):
+        support[w] = sum(1 for x in adj.neighbors(w) if core[x] >= k)
+        if support[w] < k:
+            pending.append(w)
+
+    for w in (u, v):
+        if core[w] == k and w not in support:
+            look(w)
+    while pending or dropped:
+        if pending:
+            w = pending.pop()
+            if core[w] != k:
+                continue
+            core[w] = k - 1
+            dropped.append(w)
+            for x in adj.neighbors(w):
+                if core[x] == k and x in support:
+                    support[x] -= 1
+                    if support[x] < k:
+                        pending.append(x)
+            continue
+        # neighbours not looked at yet are counted without the dropped node
+        w = dropped.pop()
+        for x in adj.neighbors(w):
+            if core[x] == k and x not in support:
+                look(x)
+
+
+def update_core_number(before, core, removed, added, after=None):
+    """Core numbers after the edge changes (see `cores.core_number`).
+
+    The regions a change can affect may be large; given `after` (the
+    changed graph), once the updates have read as many adjacency entries
+    as a full decomposition would, `after` is decomposed from scratch.
+    """
+    budget = len(before.indices) if after is not None else np.inf
+    adj = _Adjacency(before.indptr, before.indices, budget)
+    values = np.asarray(core).tolist()
+    try:
+        for u, v in zip(removed[0].tolist(), removed[1].tolist()):
+            _remove(adj, values, u, v)
+        for u, v in zip(added[0].tolist(), added[1].tolist()):
+            _insert(adj, values, u, v)
+    except _OverBudget:
+        return cores.core_number(after)
+    return np.asarray(values, dtype=np.int64)
+
+
+def _alternatives(indptr, indices, node, dist, skip, gone):
+    """Mask of the sources s for which `node` keeps a predecessor at d(s, node) - 1.
+
+    Looks at the neighbours of `node` other than `skip` and the removed
+    edges `gone`, with one BFS each; nodes with more than
+    `ALTERNATIVE_MAX_DEGREE` neighbours are not checked (empty mask).
+    """
+    keep = np.zeros(len(dist), dtype=bool)
+    nbrs = [x for x in indices[indptr[node]:indptr[node + 1]].tolist()
+            if x not in (skip, node) and (min(node, x), max(node, x)) not in gone]
+    if len(nbrs) > ALTERNATIVE_MAX_DEGREE:
+        return keep
+    for x in nbrs:
+        dx = bfs_distances(indptr, indices, x)
+        keep |= (dx >= 0) & (dx == dist - 1)
+    return keep
+
+
+def affected_sources(before, removed, added, limit=None):
+    """(closeness, betweenness) masks of the sources whose BFS may change.
+
+    With `limit`, stops early (with partial masks) once both masks have
+    more than `limit` sources.
+    """
+    n = before.number_of_nodes()
+    for_closeness = np.zeros(n, dtype=bool)
+    for_betweenness = np.zeros(n, dtype=bool)
+    indptr, indices = before.indptr, before.indices
+    gone = set(zip(removed[0].tolist(), removed[1].tolist()))
+    for a, b in gone:
+        if a == b:
+            continue
+        # d(s, a) for every source s, by symmetry
+        da = bfs_distances(indptr, indices, a)
+        db = bfs_distances(indptr, indices, b)
+        a_above = (da >= 0) & (db == da + 1)
+        b_above = (db >= 0) & (da == db + 1)
+        for_betweenness |= a_above | b_above
+        # distances only change if the lower end loses its last predecessor
+        if a_above.any():
+            for_closeness |= a_above & ~_alternatives(indptr, indices, b, db, a, gone)
+        if b_above.any():
+            for_closeness |= b_above & ~_alternatives(indptr, indices, a, da, b, gone)
+        if limit is not None and min(for_closeness.sum(), for_betweenness.sum()) > limit:
+            return for_closeness, for_betweenness
+    for a, b in zip(added[0].tolist(), added[1].tolist()):
+        if a == b:
+            continue
+        da = bfs_distances(indptr, indices, a)
+        db = bfs_distances(indptr, indices, b)
+        joins = (da < 0) != (db < 0)
+        gap = np.abs(da - db)
+        for_closeness |= joins | ((da >= 0) & (gap >= 2))
+        for_betweenness |= joins | ((da >= 0) & (gap >= 1))
+        if limit is not None and min(for_closeness.sum(), for_betweenness.sum()) > limit:
+            break
+    return for_closeness, for_betweenness
+
+
+@telemetry.timed("incremental update")
+def update(before, after, values, workers=1, max_affected=MAX_AFFECTED):
+    """Exact centralities of `after` from those of `before`, or None.
+
+    `values` is the exact-mode output of `evaluate.centralities(before)`;
+    the result has the same keys. Betweenness and closeness are recomputed
+    from scratch instead when more than `max_affected` of the sources would
+    have to be re-run. Returns None when the graphs have different node
+    sets.
+    """
+    if values.get("mode") != "exact" or "dist_sum" not in values or not same_nodes(before, after):
+        return None
+    n = before.number_of_nodes()
+    removed, added = edge_diff(before, after)
+    limit = max_affected * n
+    for_closeness, for_betweenness = affected_sources(before, removed, added, limit)
+
+    sources = np.flatnonzero(for_betweenness)
+    if len(sources) > limit:
+        # a full Brandes pass gives the closeness sums as well
+        bc, dist_sum, harm_sum = betweenness.exact(after, workers=workers, with_distances=True)
+    else:
+        bc = values["betweenness"].copy()
+        if len(sources):
+            bc -= betweenness.exact(before, workers=workers, sources=sources)
+            bc += betweenness.exact(after, workers=workers, sources=sources)
+            np.maximum(bc, 0.0, out=bc)  # rounding around exact zeros
+        # closeness-affected sources are betweenness-affected too
+        dist_sum = values["dist_sum"].copy()
+        harm_sum = values["harm_sum"].copy()
+        sources = np.flatnonzero(for_closeness)
+        if len(sources):
+            dist_sum[sources], harm_sum[sources] = closeness.source_sums(after, sources, workers)
+
+    return {
+        "nodes": n,
+        "edges": after.number_of_edges(),
+        "mode": "exact",
+        "betweenness": bc,
+        "closeness": closeness.from_sums(after, dist_sum, harm_sum),
+        "harmonic": closeness.from_sums(after, dist_sum, harm_sum, harmonic=True),
+        "dist_sum": dist_sum,
+        "harm_sum": harm_sum,
+        "core": update_core_number(before, values["core"], removed, added, after),
+        "components": after.number_connected_components(),
+        "affected_closeness": int(np.count_nonzero(for_closeness)),
+        "affected_betweenness": int(np.count_nonzero(for_betweenness)),
+    }
@@ -0,0 +1,150 @@
+import numpy as np
+from scripts.core.graph import csr_contains
+
+
+class OverlayGraph:
+    """Copy-on-write edge set on top of a read-only `CSRGraph`.
+
+    The base graph's arrays are only read (they may be memory-mapped). Edges
+    added on top are kept in slot lists with a key -> slot map, as in
+    `EdgeStore`, and removed base edges as a set of keys; `added_nbrs` and
+    `removed_nbrs` hold the same changes per node for neighbour iteration.
+    Memory grows with the number of changes, not with the size of the graph.
+
+    Slots 0..m_base - 1 are the base edges (a removed one leaves a hole) and
+    the added edges follow, so a uniform random edge is a random slot, redrawn
+    on a hole. Nodes are the compact indices 0..n-1 of the base graph.
+    """
+
+    def __init__(self, graph):
+        self.base = graph
+        self.n = graph.number_of_nodes()
+        self.m_base = graph.number_of_edges()
+        self.src = []
+        self.dst = []
+        self.pos = {}
+        self.removed = set()
+        self.added_nbrs = {}
+        self.removed_nbrs = {}
+
+    def key(self, u, v):
+        return u * self.n + v if u <= v else v * self.n + u
+
+    def __len__(self):
+        return self.m_base - len(self.removed) + len(self.src)
+
+    def slots(self):
+        """Number of slots, holes included."""
+        return self.m_base + len(self.src)
+
+    def base_has_edge(self, u, v):
+        row = self.base.neighbors(u)
+        i = np.searchsorted(row, v)
+        return bool(i < len(row) and row[i] == v)
+
+    def base_has_edges(self, u, v):
+        """Vectorized `base_has_edge` for arrays of pairs."""
+        return csr_contains(self.base.indptr, self.base.indices, u, v)
+
+    def has_edge(self, u, v, in_base=None):
+        """Whether (u, v) is an edge now; `in_base` may give `base_has_edge(u, v)`."""
+        k = self.key(u, v)
+        if k in self.pos:
+            return True
+        if in_base is None:
+            in_base = self.base_has_edge(u, v)
+        return in_base and k not in self.removed
+
+    def edge_at(self, i):
+        """Edge in slot `i`, or None for the hole of a removed base edge."""
+        if i >= self.m_base:
+            i -= self.m_base
+            return self.src[i], self.dst[i]
+        u, v = int(self.base.src[i]), int(self.base.dst[i])
+        return None if self.removed and self.key(u, v) in self.removed else (u, v)
+
+    def random_slot(self, uniform):
+        """A slot drawn uniformly among the current edges; `uniform` yields floats in [0, 1)."""
+        while True:
+            i = int(next(uniform) * self.slots())
+            if i >= self.m_base or self.edge_at(i) is not None:
+                return i
+
+    def add(self, u, v):
+        """Add edge (u, v), which must not exist yet."""
+        k = self.key(u, v)
+        if k in self.removed:
+            # a removed base edge comes back into its own slot
+            self.removed.discard(k)
+        else:
+            self.pos[k] = len(self.src) + self.m_base
+            self.src.append(u)
+            self.dst.append(v)
+        self._mark(u, v, self.removed_nbrs, self.added_nbrs)
+
+    def remove_at(self, i):
+        """Remove the edge in slot `i`; an added edge's slot gets the last added one."""
+        u, v = self.edge_at(i)
+        if i < self.m_base:
+            self.removed.add(self.key(u, v))
+        else:
+            del self.pos[self.key(u, v)]
+            last = len(self.src) - 1
+            if i - self.m_base != last:
+                lu, lv = self.src[last], self.dst[last]
+                self.src[i - self.m_base], self.dst[i - self.m_base] = lu, lv
+                self.pos[self.key(lu, lv)] = i
+            self.src.pop()
+            self.dst.pop()
+        self._mark(u, v, self.added_nbrs, self.removed_nbrs)
+        return u, v
+
+    def remove(self, u, v):
+        """Remove edge (u, v); returns False if it does not exist."""
+        k = self.key(u, v)
+        if k in self.pos:
+            self.remove_at(self.pos[k])
+            return True
+        if k in self.removed or not self.base_has_edge(u, v):
+            return False
+        self.removed.add(k)
+        self._mark(u, v, self.added_nbrs, self.removed_nbrs)
+        return True
+
+    @staticmethod
+    def _mark(u, v, undo, do):
+        """Record the change of (u, v) in `do`, or cancel its opposite in `undo`."""
+        for a, b in ((u, v), (v, u)):
+            if b in undo.get(a, ()):
+                undo[a].discard(b)
+            else:
+                do.setdefault(a, set()).add(b)
+            if u == v:
+                break
+
+    def neighbors(self, u):
+        """Current neighbours of node u, as a list."""
+        row = self.base.neighbors(u).tolist()
+        gone = self.removed_nbrs.get(u)
+        if gone:
+            row = [x for x in row if x not in gone]
+        return row + sorted(self.added_nbrs.get(u, ()))
+
+    def degree(self, u):
+        return (int(self.base.indptr[u + 1] - self.base.indptr[u])
+                - len(self.removed_nbrs.get(u, ())) + len(self.added_nbrs.get(u, ())))
+
+    def arrays(self):
+        """Current edges as (src, dst) int64 arrays of compact indices."""
+        src = np.asarray(self.base.src, dtype=np.int64)
+        dst = np.asarray(self.base.dst, dtype=np.int64)
+        if self.removed:
+            gone = np.fromiter(self.removed, dtype=np.int64, count=len(self.removed))
+            keep = ~np.isin(src * max(self.n, 1) + dst, gone)
+            src, dst = src[keep], dst[keep]
+        return (np.concatenate([src, np.array(self.src, dtype=np.int64)]),
+                np.concatenate([dst, np.array(self.dst, dtype=np.int64)]))
+
+    def to_graph(self):
+        """The current edges as a new `CSRGraph` on the base node set."""
+        return self.base.with_edges(*self.arrays())
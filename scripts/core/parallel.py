@@ -0,0 +1,130 @@
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+from scripts.core import progress
+
+## Seeded parallel execution
+#
+# Anonymizers take a `seed` and a `workers` count. Random work is split into
+# STREAMS chunks, each drawing from its own generator derived from the seed
+# by `spawn_rngs` (plus one for the coordinating process), and the chunks are
+# handed to however many workers there are. The split never depends on the
+# worker count, so results are bit-identical for the same seed whatever
+# `workers` is (and whether or not a process pool is actually used).
+#
+# Graph arrays are copied once into `multiprocessing.shared_memory` blocks and
+# attached by every worker when it starts, instead of being pickled per task.
+# Task functions read them with `shared_arrays()`; with workers == 1 the tasks
+# run inline on the original arrays.
+#
+# Workers also install the parent's progress listener (see
+# `scripts/core/progress.py`), so tasks report progress and stop on cancel
+# like inline code does.
+
+# Random streams per parallel step, independent of the number of workers.
+STREAMS = 16
+
+_STATE = {}
+
+
+def spawn_rngs(seed, count):
+    """Return `count` independent NumPy generators derived from `seed`."""
+    return [np.random.default_rng(s) for s in np.random.SeedSequence(seed).spawn(count)]
+
+
+def shared_arrays():
+    """Arrays published by the current `WorkerPool` (inside a task)."""
+    return _STATE["arrays"]
+
+
+def _attach(spec, channel=(None, None)):
+    progress.listen(*channel)
+    arrays, handles = {}, []
+    for name, (shm_name, dtype, shape) in spec.items():
+        if sys.version_info >= (3, 13):
+            shm = shared_memory.SharedMemory(name=shm_name, track=False)
+        else:
+            # Only the creating process may unlink the block, so attaching
+            # must not register it with the resource tracker.
+            register = resource_tracker.register
+            resource_tracker.register = lambda *args: None
+            try:
+                shm = shared_memory.SharedMemory(name=shm_name)
+            finally:
+                resource_tracker.register = register
+        handles.append(shm)
+        arrays[name] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    _STATE["arrays"] = arrays
+    _STATE["handles"] = handles
+
+
+def _run_task(fn, task):
+    result = fn(*task)
+    # a worker may go idle for a while: send its last increments now
+    progress.flush()
+    return result
+
+
+class WorkerPool:
+    """Process pool whose workers share a dict of NumPy arrays.
+
+    `arrays` are copied into shared memory; `pool.arrays[name]` is the
+    parent-side view, which may be updated in place between rounds of
+    tasks (workers see the change). Use as a context manager so the shared
+    blocks are released.
+    """
+
+    def __init__(self, arrays, workers):
+        self.workers = max(1, int(workers))
+        self._blocks = []
+        self._executor = None
+        if self.workers == 1:
+            self.arrays = {name: np.asarray(arr) for name, arr in arrays.items()}
+            _STATE["arrays"] = self.arrays
+            return
+
+        spec = {}
+        self.arrays = {}
+        for name, arr in arrays.items():
+            arr = np.ascontiguousarray(arr)
+            shm = shared_memory.SharedMemory(create=True, size=max(1, arr.nbytes))
+            self._blocks.append(shm)
+            view = np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)
+            view[...] = arr
+            self.arrays[name] = view
+            spec[name] = (shm.name, arr.dtype.str, arr.shape)
+        self._executor = ProcessPoolExecutor(self.workers, initializer=_attach,
+                                             initargs=(spec, progress.channel()))
+
+    def map(self, fn, tasks):
+        """Run `fn(*task)` for every task and return the results in task order."""
+        if self._executor is None:
+            return [_run_task(fn, task) for task in tasks]
+        if not tasks:
+            return []
+        return list(self._executor.map(_run_task, [fn] * len(tasks), tasks))
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+        # drop our views before releasing the buffers they point into
+        self.arrays = {}
+        _STATE.pop("arrays", None)
+        for shm in self._blocks:
+            shm.close()
+            shm.unlink()
+        self._blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def split(total, parts):
+    """Split range(total) into `parts` contiguous (start, stop) chunks."""
+    bounds = np.linspace(0, total, parts + 1).astype(np.int64)
+    return [(int(bounds[i]), int(bounds[i + 1])) for i in range(parts)]
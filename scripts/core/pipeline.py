@@ -0,0 +1,113 @@
+import builtins
+import os
+import time
+from scripts.core import progress, registry, render, telemetry
+
+SCRIPTS_DIR = registry.SCRIPTS_DIR
+
+# Order in which a chain runs its steps, whatever order they were picked in.
+CATEGORY_ORDER = ('Anonymization', 'Utilities', 'Helpers')
+
+
+class StageError(Exception):
+    """A script in a chain failed; `results` holds the stages run so far."""
+
+    def __init__(self, stage, error, results):
+        super().__init__(f"{stage['name']}: {error}")
+        self.stage = stage
+        self.error = error
+        self.results = results
+
+
+def load_scripts(scripts_dir=SCRIPTS_DIR):
+    """Load scripts grouped by category from `scripts/` subfolders.
+
+    Expected subfolders (case-insensitive):
+      - anonymization -> Anonymization
+      - utils or utility -> Utilities
+      - helpers or helper -> Helpers
+
+    A script may declare another category in its `SCRIPT` metadata. Nothing
+    is imported; see `scripts/core/registry.py`.
+
+    Returns a dict: { 'Anonymization': {name: path, ...}, 'Utilities': {...}, 'Helpers': {...} }
+    """
+    return {category: {name: script['path'] for name, script in found.items()}
+            for category, found in registry.discover(scripts_dir).items()}
+
+
+def import_script(script_path):
+    """Import a script file, once per process (see `registry.load`)."""
+    return registry.load(script_path)
+
+
+def order_steps(steps):
+    """Sort (category, name) steps into anonymization -> utilities -> helpers."""
+    return sorted(steps, key=lambda step: CATEGORY_ORDER.index(step[0]))
+
+
+def run_chain(file_path, steps, k, scripts, output=None, options=None):
+    """Run `steps` in order, piping each returned output path into the next.
+
+    `steps` is a list of (category, script name) pairs, already ordered (see
+    `order_steps`). `output`, if given, receives every line the scripts print
+    instead of stdout. `options` are extra keyword arguments such as `seed`
+    or `workers`, passed only to scripts whose `run()` accepts them; scripts
+    with an `original` parameter also receive the chain's input file. Each
+    script runs as one telemetry stage (see `scripts/core/telemetry.py`).
+
+    Returns a list with one dict per stage: category, name, input, output
+    and seconds. Raises StageError if a script is missing, has no `run()`
+    or raises, and `progress.Cancelled` if a progress listener's cancel
+    event is set (checked before every stage and inside the long loops).
+    """
+    options = options or {}
+    results = []
+    # every script of this chain draws with one shared layout
+    render.reset(chain=True)
+    current_file = file_path
+    for category, script_name in steps:
+        progress.checkpoint()
+        stage = {'category': category, 'name': script_name, 'input': current_file, 'output': None, 'seconds': 0.0}
+        script_path = scripts.get(category, {}).get(script_name)
+        if script_path is None:
+            raise StageError(stage, "script not found", results)
+
+        start = time.perf_counter()
+        try:
+            params = registry.info(script_path)['params']
+            if params is None:
+                raise StageError(stage, f"{script_name}.py does not have a compatible run() function.", results)
+            module = import_script(script_path)
+
+            kwargs = {key: value for key, value in options.items() if key in params}
+            if 'original' in params:
+                kwargs['original'] = file_path
+
+            old_print = builtins.print
+            if output is not None:
+                # Capture script output by replacing print()
+                def custom_print(*args, **kw):
+                    output(" ".join(str(a) for a in args))
+
+                builtins.print = custom_print
+            try:
+                with telemetry.stage(script_name, category=category, input=current_file, k=k) as record:
+                    result = module.run(current_file, k, **kwargs)
+                    record['output'] = result if isinstance(result, str) else None
+            finally:
+                builtins.print = old_print  # restore after script finishes
+        except (StageError, progress.Cancelled):
+            raise
+        except Exception as e:
+            stage['seconds'] = time.perf_counter() - start
+            raise StageError(stage, e, results) from e
+
+        stage['seconds'] = time.perf_counter() - start
+        # If the script returns a path, use it as the input for the next script
+        if isinstance(result, str) and os.path.exists(result):
+            current_file = result
+            stage['output'] = result
+        results.append(stage)
+
+    return results
@@ -0,0 +1,112 @@
+import time
+from contextlib import contextmanager
+
+## Progress events and cancellation
+#
+# Long loops announce their amount of work with `start(kind, total)` and
+# report it with `advance(kind, count)` ("BFS sources", "walk steps",
+# "switch attempts", ...). Nothing is sent unless a listener is installed
+# with `listening(queue, cancel)` (the GUI does, see `main.py`); events then
+# go to `queue` as tuples, with the increments of each process added up and
+# sent at most once every INTERVAL seconds:
+#
+#   ("start", kind, total)      total is None when it is not known up front
+#   ("advance", kind, count)
+#
+# `cancel` is a multiprocessing.Event. Once it is set, the next `advance()`
+# or `checkpoint()` raises `Cancelled`, in this process as well as in the
+# workers of a `WorkerPool`, which install the listener when they start.
+# Work thus stops at a reporting point: output files are only written after
+# the loops have finished, and scratch space is removed by its context
+# manager on the way out.
+
+INTERVAL = 0.25
+
+_STATE = {"queue": None, "cancel": None, "pending": {}, "sent": 0.0}
+
+
+class Cancelled(Exception):
+    """The listener's cancel event was set."""
+
+
+def listen(queue, cancel=None):
+    """Send events to `queue` (None: nowhere) and stop once `cancel` is set."""
+    _STATE.update(queue=queue, cancel=cancel, pending={}, sent=0.0)
+
+
+def channel():
+    """(queue, cancel) of the current listener, handed to worker processes."""
+    return _STATE["queue"], _STATE["cancel"]
+
+
+@contextmanager
+def listening(queue, cancel=None):
+    """Install a listener for the duration of a `with` block."""
+    previous = channel()
+    listen(queue, cancel)
+    try:
+        yield
+    finally:
+        flush()
+        listen(*previous)
+
+
+def checkpoint():
+    """Raise `Cancelled` if the listener's cancel event is set."""
+    cancel = _STATE["cancel"]
+    if cancel is not None and cancel.is_set():
+        raise Cancelled()
+
+
+def start(kind, total=None):
+    """Announce `total` units of `kind` (resets its count)."""
+    checkpoint()
+    queue = _STATE["queue"]
+    if queue is not None:
+        flush()
+        queue.put(("start", kind, None if total is None else int(total)))
+
+
+def advance(kind, count=1):
+    """`count` more units of `kind` done."""
+    checkpoint()
+    if _STATE["queue"] is None:
+        return
+    pending = _STATE["pending"]
+    pending[kind] = pending.get(kind, 0) + int(count)
+    if time.monotonic() - _STATE["sent"] >= INTERVAL:
+        flush()
+
+
+def flush():
+    """Send the increments that are still held back."""
+    queue, pending = _STATE["queue"], _STATE["pending"]
+    if queue is not None:
+        for kind, count in pending.items():
+            queue.put(("advance", kind, count))
+    pending.clear()
+    _STATE["sent"] = time.monotonic()
+
+
+class Tracker:
+    """Running counts of the events read from a listener's queue."""
+
+    def __init__(self):
+        self.totals = {}
+        self.counts = {}
+
+    def update(self, event):
+        """Apply one event; returns its kind."""
+        what, kind, value = event
+        if what == "start":
+            self.totals[kind] = value
+            self.counts[kind] = 0
+        else:
+            self.counts[kind] = self.counts.get(kind, 0) + value
+        return kind
+
+    def describe(self, kind):
+        done, total = self.counts.get(kind, 0), self.totals.get(kind)
+        if total:
+            return f"{kind}: {done:,} / {total:,} ({100 * min(done, total) // total}%)"
+        return f"{kind}: {done:,}"
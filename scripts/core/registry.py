@@ -0,0 +1,140 @@
+import ast
+import importlib.util
+import os
+import re
+import sys
+
+## Script registry
+#
+# Scripts are discovered without being imported. Every .py file in a
+# category folder of `scripts/` is parsed (not executed) for a module-level
+# declaration
+#
+#   SCRIPT = {"category": "Anonymization", "outputs_graph": True,
+#             "description": "..."}
+#
+# (a literal dict; every key is optional) and for the parameters of its
+# `run()` and its other top-level functions. Files without a declaration
+# take their category from the folder name, as before; files without a
+# `run()` are not scripts and are left out. Parsed entries are
+# cached per file modification time, so listing the scripts again costs a
+# few stat calls.
+#
+# `load()` imports a script once, under its own module name (the dotted path
+# for files inside the project, e.g. `scripts.anonymization.random_walk`),
+# and keeps it in `sys.modules`: later runs reuse the module instead of
+# executing the file again. A file changed on disk since its import is
+# executed afresh.
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_DIR = os.path.dirname(SCRIPTS_DIR)
+
+CATEGORIES = ('Anonymization', 'Utilities', 'Helpers')
+# Substrings of a folder name that select its category (case-insensitive).
+FOLDER_CATEGORIES = (('anonym', 'Anonymization'), ('util', 'Utilities'), ('help', 'Helpers'))
+
+_INFO = {}
+
+
+def folder_category(folder):
+    """Category of the scripts in `folder`, or None for unknown folders."""
+    folder = folder.lower()
+    return next((category for key, category in FOLDER_CATEGORIES if key in folder), None)
+
+
+def _declared(tree):
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(isinstance(t, ast.Name) and t.id == 'SCRIPT' for t in node.targets):
+            return ast.literal_eval(node.value)
+    return {}
+
+
+def _parameters(fn):
+    """Parameter names of a function definition after (file_path, k)."""
+    args = fn.args.posonlyargs + fn.args.args + fn.args.kwonlyargs
+    return [arg.arg for arg in args][2:]
+
+
+def info(path):
+    """Metadata of the script at `path`, read from its source.
+
+    A dict with `name`, `category` (None if neither declared nor implied by
+    the folder), `path`, `description`, `outputs_graph`, `params` (the
+    parameters of `run()` after file_path and k, or None without a `run()`)
+    and `functions` (its top-level function names).
+    """
+    path = os.path.abspath(path)
+    mtime = os.stat(path).st_mtime_ns
+    cached = _INFO.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    with open(path, 'rb') as fh:
+        tree = ast.parse(fh.read(), filename=path)
+    declared = _declared(tree)
+    functions = {node.name: node for node in tree.body if isinstance(node, ast.FunctionDef)}
+    category = declared.get('category') or folder_category(os.path.basename(os.path.dirname(path)))
+    description = declared.get('description')
+    if description is None:
+        # first paragraph of run()'s docstring
+        docstring = ast.get_docstring(functions['run']) if 'run' in functions else None
+        description = ' '.join((docstring or '').split('\n\n')[0].split())
+    entry = {
+        'name': declared.get('name') or os.path.splitext(os.path.basename(path))[0],
+        'category': category,
+        'path': path,
+        'description': description,
+        'outputs_graph': declared.get('outputs_graph', category == 'Anonymization'),
+        'params': _parameters(functions['run']) if 'run' in functions else None,
+        'functions': sorted(functions),
+    }
+    _INFO[path] = (mtime, entry)
+    return entry
+
+
+def discover(scripts_dir=SCRIPTS_DIR):
+    """Metadata of every script, as {category: {name: info}} (see `info`)."""
+    found = {category: {} for category in CATEGORIES}
+    for entry in sorted(os.listdir(scripts_dir)):
+        full = os.path.join(scripts_dir, entry)
+        if not os.path.isdir(full) or folder_category(entry) is None:
+            continue
+        for filename in sorted(os.listdir(full)):
+            if filename.endswith('.py'):
+                script = info(os.path.join(full, filename))
+                # modules without a run() (e.g. util_mtx) are libraries, not scripts
+                if script['category'] in found and script['params'] is not None:
+                    found[script['category']][script['name']] = script
+    return found
+
+
+def module_name(path):
+    """Unique module name of a script: its dotted path inside the project,
+    otherwise one derived from the absolute path."""
+    path = os.path.abspath(path)
+    relative = os.path.relpath(os.path.splitext(path)[0], PROJECT_DIR)
+    if not relative.startswith(os.pardir) and re.fullmatch(r'\w+(\.\w+)*', relative.replace(os.sep, '.')):
+        return relative.replace(os.sep, '.')
+    return 'netguc_script_' + re.sub(r'\W', '_', os.path.splitext(path)[0])
+
+
+def load(path):
+    """Import the script at `path` once (see the header); returns the module."""
+    path = os.path.abspath(path)
+    name = module_name(path)
+    mtime = os.stat(path).st_mtime_ns
+    module = sys.modules.get(name)
+    if module is not None and getattr(module, '__file__', None) and \
+            os.path.abspath(module.__file__) == path and getattr(module, '__mtime__', mtime) == mtime:
+        return module
+
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    module.__mtime__ = mtime
+    sys.modules[name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[name]
+        raise
+    return module
@@ -0,0 +1,293 @@
+import hashlib
+import io
+import os
+from collections import OrderedDict
+import numpy as np
+from scripts.core import telemetry
+
+## Render policy shared by all scripts
+#
+# NETGUC_RENDER selects what `run()` draws after it has done its work:
+#
+#   off        no figure at all (matplotlib is never imported)
+#   thumbnail  the whole graph up to NETGUC_RENDER_MAX_NODES nodes (2000 by
+#              default); above that, a degree-weighted sample of that many
+#              nodes and the edges between them. This is the default.
+#   full       every node and edge, however large the graph
+#
+# Positions come from `layout()`: networkx' spring layout for small graphs
+# (as the scripts always used) and a spectral layout of the CSR arrays
+# otherwise, O(m) per iteration instead of O(n^2). Layouts are
+# cached per graph (node set and edge set) and render mode. Inside a chain
+# (see `scripts/core/pipeline.py`, which calls `reset(chain=True)` before
+# each chain) a graph without a layout of its own reuses the one of an
+# earlier graph on the same (or a larger) node set, so every script of the
+# chain draws with the same positions, computed once. Outside a chain a
+# different edge set always gets its own layout.
+#
+# A figure sink set with `set_sink()` receives every finished figure as PNG
+# bytes instead of a window; the GUI uses it to draw in a background thread
+# (with the Agg backend) and show the images from the Tk thread.
+
+MODES = ("off", "thumbnail", "full")
+MAX_NODES = 2000
+SPRING_MAX_NODES = 500
+LABEL_MAX_NODES = 300
+SPECTRAL_ITERATIONS = 100
+
+_LAYOUTS = OrderedDict()
+_CACHE_SIZE = 8
+_SINK = {"figures": None}
+_CHAIN = {"open": False}
+
+
+def mode():
+    """Current render mode from NETGUC_RENDER (default "thumbnail")."""
+    value = os.environ.get("NETGUC_RENDER", "thumbnail").strip().lower()
+    if value not in MODES:
+        raise ValueError(f"NETGUC_RENDER must be one of {', '.join(MODES)}, not {value!r}")
+    return value
+
+
+def max_nodes():
+    return int(os.environ.get("NETGUC_RENDER_MAX_NODES", MAX_NODES))
+
+
+def pyplot():
+    """matplotlib.pyplot, imported on first use."""
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def networkx():
+    """networkx, imported on first use (only drawing needs it)."""
+    import networkx as nx
+    return nx
+
+
+def set_sink(sink):
+    """Hand finished figures to `sink(png_bytes)` instead of showing them (None: show)."""
+    _SINK["figures"] = sink
+
+
+def reset(chain=False):
+    """Forget cached layouts; with `chain`, later graphs share earlier layouts.
+
+    A chain's graphs (the input and the outputs derived from it) are drawn
+    with the first layout computed for their node set, until the next reset.
+    """
+    _LAYOUTS.clear()
+    _CHAIN["open"] = chain
+
+
+def _digest(graph):
+    """Hash of the node labels and edges of a CSRGraph."""
+    h = hashlib.sha1()
+    for arr in (graph.node_ids, graph.src, graph.dst):
+        h.update(np.ascontiguousarray(arr))
+    return h.hexdigest()
+
+
+def _eigsh_layout(indptr, indices, deg, rng):
+    """Lanczos on I + D^-1/2 A D^-1/2 (SciPy); None when SciPy is missing."""
+    try:
+        import scipy.sparse as sp
+        from scipy.sparse.linalg import eigsh
+    except ImportError:
+        return None
+    n = len(deg)
+    scale = np.where(deg > 0, 1 / np.sqrt(np.maximum(deg, 1)), 0.0)
+    adj = sp.csr_matrix((np.ones(len(indices)), indices, indptr), shape=(n, n))
+    matrix = sp.diags(scale) @ adj @ sp.diags(scale) + sp.identity(n)
+    values, vectors = eigsh(matrix, k=3, which="LA", tol=1e-3, v0=rng.random(n))
+    order = np.argsort(values)[::-1]
+    # back from the symmetric matrix to eigenvectors of D^-1 A
+    return vectors[:, order[1:3]] * scale[:, None]
+
+
+def spectral_layout(indptr, indices, iterations=SPECTRAL_ITERATIONS, seed=42):
+    """2-D spectral layout of a CSR graph, as an (n, 2) array in [-1, 1].
+
+    Uses the two leading non-trivial eigenvectors of the random-walk matrix
+    D^-1 A (Koren's degree-normalized eigenvectors). With SciPy they come
+    from Lanczos (`eigsh`); without it, from power iteration on
+    (I + D^-1 A) / 2 with the vectors kept D-orthogonal to each other and
+    to the constant vector. Nodes without neighbours are scattered over
+    the square.
+    """
+    indptr = np.asarray(indptr, dtype=np.int64)
+    n = len(indptr) - 1
+    deg = np.diff(indptr).astype(np.float64)
+    rng = np.random.default_rng(seed)
+    pos = rng.random((n, 2)) * 2 - 1
+    if n < 4 or not deg.any():
+        return pos
+
+    linked = deg > 0
+    x = _eigsh_layout(indptr, indices, deg, rng)
+    if x is None:
+        x = _power_layout(indptr, indices, deg, pos.copy(), iterations)
+    span = np.abs(x[linked]).max(axis=0)
+    span[span == 0] = 1
+    pos[linked] = x[linked] / span
+    return pos
+
+
+def _power_layout(indptr, indices, deg, x, iterations):
+    n = len(deg)
+    rows = np.repeat(np.arange(n), np.diff(indptr))
+    inv_deg = np.where(deg > 0, 1 / np.maximum(deg, 1), 0.0)
+    total = deg.sum()
+    for _ in range(iterations):
+        for c in range(2):
+            col = x[:, c]
+            col = 0.5 * (col + np.bincount(rows, weights=col[indices], minlength=n) * inv_deg)
+            col -= (col @ deg) / total
+            for j in range(c):
+                col -= (col * deg) @ x[:, j] / ((x[:, j] * deg) @ x[:, j]) * x[:, j]
+            norm = np.sqrt((col * deg) @ col)
+            x[:, c] = col / norm if norm > 0 else col
+    return x
+
+
+def _induced(graph, nodes):
+    """Edges of `graph` between the (sorted) compact indices `nodes`, relabelled 0..len-1."""
+    keep = np.zeros(graph.number_of_nodes(), dtype=bool)
+    keep[nodes] = True
+    mask = keep[graph.src] & keep[graph.dst]
+    return np.searchsorted(nodes, graph.src[mask]), np.searchsorted(nodes, graph.dst[mask])
+
+
+def _sample(graph, count, seed=42):
+    """`count` distinct nodes drawn with probability proportional to degree + 1."""
+    weights = graph.degree().astype(np.float64) + 1
+    rng = np.random.default_rng(seed)
+    return np.sort(rng.choice(len(weights), size=count, replace=False, p=weights / weights.sum()))
+
+
+def _networkx(labels, src, dst):
+    import networkx as nx
+    G = nx.Graph()
+    G.add_nodes_from(labels.tolist())
+    G.add_edges_from(zip(labels[src].tolist(), labels[dst].tolist()))
+    return G
+
+
+def _cached(node_ids, key):
+    entry = _LAYOUTS.get(key)
+    if entry is None and _CHAIN["open"]:
+        # a later graph of the chain may have lost some (now isolated) nodes
+        for candidate in reversed(_LAYOUTS.values()):
+            ids = candidate["node_ids"]
+            if len(ids) >= len(node_ids) and candidate["mode"] == key[1]:
+                idx = np.searchsorted(ids, node_ids)
+                idx[idx == len(ids)] = 0
+                if len(ids) and (ids[idx] == node_ids).all():
+                    entry = candidate
+                    break
+    if entry is not None:
+        _LAYOUTS.move_to_end(entry["key"])
+    return entry
+
+
+@telemetry.timed("layout")
+def layout(graph, render_mode=None):
+    """Positions for (a sample of) `graph`: dict with `labels` and `pos`.
+
+    Cached per graph (nodes and edges) and render mode. Inside a chain (see
+    `reset`), a graph whose nodes are a subset of a cached one's reuses its
+    positions.
+    """
+    render_mode = render_mode or mode()
+    node_ids = np.asarray(graph.node_ids)
+    key = (_digest(graph), render_mode)
+    entry = _cached(node_ids, key)
+    if entry is not None:
+        return entry
+
+    n = graph.number_of_nodes()
+    limit = max_nodes()
+    if render_mode == "thumbnail" and n > limit:
+        nodes = _sample(graph, limit)
+    else:
+        nodes = np.arange(n)
+    src, dst = _induced(graph, nodes)
+    labels = node_ids[nodes]
+
+    if len(nodes) <= SPRING_MAX_NODES:
+        import networkx as nx
+        spring = nx.spring_layout(_networkx(labels, src, dst), seed=42)
+        pos = np.array([spring[label] for label in labels.tolist()]).reshape(-1, 2)
+    else:
+        from scripts.core.graph import build_csr
+        indptr, indices = build_csr(src, dst, len(nodes))
+        pos = spectral_layout(indptr, indices)
+
+    entry = {"key": key, "mode": render_mode, "node_ids": node_ids, "labels": labels, "pos": pos}
+    _LAYOUTS[key] = entry
+    while len(_LAYOUTS) > _CACHE_SIZE:
+        _LAYOUTS.popitem(last=False)
+    return entry
+
+
+class View:
+    """What a script draws: networkx graph `G` and positions `pos`.
+
+    `G` holds the drawn nodes (all of them, or the thumbnail sample) with
+    their original labels and the edges of the graph between them.
+    """
+
+    def __init__(self, G, pos, total):
+        self.G = G
+        self.pos = pos
+        self.total = total
+        self.sampled = G.number_of_nodes() < total
+        self.labels = G.number_of_nodes() <= LABEL_MAX_NODES
+
+    def node_size(self, size):
+        """`size` for small drawings, small markers for large ones."""
+        return size if self.labels else max(2, min(size, 20000 // max(1, self.G.number_of_nodes())))
+
+    def restrict(self, H):
+        """Subgraph of networkx graph `H` on the drawn nodes."""
+        return H.subgraph([node for node in H if node in self.pos])
+
+    def show(self):
+        plt = pyplot()
+        if self.sampled:
+            plt.figtext(0.01, 0.01, f"thumbnail: {self.G.number_of_nodes()} of {self.total} nodes", fontsize=8)
+        sink = _SINK["figures"]
+        if sink is not None:
+            buffer = io.BytesIO()
+            figure = plt.gcf()
+            figure.savefig(buffer, format="png")
+            plt.close(figure)
+            sink(buffer.getvalue())
+            return
+        try:
+            plt.show(block=False)
+        except TypeError:
+            plt.show()
+
+
+def view(graph, layout_graph=None):
+    """A `View` of CSRGraph `graph` under the current policy, or None when off.
+
+    Positions come from `layout(layout_graph or graph)`; anonymizers pass
+    the original graph so the output is drawn where the input was.
+    """
+    render_mode = mode()
+    if render_mode == "off":
+        return None
+    entry = layout(layout_graph if layout_graph is not None else graph, render_mode)
+    node_ids = np.asarray(graph.node_ids)
+    # drawn nodes: the cached ones that this graph still has
+    idx = np.searchsorted(node_ids, entry["labels"])
+    idx[idx == len(node_ids)] = 0
+    present = node_ids[idx] == entry["labels"] if len(node_ids) else np.zeros(len(idx), dtype=bool)
+    nodes = idx[present]
+    src, dst = _induced(graph, nodes)
+    labels = node_ids[nodes]
+    coords = entry["pos"][present]
+    pos = dict(zip(labels.tolist(), coords))
+    return View(_networkx(labels, src, dst), pos, graph.number_of_nodes())
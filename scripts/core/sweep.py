@@ -0,0 +1,186 @@
+import csv
+import inspect
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from scripts.core import evaluate, registry
+from scripts.core.pipeline import import_script, load_scripts
+from scripts.utils.util_mtx import load_graph
+
+## Privacy/utility sweeps over a parameter grid
+#
+# One cell is (anonymizer, k, seed): anonymize the input graph with that k
+# and seed, then measure the result at threshold k (as a chain with the same
+# k would). Cells run in a process pool; every worker loads the input graph
+# once (memory-mapped from the graph cache, so the pages are shared) and
+# keeps the anonymizer modules it has imported. The original graph's
+# centralities depend only on the input, so they are computed once in the
+# parent and reused for every cell; in exact mode they are also handed to the
+# workers, which update them from each cell's edge diff.
+#
+# Rows are appended to a CSV file, one per finished cell, and flushed right
+# away. Re-running the same sweep skips the cells already in the file, so an
+# interrupted sweep resumes where it stopped; a row cut off by the
+# interruption is removed and its cell runs again.
+
+KEY_COLUMNS = ("input", "anonymizer", "k", "seed")
+EXTRA_COLUMNS = ("edge_overlap", "degree_sequence_equal", "anonymize_seconds", "measure_seconds")
+
+_WORKER = {}
+
+
+def anonymizers():
+    """Names of the anonymization scripts that expose `anonymize(graph, k, ...)`."""
+    scripts = registry.discover()["Anonymization"]
+    return sorted(name for name, script in scripts.items() if "anonymize" in script["functions"])
+
+
+def _module(name, path=None):
+    modules = _WORKER.setdefault("modules", {})
+    if name not in modules:
+        path = path or load_scripts()["Anonymization"].get(name)
+        if path is None:
+            raise ValueError(f"unknown anonymizer: {name}")
+        modules[name] = import_script(path)
+    return modules[name]
+
+
+def columns(metrics):
+    """CSV header for a sweep over `metrics`."""
+    cols = list(KEY_COLUMNS)
+    for metric in metrics:
+        cols += [metric, f"original_{metric}", f"delta_{metric}"]
+    return cols + list(EXTRA_COLUMNS)
+
+
+def _init(file_path, options, original=None):
+    _WORKER["file"] = file_path
+    _WORKER["graph"] = load_graph(file_path)
+    _WORKER["options"] = options
+    _WORKER["original"] = original
+
+
+def _run_cell(name, k, seed):
+    """Anonymize and measure one cell; returns (name, k, seed, report)."""
+    graph = _WORKER["graph"]
+    fn = _module(name).anonymize
+    params = inspect.signature(fn).parameters
+    kwargs = {key: value for key, value in (("seed", seed), ("workers", 1)) if key in params}
+
+    start = time.perf_counter()
+    result = fn(graph, k, **kwargs)
+    out = result[0] if isinstance(result, tuple) else result
+    anonymize_seconds = time.perf_counter() - start
+
+    base = (graph, _WORKER["original"]) if _WORKER["original"] is not None else None
+    report = evaluate.utilities(evaluate.centralities(out, seed=seed, base=base, **_WORKER["options"]), k)
+    report["edge_overlap"] = evaluate.edge_overlap(graph, out)
+    report["degree_sequence_equal"] = bool(np.array_equal(np.sort(graph.degree()), np.sort(out.degree())))
+    report["anonymize_seconds"] = anonymize_seconds
+    report["measure_seconds"] = report["seconds"]
+    return name, k, seed, report
+
+
+def trim_partial_row(out_path, chunk=1 << 16):
+    """Cut `out_path` back to its last newline.
+
+    A sweep killed in the middle of a write leaves a partial last line; the
+    next run would append its first row to it. Returns the bytes removed.
+    """
+    if not os.path.exists(out_path):
+        return 0
+    with open(out_path, "r+b") as fh:
+        size = end = fh.seek(0, os.SEEK_END)
+        while end > 0:
+            start = max(end - chunk, 0)
+            fh.seek(start)
+            last = fh.read(end - start).rfind(b"\n")
+            if last >= 0:
+                end = start + last + 1
+                break
+            end = start
+        fh.truncate(end)
+    return size - end
+
+
+def finished_cells(out_path, header):
+    """Keys (input, anonymizer, k, seed) already written to `out_path`.
+
+    Only complete rows count: a row with missing or empty columns (cut off
+    when a sweep was killed) is run again.
+    """
+    if not os.path.exists(out_path) or os.path.getsize(out_path) == 0:
+        return set()
+    with open(out_path, newline="") as fh:
+        reader = csv.DictReader(fh)
+        if reader.fieldnames != header:
+            raise ValueError(f"{out_path} has different columns; write this sweep to another file")
+        return {tuple(row[key] for key in KEY_COLUMNS) for row in reader
+                if None not in row and all(row[key] for key in header)}
+
+
+def run_sweep(file_path, names, ks, seeds, out_path, metrics=evaluate.METRICS, jobs=1,
+              mode=None, epsilon=None, delta=None, progress=None):
+    """Run every (anonymizer, k, seed) cell of the grid on one input file.
+
+    Appends one CSV row per cell to `out_path` and skips the cells already
+    there. `mode`, `epsilon` and `delta` are passed to
+    `evaluate.centralities`. `progress(done, total, row)` is called after
+    every finished cell. Returns the number of cells run.
+    """
+    file_path = os.path.abspath(file_path)
+    metrics = list(metrics)
+    unknown = [m for m in metrics if m not in evaluate.METRICS]
+    if unknown:
+        raise ValueError(f"unknown metric(s): {', '.join(unknown)}")
+    header = columns(metrics)
+    trim_partial_row(out_path)
+    done = finished_cells(out_path, header)
+    cells = [(name, k, seed) for name in names for k in ks for seed in seeds
+             if (file_path, name, str(k), str(seed)) not in done]
+    if not cells:
+        return 0
+
+    options = {"mode": mode, "epsilon": epsilon, "delta": delta}
+    # the input's own metrics: traversals once, a lookup per k
+    graph = load_graph(file_path)
+    original = evaluate.centralities(graph, seed=seeds[0], workers=jobs, **options)
+    original_at = {k: evaluate.utilities(original, k) for k in ks}
+    # only exact values can be updated incrementally
+    base = original if original["mode"] == "exact" else None
+
+    new_file = not os.path.exists(out_path) or os.path.getsize(out_path) == 0
+    with open(out_path, "a", newline="") as fh:
+        writer = csv.writer(fh)
+        if new_file:
+            writer.writerow(header)
+            fh.flush()
+
+        def write(name, k, seed, report):
+            before = original_at[k]
+            row = [file_path, name, k, seed]
+            for metric in metrics:
+                row += [report[metric], before[metric], report[metric] - before[metric]]
+            row += [report[key] for key in EXTRA_COLUMNS]
+            writer.writerow(row)
+            fh.flush()
+            return dict(zip(header, row))
+
+        count = 0
+        if jobs <= 1:
+            _init(file_path, options, base)
+            for cell in cells:
+                row = write(*_run_cell(*cell))
+                count += 1
+                if progress:
+                    progress(count, len(cells), row)
+        else:
+            with ProcessPoolExecutor(jobs, initializer=_init, initargs=(file_path, options, base)) as pool:
+                futures = [pool.submit(_run_cell, *cell) for cell in cells]
+                for future in as_completed(futures):
+                    row = write(*future.result())
+                    count += 1
+                    if progress:
+                        progress(count, len(cells), row)
+    return count
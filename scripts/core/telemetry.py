@@ -0,0 +1,230 @@
+import cProfile
+import functools
+import json
+import os
+import pstats
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+## Structured telemetry: spans, counters and per-stage memory
+#
+# NETGUC_TELEMETRY names a JSON-lines file that events are appended to (off
+# when unset). Every script of a chain runs as one stage (`stage()`, entered
+# by `scripts/core/pipeline.py`), and inside it the hot paths open timed
+# spans (`span()`, or the `timed()` decorator: parse, build, layout, the
+# algorithms, write) and add to named counters (`count()`: switch attempts
+# and accepted switches, walk fallbacks, BFS sources, ...). One line per
+# event:
+#
+#   {"event": "stage_start", "stage": ..., "input": ...}
+#   {"event": "span", "stage": ..., "name": ..., "seconds": ..., "rss_mb": ...}
+#   {"event": "stage_end", "stage": ..., "seconds": ..., "peak_rss_mb": ...,
+#    "counters": {...}, "error": null, ...}
+#
+# Spans nest, so a span's time includes the spans opened inside it. Peak RSS
+# is per stage where Linux lets the high-water mark be reset, otherwise the
+# peak of the process so far. Counters and spans are recorded in the process
+# that runs the stage (worker pools report their totals back to it).
+#
+# NETGUC_PROFILE adds optional profilers to every stage, comma-separated:
+#
+#   cprofile     cProfile; the stats go to <telemetry file stem>.<stage>.<pid>-<ms>.prof
+#                and the top functions by cumulative time into a "profile" event
+#   tracemalloc  peak Python heap of the stage as `traced_peak_mb`
+#
+# With telemetry off every hook returns after one dict lookup.
+
+PROFILERS = ("cprofile", "tracemalloc")
+TOP_FUNCTIONS = 15
+
+_STATE = {"file": None, "path": None, "stage": None, "counters": None}
+
+
+def path():
+    """JSON-lines file from NETGUC_TELEMETRY, or None when telemetry is off."""
+    value = os.environ.get("NETGUC_TELEMETRY", "").strip()
+    return None if value.lower() in ("", "0", "off", "no", "false") else value
+
+
+def profilers():
+    """Profilers requested by NETGUC_PROFILE."""
+    names = [p.strip().lower() for p in os.environ.get("NETGUC_PROFILE", "").split(",") if p.strip()]
+    unknown = [p for p in names if p not in PROFILERS]
+    if unknown:
+        raise ValueError(f"NETGUC_PROFILE entries must be among {', '.join(PROFILERS)}, not {', '.join(unknown)}")
+    return names
+
+
+def configure():
+    """(Re)read NETGUC_TELEMETRY; the event file is opened for appending."""
+    target = path()
+    if target == _STATE["path"]:
+        return
+    if _STATE["file"] is not None:
+        _STATE["file"].close()
+    _STATE["path"] = target
+    _STATE["file"] = open(target, "a", buffering=1) if target else None
+
+
+def enabled():
+    return _STATE["file"] is not None
+
+
+def emit(event, **fields):
+    """Append one event line (no-op when telemetry is off)."""
+    fh = _STATE["file"]
+    if fh is None:
+        return
+    record = {"time": round(time.time(), 6), "pid": os.getpid(), "event": event, "stage": _STATE["stage"]}
+    record.update(fields)
+    fh.write(json.dumps(record, default=_plain) + "\n")
+
+
+def _plain(value):
+    # NumPy scalars and the like
+    return value.item() if hasattr(value, "item") else str(value)
+
+
+def count(name, value=1):
+    """Add `value` to counter `name` of the current stage."""
+    counters = _STATE["counters"]
+    if counters is None:
+        return
+    counters[name] = counters.get(name, 0) + int(value)
+
+
+def _rss_mb(field):
+    """VmRSS / VmHWM of this process in MiB, from /proc (Linux only)."""
+    try:
+        with open("/proc/self/status") as fh:
+            for line in fh:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def _reset_peak():
+    """Restart the VmHWM high-water mark; False where that is not possible."""
+    try:
+        with open("/proc/self/clear_refs", "w") as fh:
+            fh.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb():
+    """Peak RSS of this process in MiB (since the last reset where supported)."""
+    peak = _rss_mb("VmHWM")
+    if peak is not None:
+        return peak
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+@contextmanager
+def _span(name, fields):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        emit("span", name=name, seconds=time.perf_counter() - start, rss_mb=_rss_mb("VmRSS"), **fields)
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name, **fields):
+    """Context manager timing a block as span `name`."""
+    if _STATE["file"] is None:
+        return _NULL_SPAN
+    return _span(name, fields)
+
+
+def timed(name):
+    """Decorator: every call of the function is a span `name`."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _STATE["file"] is None:
+                return fn(*args, **kwargs)
+            with _span(name, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def _top_functions(profile):
+    stats = pstats.Stats(profile)
+    rows = []
+    for (filename, line, function), (_, calls, _, cumulative, _) in stats.stats.items():
+        rows.append({"function": f"{os.path.basename(filename)}:{line}({function})",
+                     "calls": calls, "cumulative": cumulative})
+    rows.sort(key=lambda row: row["cumulative"], reverse=True)
+    return rows[:TOP_FUNCTIONS]
+
+
+@contextmanager
+def stage(name, **fields):
+    """One stage (a script of a chain): start/end events, counters, memory
+    and the NETGUC_PROFILE profilers. Yields a dict whose entries are added
+    to the end event."""
+    configure()
+    if _STATE["file"] is None:
+        yield {}
+        return
+
+    previous = _STATE["stage"], _STATE["counters"]
+    _STATE["stage"], _STATE["counters"] = name, {}
+    extra = {}
+    chosen = profilers()
+    emit("stage_start", **fields)
+    per_stage = _reset_peak()
+    tracing = "tracemalloc" in chosen and not tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.start()
+    profile = cProfile.Profile() if "cprofile" in chosen else None
+    if profile is not None:
+        profile.enable()
+    start = time.perf_counter()
+    error = None
+    try:
+        yield extra
+    except BaseException as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        if profile is not None:
+            profile.disable()
+        end = {"seconds": seconds, "peak_rss_mb": peak_rss_mb(), "peak_rss_scope": "stage" if per_stage else "process",
+               "counters": _STATE["counters"], "error": error}
+        if tracing:
+            end["traced_peak_mb"] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+            tracemalloc.stop()
+        end.update(extra)
+        if profile is not None:
+            dump = f"{os.path.splitext(_STATE['path'])[0]}.{name}.{os.getpid()}-{int(time.time() * 1000)}.prof"
+            profile.dump_stats(dump)
+            emit("profile", path=dump, top=_top_functions(profile))
+        emit("stage_end", **end)
+        _STATE["stage"], _STATE["counters"] = previous
+
+
+configure()
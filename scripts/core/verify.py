@@ -0,0 +1,306 @@
+import os
+import tempfile
+import time
+import numpy as np
+from scripts.core import telemetry
+from scripts.utils.util_mtx import (detect_format, load_graph, load_node_mapping, load_permutation, mapping_path,
+                                    open_text, permutation_dir, permutation_path, save_graph_as_mtx)
+
+## Structural-integrity checks of anonymized outputs
+#
+# Every check is a handful of vectorized passes over the edge and degree
+# arrays (sorts at worst), so verifying a 100M-edge output costs about as
+# much as loading it; nothing builds a NetworkX graph.
+#
+#   simple graph     no duplicate edges, and no self loops beyond the input's
+#   file             the .mtx size line matches its body: as many distinct
+#                    edges as declared entries (no duplicates, nothing cut
+#                    off) and every label within 1..the declared size
+#   written file     when the checked graph is not the file's own, the graph
+#                    read back from the file has its nodes and edges
+#   round trip       the output written to a temporary .mtx and read back
+#                    has the same nodes and edges (run every time, also when
+#                    the output was itself read from a file)
+#   edge count       as many edges as the input
+#   degree sequence  the same sorted degrees as the input
+#   isomorphism      the same graph up to relabeling. When the output comes
+#                    with its relabeling (the `<name>.perm.npy` key that
+#                    naive_anonymization writes to NETGUC_PERMUTATION_DIR
+#                    when that is set), the input's edges are mapped
+#                    through it and must equal the output's: that proves
+#                    isomorphism, and any difference disproves the output.
+#                    Without one, the canonical mappings of naive relabeling's
+#                    "index" and "degree" orders (the i-th output node is the
+#                    i-th input node by label, or by degree and then label)
+#                    are tried and prove isomorphism when the edge sets agree
+#                    under one of them. Otherwise Weisfeiler-Lehman colour
+#                    refinement compares both graphs: different colour
+#                    histograms disprove isomorphism, equal ones pass as
+#                    "WL-equivalent" (WL cannot tell every non-isomorphic
+#                    pair apart, e.g. some regular graphs).
+#
+# Nodes without edges do not survive an edge-list file, so the node-level
+# checks (written file, round trip, degree sequence, isomorphism) only look at nodes that
+# have at least one edge.
+#
+# The invariants each anonymizer has to keep are listed in INVARIANTS. The
+# names are the scripts' (random_add_delete is the degree-preserving edge
+# switch, random_switch the add/delete anonymizer); the simple-graph and file
+# checks apply to every output.
+
+INVARIANTS = {
+    "naive_anonymization": ("edge count", "degree sequence", "isomorphism"),
+    "random_add_delete": ("edge count", "degree sequence"),
+    "random_switch": ("edge count",),
+    "random_walk": ("edge count",),
+}
+# Maximum Weisfeiler-Lehman rounds (refinement usually stabilises sooner).
+WL_ROUNDS = 10
+
+_MIX = (np.uint64(0x9E3779B97F4A7C15), np.uint64(0xBF58476D1CE4E5B9), np.uint64(0x94D049BB133111EB))
+
+
+def read_header(file_path):
+    """Size line and `%` comments of a .mtx file, without reading its body.
+
+    Returns a dict with `comments` and (when present) `rows`, `cols`, `nnz`.
+    """
+    header = {"comments": []}
+    with open_text(file_path) as fh:
+        for line in fh:
+            s = line.strip()
+            if s.startswith("%%"):
+                continue
+            if s.startswith("%"):
+                header["comments"].append(s[1:].strip())
+                continue
+            if s:
+                rows, cols, nnz = map(int, s.split()[:3])
+                header.update(rows=rows, cols=cols, nnz=nnz)
+                break
+    return header
+
+
+def producer(file_path):
+    """Anonymization script that wrote `file_path` (from its "<script> output"
+    comment), or None."""
+    if detect_format(file_path) != "mtx":
+        return None
+    for comment in read_header(file_path)["comments"]:
+        for name in INVARIANTS:
+            if comment == f"{name} output":
+                return name
+    return None
+
+
+def _check(name, fn):
+    start = time.perf_counter()
+    ok, detail = fn()
+    return {"name": name, "ok": bool(ok), "detail": detail, "seconds": time.perf_counter() - start}
+
+
+def _loops(graph):
+    return int(np.count_nonzero(np.asarray(graph.src) == np.asarray(graph.dst)))
+
+
+def simple_graph(original, anonymized):
+    keys = np.asarray(anonymized.edge_keys())
+    duplicates = int(np.count_nonzero(keys[1:] <= keys[:-1]))
+    loops, allowed = _loops(anonymized), _loops(original)
+    ok = duplicates == 0 and loops <= allowed
+    return ok, f"{duplicates} duplicate edge(s), {loops} self loop(s) ({allowed} in the input)"
+
+
+def file_consistency(file_path, graph):
+    header = read_header(file_path)
+    if "nnz" not in header:
+        return False, "no size line"
+    edges = graph.number_of_edges()
+    top = int(graph.node_ids[-1]) if graph.number_of_nodes() else 0
+    low = int(graph.node_ids[0]) if graph.number_of_nodes() else 0
+    # Matrix Market labels are 1-based
+    ok = edges == header["nnz"] and top <= header["rows"] and low >= 1
+    return ok, (f"{header['nnz']} entries declared, {edges} distinct edges read; "
+                f"labels {low}..{top} of {header['rows']}")
+
+
+def _labels_of(file_path, graph):
+    """Node labels of `graph` as read from `file_path`, through its node
+    mapping sidecar when the file was remapped to 1..n."""
+    if not os.path.exists(mapping_path(file_path)):
+        return graph.node_ids
+    mapping = load_node_mapping(file_path)
+    return mapping[np.asarray(graph.node_ids, dtype=np.int64) - 1]
+
+
+def _linked(graph):
+    """Mask of the nodes with at least one edge."""
+    return np.diff(np.asarray(graph.indptr)) > 0
+
+
+def _linked_edge_keys(graph, by_degree=False):
+    """Edge keys (as `edge_keys`) after dropping the nodes without edges,
+    with the remaining nodes numbered by label or, with `by_degree`, by
+    degree and then label."""
+    linked = _linked(graph)
+    if linked.all() and not by_degree:
+        return np.asarray(graph.edge_keys())
+    lookup = np.cumsum(linked, dtype=np.int64) - 1
+    n = max(int(np.count_nonzero(linked)), 1)
+    if not by_degree:
+        return lookup[graph.src] * n + lookup[graph.dst]
+    rank = np.empty(n, dtype=np.int64)
+    rank[np.argsort(graph.degree()[linked], kind="stable")] = np.arange(n)
+    u, v = rank[lookup[graph.src]], rank[lookup[graph.dst]]
+    return np.sort(np.minimum(u, v) * n + np.maximum(u, v))
+
+
+def written_file(anonymized, file_path, reloaded):
+    labels = np.asarray(_labels_of(file_path, reloaded))
+    written = np.asarray(anonymized.node_ids)[_linked(anonymized)]
+    if not np.array_equal(labels, written):
+        return False, f"node labels differ ({len(labels)} read, {len(written)} written)"
+    if not np.array_equal(_linked_edge_keys(reloaded), _linked_edge_keys(anonymized)):
+        return False, f"edges differ ({reloaded.number_of_edges()} read, {anonymized.number_of_edges()} written)"
+    return True, f"{reloaded.number_of_edges()} edges identical"
+
+
+def round_trip(anonymized):
+    """Write `anonymized` to a temporary .mtx and compare what reads back."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "round_trip.mtx")
+        save_graph_as_mtx(anonymized, path)
+        return written_file(anonymized, path, load_graph(path, use_cache=False))
+
+
+def edge_count(original, anonymized):
+    a, b = original.number_of_edges(), anonymized.number_of_edges()
+    return a == b, f"{a} -> {b}"
+
+
+def degree_sequence(original, anonymized):
+    a, b = (np.sort(g.degree()[_linked(g)]) for g in (original, anonymized))
+    if len(a) != len(b):
+        return False, f"{len(a)} -> {len(b)} nodes with edges"
+    changed = int(np.count_nonzero(a != b))
+    return changed == 0, "identical" if changed == 0 else f"{changed} sorted position(s) differ"
+
+
+def _mix(x):
+    """splitmix64 finalizer, elementwise on uint64 (wraps modulo 2**64)."""
+    x = (x + _MIX[0]) & np.uint64(0xFFFFFFFFFFFFFFFF)
+    x = (x ^ (x >> np.uint64(30))) * _MIX[1]
+    x = (x ^ (x >> np.uint64(27))) * _MIX[2]
+    return x ^ (x >> np.uint64(31))
+
+
+def wl_colours(graph, rounds=WL_ROUNDS):
+    """Weisfeiler-Lehman refinement: yields the hashed colour of every node
+    after each round, starting from the degrees.
+
+    A node's next colour hashes its colour with the sum of its neighbours'
+    hashed colours (a multiset hash), so equal structures get equal colours
+    in any graph and the colours of two graphs can be compared directly.
+    """
+    indptr = np.asarray(graph.indptr)
+    indices = np.asarray(graph.indices)
+    has_nbrs = np.diff(indptr) > 0
+    starts = indptr[:-1][has_nbrs]
+    with np.errstate(over="ignore"):
+        colours = _mix(np.diff(indptr).astype(np.uint64))
+        yield colours
+        for _ in range(rounds):
+            total = np.zeros(len(colours), dtype=np.uint64)
+            if len(indices):
+                total[has_nbrs] = np.add.reduceat(_mix(colours)[indices], starts)
+            colours = _mix(colours ^ _mix(total + np.uint64(1)))
+            yield colours
+
+
+def permuted_edges(original, anonymized, permutation):
+    """Whether mapping `original`'s node i to label `permutation[i]` gives
+    exactly `anonymized`'s edges; returns (ok, detail)."""
+    ids = np.asarray(permutation, dtype=np.int64)
+    n = original.number_of_nodes()
+    if len(ids) != n or (n and (ids.min() < 0 or len(np.unique(ids)) != n)):
+        return False, f"the saved relabeling is not a permutation of the input's {n} nodes"
+    labels = np.asarray(anonymized.node_ids, dtype=np.int64)
+    top = max(int(ids.max()) if n else 0, int(labels.max()) if len(labels) else 0) + 1
+    u, v = ids[original.src], ids[original.dst]
+    a, b = labels[anonymized.src], labels[anonymized.dst]
+    mapped = np.sort(np.minimum(u, v) * top + np.maximum(u, v))
+    written = np.sort(np.minimum(a, b) * top + np.maximum(a, b))
+    if not np.array_equal(mapped, written):
+        return False, "not isomorphic (edges differ under the saved relabeling)"
+    return True, "isomorphic (edges identical under the saved relabeling)"
+
+
+def isomorphism(original, anonymized, rounds=WL_ROUNDS, permutation=None):
+    linked = _linked(original), _linked(anonymized)
+    n = int(np.count_nonzero(linked[0]))
+    if n != np.count_nonzero(linked[1]) or original.number_of_edges() != anonymized.number_of_edges():
+        return False, "different numbers of nodes with edges or of edges"
+    if permutation is not None:
+        return permuted_edges(original, anonymized, permutation)
+    for by_degree in (False, True):
+        if np.array_equal(_linked_edge_keys(original, by_degree), _linked_edge_keys(anonymized)):
+            order = "degree" if by_degree else "label"
+            return True, f"isomorphic (edges identical under the {order} order mapping)"
+
+    classes = 0
+    pairs = zip(wl_colours(original, rounds), wl_colours(anonymized, rounds))
+    for done, (a, b) in enumerate(pairs):
+        a, b = np.sort(a[linked[0]]), np.sort(b[linked[1]])
+        if not np.array_equal(a, b):
+            return False, f"not isomorphic (WL colours differ after {done} round(s))"
+        count = int(np.count_nonzero(a[1:] != a[:-1])) + 1 if n else 0
+        if count == classes or count == n:
+            break
+        classes = count
+    return True, f"WL-equivalent after {done} round(s), {count} colour classes (isomorphism not proven)"
+
+
+@telemetry.timed("verify")
+def verify(original, anonymized, script=None, file_path=None, permutation=None):
+    """Check an anonymized CSRGraph against the one it was made from.
+
+    `script` names the anonymizer (see INVARIANTS; None runs only the
+    generic checks). With `file_path`, the written output, the file is also
+    checked against its size line and read back: when `anonymized` is not
+    that file's own graph, the two must match exactly (written file). The
+    output always goes through a temporary .mtx round trip as well.
+    `permutation` (the new ID of every input node, by default read from the
+    file's `.perm.npy` key in NETGUC_PERMUTATION_DIR, when there is one) lets
+    the isomorphism check compare edges directly.
+
+    Returns {"script", "ok", "checks"}, one check per entry as
+    {"name", "ok", "detail", "seconds"}.
+    """
+    checks = [_check("simple graph", lambda: simple_graph(original, anonymized))]
+    if file_path is not None and detect_format(file_path) == "mtx":
+        source = anonymized.meta.get("source")
+        from_file = source is not None and os.path.abspath(source) == os.path.abspath(file_path)
+        reloaded = anonymized if from_file else load_graph(file_path, use_cache=False)
+        checks.append(_check("file", lambda: file_consistency(file_path, reloaded)))
+        if not from_file:
+            checks.append(_check("written file", lambda: written_file(anonymized, file_path, reloaded)))
+    checks.append(_check("round trip", lambda: round_trip(anonymized)))
+
+    directory = permutation_dir()
+    if permutation is None and file_path is not None and directory is not None \
+            and os.path.exists(permutation_path(file_path, directory)):
+        permutation = load_permutation(file_path, directory)
+    named = {"edge count": edge_count, "degree sequence": degree_sequence,
+             "isomorphism": lambda a, b: isomorphism(a, b, permutation=permutation)}
+    for name in INVARIANTS.get(script, ()):
+        checks.append(_check(name, lambda: named[name](original, anonymized)))
+    return {"script": script, "ok": all(c["ok"] for c in checks), "checks": checks}
+
+
+def format_report(report):
+    """Printable lines: one per check."""
+    lines = [f"Integrity of {report['script'] or 'unknown anonymizer'} output: "
+             f"{'passed' if report['ok'] else 'FAILED'}"]
+    for c in report["checks"]:
+        lines.append(f"  {'ok  ' if c['ok'] else 'FAIL'} {c['name']:<16} {c['detail']} ({c['seconds']:.3f}s)")
+    return lines
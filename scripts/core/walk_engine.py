@@ -0,0 +1,159 @@
+import numpy as np
+from scripts.core import progress, telemetry
+from scripts.core.parallel import WorkerPool, shared_arrays, split
+
+
+def random_walks(indptr, indices, starts, k, rng):
+    """Advance one walker per entry of `starts` by `k` uniform random steps.
+
+    All walkers move together: each step draws an offset in
+    [indptr[v], indptr[v + 1]) for every walker's current node v. A walker on
+    a node without neighbours stays where it is. Returns the end nodes.
+    """
+    indptr = np.asarray(indptr)
+    current = np.array(starts, dtype=np.int64)
+    for _ in range(k):
+        lo = indptr[current]
+        deg = indptr[current + 1] - lo
+        offsets = (rng.random(len(current)) * deg).astype(np.int64)
+        moving = deg > 0
+        if moving.all():
+            current = indices[lo + offsets].astype(np.int64)
+        else:
+            current[moving] = indices[(lo + offsets)[moving]]
+        progress.advance("walk steps", len(current))
+    return current
+
+
+def _walk_task(start, stop, k, rng):
+    arrays = shared_arrays()
+    return random_walks(arrays["indptr"], arrays["indices"], arrays["starts"][start:stop], k, rng)
+
+
+@telemetry.timed("random walks")
+def parallel_walks(graph, starts, k, rngs, workers=None):
+    """Run `random_walks` for `starts` in len(rngs) chunks on `workers` processes.
+
+    Walker chunk i always uses `rngs[i]`, so the end nodes only depend on the
+    generators, not on `workers` (default: one per chunk).
+    """
+    arrays = {"indptr": graph.indptr, "indices": graph.indices, "starts": starts}
+    progress.start("walk steps", k * len(starts))
+    with WorkerPool(arrays, workers or len(rngs)) as pool:
+        tasks = [(a, b, k, rng) for (a, b), rng in zip(split(len(starts), len(rngs)), rngs)]
+        return np.concatenate(pool.map(_walk_task, tasks))
+
+
+def random_neighbor(indptr, indices, nodes, rng, exclude=None):
+    """Uniform random neighbour of every node in `nodes`.
+
+    With `exclude`, the neighbour is drawn among the other neighbours: an
+    offset is drawn from the first deg - 1 slots and a hit on the excluded
+    node is redirected to the last slot. Returns (neighbours, ok) where `ok`
+    is False for nodes with no eligible neighbour.
+    """
+    nodes = np.asarray(nodes, dtype=np.int64)
+    lo = indptr[nodes]
+    deg = (indptr[nodes + 1] - lo).astype(np.int64)
+    choices = deg - 1 if exclude is not None else deg
+    ok = choices > 0
+    offsets = (rng.random(len(nodes)) * np.maximum(choices, 0)).astype(np.int64)
+    picked = np.where(ok, indices[np.where(ok, lo + offsets, 0)], -1).astype(np.int64)
+    if exclude is not None:
+        hit = ok & (picked == exclude)
+        picked[hit] = indices[lo[hit] + deg[hit] - 1]
+    return picked, ok
+
+
+def _first_occurrence(keys):
+    """Mask of entries whose key did not appear at an earlier position."""
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    first = np.ones(len(keys), dtype=bool)
+    first[1:] = sorted_keys[1:] != sorted_keys[:-1]
+    mask = np.empty(len(keys), dtype=bool)
+    mask[order] = first
+    return mask
+
+
+def _contains(sorted_keys, queries):
+    idx = np.searchsorted(sorted_keys, queries)
+    idx[idx == len(sorted_keys)] = 0
+    return sorted_keys[idx] == queries if len(sorted_keys) else np.zeros(len(queries), dtype=bool)
+
+
+@telemetry.timed("walk fallbacks")
+def walk_anonymize(graph, k, rng, endpoints=None):
+    """Replace every edge (u, v) with (u, x), x the end of a k-step walk from v.
+
+    Walks run on the original graph. The fallbacks of the sequential version
+    are applied as vectorized post-passes over all edges at once:
+
+      1. a walk that returns to u is redirected to a random neighbour of u
+         other than v (or to v itself when u has no other neighbour);
+      2. a proposal that repeats an earlier proposal takes one more random
+         step from x;
+      3. if that still gives a self loop or a duplicate, the original edge
+         (u, v) is kept. A proposal that equals a kept original edge then
+         falls back to its own original edge too, until nothing changes.
+
+    The result is always a simple graph with exactly one output edge per
+    input edge. Returns (src, dst, stats) with compact endpoint arrays and
+    counts of `self_loops_redirected` and `duplicates_avoided` (edges kept).
+
+    `endpoints` may hold precomputed walk ends (e.g. from `parallel_walks`);
+    `rng` then only drives the post-passes.
+    """
+    n = graph.number_of_nodes()
+    indptr, indices = graph.indptr, graph.indices
+    u = np.asarray(graph.src, dtype=np.int64)
+    v = np.asarray(graph.dst, dtype=np.int64)
+    own = np.minimum(u, v) * n + np.maximum(u, v)
+    edge_ids = np.arange(len(u))
+
+    if endpoints is None:
+        progress.start("walk steps", k * len(v))
+        x = random_walks(indptr, indices, v, k, rng)
+    else:
+        x = np.array(endpoints, dtype=np.int64)
+
+    # 1. self loops: use another neighbour of u
+    loop = x == u
+    if loop.any():
+        alt, ok = random_neighbor(indptr, indices, u[loop], rng, exclude=v[loop])
+        x[loop] = np.where(ok, alt, v[loop])
+
+    # 2. duplicates between proposals: the first one wins, the others retry
+    keys = np.minimum(u, x) * n + np.maximum(u, x)
+    accepted = u != x
+    accepted &= _first_occurrence(np.where(accepted, keys, -1 - edge_ids))
+
+    retry = np.flatnonzero(~accepted)
+    if len(retry):
+        alt, ok = random_neighbor(indptr, indices, x[retry], rng)
+        alt_keys = np.minimum(u[retry], alt) * n + np.maximum(u[retry], alt)
+        good = ok & (alt != u[retry]) & ~_contains(np.sort(keys[accepted]), alt_keys)
+        good &= _first_occurrence(np.where(good, alt_keys, -1 - np.arange(len(retry))))
+        x[retry[good]] = alt[good]
+        keys[retry[good]] = alt_keys[good]
+        accepted[retry[good]] = True
+
+    # 3. keep the original edge where nothing worked, and drop every new
+    #    edge that coincides with a kept original one
+    kept = ~accepted
+    while True:
+        x[kept] = v[kept]
+        keys[kept] = own[kept]
+        clash = ~kept & (keys != own) & _contains(np.sort(own[kept]), keys)
+        if not clash.any():
+            break
+        kept |= clash
+
+    stats = {
+        "self_loops_redirected": int(loop.sum()),
+        "duplicates_avoided": int(kept.sum()),
+    }
+    telemetry.count("walk self loops redirected", stats["self_loops_redirected"])
+    telemetry.count("walk duplicates retried", len(retry))
+    telemetry.count("walk originals kept", stats["duplicates_avoided"])
+    return u, x, stats
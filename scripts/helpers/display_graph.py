@@ -1,42 +1,32 @@
-import io
-import os
-import random
-import networkx as nx
-import matplotlib.pyplot as plt
-from scripts.utils.util_mtx import save_graph_as_mtx
+from scripts.core import render
+from scripts.utils.util_mtx import load_graph
 
-def run(file_path, k):
-    # Open whatever file the user selected in the GUI
-    with open(file_path) as f:
-        lines = [l for l in f if not l.startswith('%') and not l.startswith('%%')]
-
-    # Parse the MTX metadata
-    _, _, num_edges = map(int, lines[0].split())
+# Registry metadata, read without importing this file (scripts/core/registry.py)
+SCRIPT = {"category": "Helpers", "outputs_graph": False, "description": "Draw the graph"}
 
-    # Convert each remaining line into a tuple (u, v)
-    edges_data = [tuple(map(int, line.split())) for line in lines[1:]]
-
-    print(f"Loaded {len(edges_data)} edges.")
+def run(file_path, k):
+    # Stream whatever file the user selected in the GUI into the CSR core
+    graph = load_graph(file_path)
 
-    # Create graph
-    G = nx.Graph()
-    G.add_edges_from(edges_data)
+    print(f"Loaded {graph.number_of_edges()} edges.")
 
-    # Deterministic layout
-    pos = nx.spring_layout(G, seed=42)
+    # What to draw, and where, under the render policy
+    view = render.view(graph)
+    if view is None:
+        print("Rendering is off (NETGUC_RENDER=off).")
+        return
 
     # Plot graph
+    plt = render.pyplot()
+    nx = render.networkx()
     plt.figure(figsize=(8, 8))
     nx.draw(
-        G,
-        pos,
-        with_labels=True,
+        view.G,
+        view.pos,
+        with_labels=view.labels,
         node_color="lightgreen",
-        node_size=600,
+        node_size=view.node_size(600),
         edge_color="gray",
     )
 
-    try:
-        plt.show(block=False)
-    except TypeError:
-        plt.show()
+    view.show()
@@ -1,66 +1,94 @@
-import networkx as nx
-import matplotlib.pyplot as plt
+import numpy as np
+from scripts.core import betweenness, render
+from scripts.utils.util_mtx import load_graph
 
-def run(file_path, k):
+# Registry metadata, read without importing this file (scripts/core/registry.py)
+SCRIPT = {"category": "Utilities", "outputs_graph": False, "description": "Share of nodes with betweenness >= k"}
+
+# Per-node values are only printed for graphs up to this size.
+PRINT_MAX_NODES = 1000
+
+def run(file_path, k, seed=None, workers=1, mode=None, epsilon=None, delta=None):
     """
     Compute betweenness centrality utility.
     Utility = (# nodes with betweenness >= k) / N
+
+    `mode` is "exact", "approximate" or "auto" (default: NETGUC_BC_MODE, see
+    `scripts/core/betweenness.py`). The approximation samples shortest paths
+    and reports the utility as an interval that holds with probability
+    1 - delta.
     """
 
     # --- Load MTX network file ---
-    with open(file_path) as f:
-        lines = [l for l in f if not l.startswith('%') and not l.startswith('%%')]
+    graph = load_graph(file_path)
+    n = graph.number_of_nodes()
 
-    _, _, num_edges = map(int, lines[0].split())
-    edges_data = [tuple(map(int, line.split())) for line in lines[1:]]
-
-    G = nx.Graph()
-    G.add_edges_from(edges_data)
-
-    print(f"Loaded {G.number_of_nodes()} nodes and {G.number_of_edges()} edges.")
+    print(f"Loaded {n} nodes and {graph.number_of_edges()} edges.")
 
     # --- Betweenness centrality ---
-    print("\nComputing betweenness centrality...")
-    bc = nx.betweenness_centrality(G, normalized=True)
+    mode = mode or betweenness.mode()
+    if mode == "auto":
+        mode = "exact" if n <= betweenness.exact_max_nodes() else "approximate"
+    epsilon = betweenness.default_epsilon() if epsilon is None else epsilon
+    delta = betweenness.default_delta() if delta is None else delta
+
+    if mode == "exact":
+        print("\nComputing betweenness centrality (exact)...")
+        values = betweenness.exact(graph, workers=workers)
+        info = None
+    else:
+        print(f"\nComputing betweenness centrality (approximate, epsilon={epsilon}, delta={delta})...")
+        values, info = betweenness.approximate(graph, epsilon=epsilon, delta=delta, seed=seed, workers=workers)
+        print(f"  {info['samples']} sampled paths (vertex diameter <= {info['vertex_diameter']})")
 
     # Print values
-    for node, val in bc.items():
-        print(f"Node {node}: {val:.4f}")
+    if n <= PRINT_MAX_NODES:
+        for node, val in zip(graph.node_ids.tolist(), values.tolist()):
+            print(f"Node {node}: {val:.4f}")
 
-    avg_bc = sum(bc.values()) / len(bc)
+    avg_bc = float(values.mean()) if n else 0.0
     print(f"\nAverage Betweenness: {avg_bc:.4f}")
 
     # Utility metric
-    surviving = sum(1 for val in bc.values() if val >= k)
-    utility = surviving / len(bc)
-    print(f"Utility (BC >= {k}): {utility:.4f}")
+    utility = np.count_nonzero(values >= k) / n if n else 0.0
+    if info is None:
+        print(f"Utility (BC >= {k}): {utility:.4f}")
+        title = f"Utility (BC >= {k}) = {utility:.4f}"
+    else:
+        low, high = betweenness.utility_interval(values, k, info["epsilon"])
+        print(f"Utility (BC >= {k}): {utility:.4f}, "
+              f"in [{low:.4f}, {high:.4f}] with probability >= {1 - delta:.2f} "
+              f"(estimates within +/-{info['epsilon']:.4f})")
+        title = f"Utility (BC >= {k}) ~ {utility:.4f} [{low:.4f}, {high:.4f}]"
 
     # --- Visualization ---
-    pos = nx.spring_layout(G, seed=42)
+    view = render.view(graph)
+    if view is None:
+        return
 
+    plt = render.pyplot()
+    nx = render.networkx()
     plt.figure(figsize=(8, 8))
     ax = plt.gca()  # get current axes
 
-    node_colors = [bc[n] for n in G.nodes()]
+    node_colors = values[graph.index_of(np.array(list(view.G.nodes())))]
 
     # Draw on the axes explicitly
     nodes = nx.draw_networkx_nodes(
-        G, pos,
+        view.G, view.pos,
         node_color=node_colors,
         cmap=plt.cm.viridis,
-        node_size=600,
+        node_size=view.node_size(600),
         ax=ax
     )
-    nx.draw_networkx_edges(G, pos, ax=ax, edge_color="#999")
-    nx.draw_networkx_labels(G, pos, ax=ax)
+    nx.draw_networkx_edges(view.G, view.pos, ax=ax, edge_color="#999")
+    if view.labels:
+        nx.draw_networkx_labels(view.G, view.pos, ax=ax)
 
     # Colorbar MUST use the "nodes" object
     cbar = plt.colorbar(nodes, ax=ax)
     cbar.set_label("Betweenness")
 
-    plt.title(f"Betweenness Centrality\nUtility (BC >= {k}) = {utility:.4f}")
+    plt.title(f"Betweenness Centrality\n{title}")
     plt.axis("off")
-    try:
-        plt.show(block=False)
-    except TypeError:
-        plt.show()
+    view.show()
@@ -1,64 +1,95 @@
-import networkx as nx
-import matplotlib.pyplot as plt
+import numpy as np
+from scripts.core import closeness, render
+from scripts.utils.util_mtx import load_graph
 
-def run(file_path, k):
+# Registry metadata, read without importing this file (scripts/core/registry.py)
+SCRIPT = {"category": "Utilities", "outputs_graph": False, "description": "Share of nodes with closeness >= k"}
+
+# Per-node values are only printed for graphs up to this size.
+PRINT_MAX_NODES = 1000
+
+def run(file_path, k, seed=None, workers=1, mode=None, harmonic=None, epsilon=None, delta=None):
     """
     Compute closeness centrality utility.
     Utility = (# nodes with closeness >= k) / N
+
+    `harmonic` switches to normalized harmonic closeness, which stays
+    meaningful on disconnected graphs. `mode` is "exact", "approximate" or
+    "auto" (default: NETGUC_CC_MODE, see `scripts/core/closeness.py`); the
+    approximation BFSes from sampled pivots and reports the utility as an
+    interval that holds with probability 1 - delta.
     """
 
     # --- Load MTX network file ---
-    with open(file_path) as f:
-        lines = [l for l in f if not l.startswith('%') and not l.startswith('%%')]
+    graph = load_graph(file_path)
+    n = graph.number_of_nodes()
 
-    _, _, num_edges = map(int, lines[0].split())
-    edges_data = [tuple(map(int, line.split())) for line in lines[1:]]    
-
-    G = nx.Graph()
-    G.add_edges_from(edges_data)
-
-    print(f"Loaded {G.number_of_nodes()} nodes and {G.number_of_edges()} edges.")
+    print(f"Loaded {n} nodes and {graph.number_of_edges()} edges.")
 
     # --- Closeness centrality ---
-    print("\nComputing closeness centrality...")
-    cc = nx.closeness_centrality(G)
+    mode = mode or closeness.mode()
+    if mode == "auto":
+        mode = "exact" if n <= closeness.exact_max_nodes() else "approximate"
+    harmonic = closeness.default_harmonic() if harmonic is None else harmonic
+    epsilon = closeness.default_epsilon() if epsilon is None else epsilon
+    delta = closeness.default_delta() if delta is None else delta
+    name = "harmonic closeness" if harmonic else "closeness"
+
+    if mode == "exact":
+        print(f"\nComputing {name} centrality (exact)...")
+        values = closeness.exact(graph, harmonic=harmonic, workers=workers)
+        info = None
+    else:
+        print(f"\nComputing {name} centrality (approximate, epsilon={epsilon}, delta={delta})...")
+        values, low, high, info = closeness.approximate(
+            graph, harmonic=harmonic, epsilon=epsilon, delta=delta, seed=seed, workers=workers)
+        print(f"  {info['pivots']} sampled pivots")
 
     # Print values
-    for node, val in cc.items():
-        print(f"Node {node}: {val:.4f}")
+    if n <= PRINT_MAX_NODES:
+        for node, val in zip(graph.node_ids.tolist(), values.tolist()):
+            print(f"Node {node}: {val:.4f}")
 
-    avg_cc = sum(cc.values()) / len(cc)
+    avg_cc = float(values.mean()) if n else 0.0
     print(f"\nAverage Closeness: {avg_cc:.4f}")
 
     # Utility metric
-    surviving = sum(1 for val in cc.values() if val >= k)
-    utility = surviving / len(cc)
-    print(f"Utility (CC >= {k}): {utility:.4f}")
+    utility = np.count_nonzero(values >= k) / n if n else 0.0
+    if info is None:
+        print(f"Utility (CC >= {k}): {utility:.4f}")
+        title = f"Utility (CC >= {k}) = {utility:.4f}"
+    else:
+        lo, hi = closeness.utility_interval(low, high, k)
+        print(f"Utility (CC >= {k}): {utility:.4f}, "
+              f"in [{lo:.4f}, {hi:.4f}] with probability >= {1 - delta:.2f}")
+        title = f"Utility (CC >= {k}) ~ {utility:.4f} [{lo:.4f}, {hi:.4f}]"
 
     # --- Visualization ---
-    pos = nx.spring_layout(G, seed=42)
+    view = render.view(graph)
+    if view is None:
+        return
 
+    plt = render.pyplot()
+    nx = render.networkx()
     plt.figure(figsize=(8, 8))
     ax = plt.gca()
 
-    node_colors = [cc[n] for n in G.nodes()]
+    node_colors = values[graph.index_of(np.array(list(view.G.nodes())))]
 
     nodes = nx.draw_networkx_nodes(
-        G, pos,
+        view.G, view.pos,
         node_color=node_colors,
         cmap=plt.cm.plasma,
-        node_size=600,
+        node_size=view.node_size(600),
         ax=ax
     )
-    nx.draw_networkx_edges(G, pos, ax=ax, edge_color="#999")
-    nx.draw_networkx_labels(G, pos, ax=ax)
+    nx.draw_networkx_edges(view.G, view.pos, ax=ax, edge_color="#999")
+    if view.labels:
+        nx.draw_networkx_labels(view.G, view.pos, ax=ax)
 
     cbar = plt.colorbar(nodes, ax=ax)
-    cbar.set_label("Closeness")
+    cbar.set_label("Harmonic closeness" if harmonic else "Closeness")
 
-    plt.title(f"Closeness Centrality\nUtility (CC >= {k}) = {utility:.4f}")
+    plt.title(f"{name.capitalize()} Centrality\n{title}")
     plt.axis("off")
-    try:
-        plt.show(block=False)
-    except TypeError:
-        plt.show()
+    view.show()
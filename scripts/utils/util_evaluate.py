@@ -0,0 +1,45 @@
+import json
+import os
+from scripts.core import evaluate
+from scripts.utils.util_mtx import base_name, load_graph
+
+# Registry metadata, read without importing this file (scripts/core/registry.py)
+SCRIPT = {"category": "Utilities", "outputs_graph": False, "description": "Every utility metric, original vs anonymized"}
+
+def run(file_path, k, original=None, seed=None, workers=1):
+    """
+    Evaluate all utility metrics at once, for the anonymized graph against
+    the original one (`original`, filled in by the chain runner with the
+    chain's input file). Each graph is loaded once and traversed once.
+    The report is saved as JSON next to the input file.
+    """
+
+    # --- Load both graphs ---
+    graph = load_graph(file_path)
+    if original is None or os.path.abspath(original) == os.path.abspath(file_path):
+        print("No anonymization ran before this step; comparing the graph with itself.")
+        base_graph = graph
+    else:
+        base_graph = load_graph(original)
+
+    print(f"Original: {base_graph.number_of_nodes()} nodes, {base_graph.number_of_edges()} edges.")
+    print(f"Anonymized: {graph.number_of_nodes()} nodes, {graph.number_of_edges()} edges.")
+
+    # --- Metrics for both graphs ---
+    report = evaluate.evaluate(base_graph, graph, k, seed=seed, workers=workers)
+    report["original_file"] = original or file_path
+    report["anonymized_file"] = file_path
+
+    print()
+    for line in evaluate.format_report(report):
+        print(line)
+
+    # Save the report next to the evaluated file
+    try:
+        base = base_name(file_path)
+        out_path = os.path.join(os.path.dirname(file_path), f"{base}_evaluation.json")
+        with open(out_path, "w") as fh:
+            json.dump(report, fh, indent=2)
+        print(f"Saved evaluation report to: {out_path}")
+    except Exception as e:
+        print(f"Failed to save report: {e}")
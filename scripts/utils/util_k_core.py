@@ -1,41 +1,38 @@
-import networkx as nx
-import matplotlib.pyplot as plt
+import numpy as np
+from scripts.core import cores, render
+from scripts.utils.util_mtx import load_graph
 
-def run(file_path, k):
+# Registry metadata, read without importing this file (scripts/core/registry.py)
+SCRIPT = {"category": "Utilities", "outputs_graph": False, "description": "Share of nodes in the k-core"}
+
+def run(file_path, k, sweep=False):
     """
     Compute the k-core of the graph and evaluate the k-core utility metric.
     Utility = (Number of nodes in k-core / Original number of nodes)
+
+    Core numbers are computed once (`scripts/core/cores.py`); with `sweep`
+    the k-core and k-shell sizes of every k are printed as well.
     """
 
     # --- Load MTX network file ---
-    with open(file_path) as f:
-        lines = [l for l in f if not l.startswith('%') and not l.startswith('%%')]
-
-    # Parse header
-    _, _, num_edges = map(int, lines[0].split())
-
-    # Convert each remaining line into an edge pair
-    edges_data = [tuple(map(int, line.split())) for line in lines[1:]]
+    graph = load_graph(file_path)
 
-    # Build graph
-    G = nx.Graph()
-    G.add_edges_from(edges_data)
-
-    max_deg = max(dict(G.degree()).values())
+    max_deg = int(graph.degree().max()) if graph.number_of_nodes() else 0
     print("Max degree in graph =", max_deg)
 
 
-    print(f"Loaded graph with {G.number_of_nodes()} nodes and {G.number_of_edges()} edges.")
+    print(f"Loaded graph with {graph.number_of_nodes()} nodes and {graph.number_of_edges()} edges.")
 
     # --- Compute k-core ---
-    try:
-        kcore = nx.k_core(G, k=k)
-    except nx.NetworkXError:
-        print(f"Error: k={k} is too large — produces an empty graph.")
-        return
+    core = cores.core_number(graph)
+    if sweep:
+        print("\nCore profile (all k):")
+        for line in cores.profile_table(core):
+            print(line)
 
-    core_nodes = kcore.number_of_nodes()
-    original_nodes = G.number_of_nodes()
+    in_core = core >= k
+    core_nodes = int(np.count_nonzero(in_core))
+    original_nodes = graph.number_of_nodes()
 
     # Utility metric
     utility = core_nodes / original_nodes if original_nodes > 0 else 0
@@ -45,14 +42,20 @@ def run(file_path, k):
 
     # --- Visualization ---
     # Layout from original graph for consistent positioning
-    pos = nx.spring_layout(G, seed=42)
+    view = render.view(graph)
+    if view is None:
+        return
 
+    drawn_core = core[graph.index_of(np.array(list(view.G)))].tolist()
+    plt = render.pyplot()
+    nx = render.networkx()
     plt.figure(figsize=(8, 8))
 
     # Draw original graph faded
     nx.draw(
-        G,
-        pos,
+        view.G,
+        view.pos,
+        node_size=view.node_size(300),
         node_color="#dddddd",
         edge_color="#cccccc",
         alpha=0.3,
@@ -61,16 +64,13 @@ def run(file_path, k):
 
     # Draw k-core highlighted
     nx.draw(
-        kcore,
-        pos,
+        view.G.subgraph(node for node, c in zip(view.G, drawn_core) if c >= k),
+        view.pos,
         node_color="orange",
         edge_color="red",
-        node_size=600,
-        with_labels=True
+        node_size=view.node_size(600),
+        with_labels=view.labels
     )
 
     plt.title(f"K-Core (k={k}) — Utility={utility:.4f}")
-    try:
-        plt.show(block=False)
-    except TypeError:
-        plt.show()
+    view.show()
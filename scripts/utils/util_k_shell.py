@@ -1,41 +1,38 @@
-import networkx as nx
-import matplotlib.pyplot as plt
+import numpy as np
+from scripts.core import cores, render
+from scripts.utils.util_mtx import load_graph
 
-def run(file_path, k):
+# Registry metadata, read without importing this file (scripts/core/registry.py)
+SCRIPT = {"category": "Utilities", "outputs_graph": False, "description": "Share of nodes in the k-shell"}
+
+def run(file_path, k, sweep=False):
     """
     Compute the k-shell of the graph and evaluate a k-shell utility metric.
     Utility = (Number of nodes in k-shell / Original number of nodes)
+
+    Core numbers are computed once (`scripts/core/cores.py`); with `sweep`
+    the k-core and k-shell sizes of every k are printed as well.
     """
 
     # --- Load MTX network file ---
-    with open(file_path) as f:
-        lines = [l for l in f if not l.startswith('%') and not l.startswith('%%')]
-
-    # Parse header
-    _, _, num_edges = map(int, lines[0].split())
-
-    # Convert each remaining line into an edge pair
-    edges_data = [tuple(map(int, line.split())) for line in lines[1:]]
-
-    # Build graph
-    G = nx.Graph()
-    G.add_edges_from(edges_data)
+    graph = load_graph(file_path)
 
     # Degree info
-    max_deg = max(dict(G.degree()).values())
+    max_deg = int(graph.degree().max()) if graph.number_of_nodes() else 0
     print("Max degree in graph =", max_deg)
 
-    print(f"Loaded graph with {G.number_of_nodes()} nodes and {G.number_of_edges()} edges.")
+    print(f"Loaded graph with {graph.number_of_nodes()} nodes and {graph.number_of_edges()} edges.")
 
     # --- Compute k-shell ---
-    try:
-        kshell = nx.k_shell(G, k=k)
-    except nx.NetworkXError:
-        print(f"Invalid k={k} for shell decomposition.")
-        return
+    core = cores.core_number(graph)
+    if sweep:
+        print("\nCore profile (all k):")
+        for line in cores.profile_table(core):
+            print(line)
 
-    shell_nodes = kshell.number_of_nodes()
-    original_nodes = G.number_of_nodes()
+    in_shell = core == k
+    shell_nodes = int(np.count_nonzero(in_shell))
+    original_nodes = graph.number_of_nodes()
 
     # Utility metric
     utility = shell_nodes / original_nodes if original_nodes > 0 else 0
@@ -48,13 +45,19 @@ def run(file_path, k):
         return
 
     # --- Visualization ---
-    pos = nx.spring_layout(G, seed=42)
+    view = render.view(graph)
+    if view is None:
+        return
 
+    drawn_core = core[graph.index_of(np.array(list(view.G)))].tolist()
+    plt = render.pyplot()
+    nx = render.networkx()
     plt.figure(figsize=(8, 8))
 
     # Draw original faded graph
     nx.draw(
-        G, pos,
+        view.G, view.pos,
+        node_size=view.node_size(300),
         node_color="#dddddd",
         edge_color="#cccccc",
         alpha=0.25,
@@ -63,15 +66,12 @@ def run(file_path, k):
 
     # Highlight ONLY the k-shell
     nx.draw(
-        kshell, pos,
+        view.G.subgraph(node for node, c in zip(view.G, drawn_core) if c == k), view.pos,
         node_color="orange",
         edge_color="red",
-        node_size=600,
-        with_labels=True
+        node_size=view.node_size(600),
+        with_labels=view.labels
     )
 
     plt.title(f"K-Shell (k={k}) — Utility={utility:.4f}")
-    try:
-        plt.show(block=False)
-    except TypeError:
-        plt.show()
+    view.show()
@@ -1,72 +1,446 @@
+import bz2
+import gzip
+import io
+import lzma
 import os
+import numpy as np
+from scripts.core import cache, progress, telemetry
+from scripts.core.graph import CSRGraph, index_dtype
 
-def save_graph_as_mtx(G, out_path=None, comment=None, remap_to_one_based=True):
-    """Save a NetworkX graph `G` to Matrix Market (.mtx) coordinate format.
+# Size of the text blocks handed to the parser while streaming a .mtx body.
+CHUNK_BYTES = 1 << 24
+# Edges formatted per write when saving.
+WRITE_CHUNK_EDGES = 1 << 18
+# Output compression by file extension, and the levels used (fast ones: the
+# point is to keep writing large graphs I/O-bound).
+COMPRESSION = {'.gz': 'gzip', '.zst': 'zstd'}
+COMPRESS_LEVEL = {'gzip': 1, 'zstd': 3}
 
+## Input formats
+#
+# `load_graph` picks a reader from the file extension, looked up after any
+# compression extension (`.gz`, `.bz2`, `.xz`, `.zst`); files with another
+# extension are sniffed. Text formats are decompressed while streaming (the
+# codec is detected from the magic bytes), so a `.mtx.gz` never touches disk
+# uncompressed:
+#
+#   mtx       Matrix Market, `%` comments
+#   edgelist  SNAP-style edge list (`.txt`, `.edges`, `.el`, `.tsv`, `.csv`):
+#             one `u v` pair per line, `#` or `%` comments, whitespace or
+#             comma separated; extra columns and a header row are skipped
+#   npy       (m, 2) or (2, m) integer array of endpoints, memory-mapped
+#   npz       arrays `src`/`dst` (or `u`/`v`, `row`/`col`, `source`/`target`,
+#             or one (m, 2) `edges` array), optional `weights` and `node_ids`
+#   parquet   same column names, else the first two columns (needs pyarrow)
+FORMATS = {
+    '.mtx': 'mtx', '.txt': 'edgelist', '.edges': 'edgelist', '.el': 'edgelist',
+    '.tsv': 'edgelist', '.csv': 'edgelist', '.npy': 'npy', '.npz': 'npz', '.parquet': 'parquet',
+}
+COMPRESSED_EXTENSIONS = ('.gz', '.bz2', '.xz', '.zst')
+_DECOMPRESSORS = ((b'\x1f\x8b', gzip.open), (b'BZh', bz2.open), (b'\xfd7zXZ\x00', lzma.open))
+_ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+_BINARY_MAGIC = ((b'\x93NUMPY', 'npy'), (b'PK\x03\x04', 'npz'), (b'PAR1', 'parquet'))
+_EDGE_COLUMNS = (('src', 'dst'), ('u', 'v'), ('row', 'col'), ('source', 'target'))
+
+
+def split_extensions(file_path):
+    """(base, format extension, compression extension) of a path; missing ones are ''."""
+    base, compression = os.path.splitext(file_path)
+    if compression.lower() not in COMPRESSED_EXTENSIONS:
+        base, compression = file_path, ''
+    stem, ext = os.path.splitext(base)
+    return stem, ext, compression
+
+
+def base_name(file_path):
+    """File name without its format and compression extensions."""
+    return split_extensions(os.path.basename(file_path))[0]
+
+
+def _magic(file_path, size=8):
+    with open(file_path, 'rb') as fh:
+        return fh.read(size)
+
+
+def open_text(file_path):
+    """Open a text file for reading, decompressing gzip/bz2/xz/zstd on the fly."""
+    magic = _magic(file_path)
+    for prefix, opener in _DECOMPRESSORS:
+        if magic.startswith(prefix):
+            return opener(file_path, 'rt', encoding='utf-8')
+    if magic.startswith(_ZSTD_MAGIC):
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("zstd input needs the 'zstandard' package (pip install zstandard)") from None
+        raw = zstandard.ZstdDecompressor().stream_reader(open(file_path, 'rb'), closefd=True)
+        return io.TextIOWrapper(raw, encoding='utf-8')
+    return open(file_path, encoding='utf-8')
+
+
+def detect_format(file_path):
+    """Name of the reader for `file_path` (a key of `_READERS`)."""
+    ext = split_extensions(file_path)[1].lower()
+    if ext in FORMATS:
+        return FORMATS[ext]
+    magic = _magic(file_path)
+    for prefix, name in _BINARY_MAGIC:
+        if magic.startswith(prefix):
+            return name
+    with open_text(file_path) as fh:
+        first = next((line.strip() for line in fh if line.strip()), '')
+    return 'edgelist' if first.startswith('#') else 'mtx'
+
+
+def _read_header(fh):
+    """Consume the banner, comments and size line of an open .mtx file.
+
+    Returns a dict with `field`, `symmetry` and (when present) `rows`,
+    `cols`, `nnz`. Files without a `%%MatrixMarket` banner are treated as
+    `coordinate pattern general`.
+    """
+    header = {'field': 'pattern', 'symmetry': 'general'}
+    for line in fh:
+        s = line.strip()
+        if s.startswith('%%MatrixMarket'):
+            parts = s.lower().split()
+            if len(parts) >= 5:
+                header['field'] = parts[3]
+                header['symmetry'] = parts[4]
+            continue
+        if not s or s.startswith('%'):
+            continue
+        rows, cols, nnz = map(int, s.split()[:3])
+        header.update(rows=rows, cols=cols, nnz=nnz)
+        break
+    return header
+
+
+def _iter_blocks(fh, chunk_bytes):
+    """Yield blocks of whole lines (each ending on a newline) from `fh`."""
+    tail = ''
+    while True:
+        block = fh.read(chunk_bytes)
+        if not block:
+            break
+        block = tail + block
+        cut = block.rfind('\n')
+        if cut < 0:
+            tail = block
+            continue
+        tail = block[cut + 1:]
+        yield block[:cut + 1]
+    if tail.strip():
+        yield tail
+
+
+def load_graph(file_path, chunk_bytes=CHUNK_BYTES, use_cache=None):
+    """Stream a Matrix Market (.mtx) edge list, or another supported edge
+    file (see `FORMATS`), into a `CSRGraph`.
+
+    The body is parsed in blocks of `chunk_bytes` straight into NumPy arrays,
+    so no per-line Python objects are created. Node labels are kept exactly as
+    written in the file (MTX is 1-based, but a 0 label is accepted too) and the
+    CSR core uses compact 0..n-1 indices internally. Symmetric and general
+    headers are both read as an undirected graph; reversed duplicates collapse
+    into a single edge. A third column (weight) is kept as `graph.weights`
+    unless the matrix is a `pattern` matrix.
+
+    Compressed text files are decompressed while streaming; `.npy` edge
+    arrays are memory-mapped rather than read.
+
+    Parsed graphs are kept in the binary cache (`scripts/core/cache.py`) and
+    memory-mapped on later loads of the same unchanged file. `use_cache`
+    overrides the `NETGUC_CACHE` environment switch. The first (uncached)
+    load always builds the whole graph in memory, so the out-of-core memory
+    budget (`scripts/core/external.py`) only applies from the second load on.
+    """
+    if use_cache is None:
+        use_cache = cache.enabled()
+    if use_cache:
+        with telemetry.span("cache load"):
+            graph = cache.load(file_path)
+        if graph is not None:
+            return graph
+
+    with telemetry.span("parse"):
+        graph = _READERS[detect_format(file_path)](file_path, chunk_bytes)
+    telemetry.count("edges read", graph.number_of_edges())
+    if use_cache:
+        cache.store(file_path, graph)
+    return graph
+
+
+def _parse_mtx(file_path, chunk_bytes):
+    with open_text(file_path) as fh:
+        header = _read_header(fh)
+        label_dtype = index_dtype(max(header.get('rows', 0), header.get('cols', 0)) + 1)
+
+        us, vs, ws = [], [], []
+        ncols = None
+        progress.start("edges read", header.get('nnz'))
+        for block in _iter_blocks(fh, chunk_bytes):
+            if ncols is None:
+                first = next((l for l in io.StringIO(block) if l.strip() and not l.lstrip().startswith('%')), None)
+                if first is None:
+                    continue
+                ncols = len(first.split())
+            weighted = ncols >= 3 and header['field'] != 'pattern'
+            data = np.loadtxt(
+                io.StringIO(block),
+                dtype=np.float64 if weighted else np.int64,
+                comments='%',
+                usecols=(0, 1, 2) if weighted else (0, 1),
+                ndmin=2,
+            )
+            progress.advance("edges read", len(data))
+            us.append(data[:, 0].astype(label_dtype))
+            vs.append(data[:, 1].astype(label_dtype))
+            if weighted:
+                ws.append(data[:, 2])
+
+    u = np.concatenate(us) if us else np.empty(0, dtype=label_dtype)
+    v = np.concatenate(vs) if vs else np.empty(0, dtype=label_dtype)
+    w = np.concatenate(ws) if ws else None
+
+    meta = dict(header, format='mtx', source=os.path.abspath(file_path))
+    return CSRGraph.from_labels(u, v, weights=w, meta=meta)
+
+
+def _is_number(token):
+    try:
+        float(token)
+    except ValueError:
+        return False
+    return True
+
+
+def _parse_edgelist(file_path, chunk_bytes):
+    delimiter = ',' if split_extensions(file_path)[1].lower() == '.csv' else None
+    us, vs = [], []
+    progress.start("edges read")
+    with open_text(file_path) as fh:
+        header = None
+        for block in _iter_blocks(fh, chunk_bytes):
+            if header is None:
+                lines = io.StringIO(block)
+                first = next((l for l in lines if l.strip() and l.lstrip()[0] not in '#%'), None)
+                if first is None:
+                    continue
+                # a header row ("FromNodeId ToNodeId", "src,dst") is skipped
+                header = not all(_is_number(t) for t in first.replace(',', ' ').split()[:2])
+                if header:
+                    block = block[block.index(first) + len(first):]
+            data = np.loadtxt(io.StringIO(block), dtype=np.int64, comments=('#', '%'),
+                              delimiter=delimiter, usecols=(0, 1), ndmin=2)
+            progress.advance("edges read", len(data))
+            us.append(data[:, 0])
+            vs.append(data[:, 1])
+
+    u = np.concatenate(us) if us else np.empty(0, dtype=np.int64)
+    v = np.concatenate(vs) if vs else np.empty(0, dtype=np.int64)
+    top = max(int(u.max()), int(v.max())) if len(u) else 0
+    dtype = index_dtype(top + 1) if not len(u) or min(int(u.min()), int(v.min())) >= 0 else np.int64
+    meta = {'format': 'edgelist', 'source': os.path.abspath(file_path)}
+    return CSRGraph.from_labels(u.astype(dtype), v.astype(dtype), meta=meta)
+
+
+def _edge_columns(names):
+    for pair in _EDGE_COLUMNS:
+        if all(name in names for name in pair):
+            return pair
+    return None
+
+
+def _endpoints(edges, file_path):
+    if edges.ndim != 2 or 2 not in edges.shape:
+        raise ValueError(f"{file_path}: expected an (m, 2) or (2, m) edge array, got shape {edges.shape}")
+    return (edges[:, 0], edges[:, 1]) if edges.shape[1] == 2 else (edges[0], edges[1])
+
+
+def _read_npy(file_path, chunk_bytes=None):
+    u, v = _endpoints(np.load(file_path, mmap_mode='r'), file_path)
+    meta = {'format': 'npy', 'source': os.path.abspath(file_path)}
+    return CSRGraph.from_labels(u, v, meta=meta)
+
+
+def _read_npz(file_path, chunk_bytes=None):
+    with np.load(file_path) as data:
+        names = set(data.files)
+        pair = _edge_columns(names)
+        if pair is not None:
+            u, v = data[pair[0]], data[pair[1]]
+        elif 'edges' in names or len(names) == 1:
+            u, v = _endpoints(data['edges' if 'edges' in names else data.files[0]], file_path)
+        else:
+            raise ValueError(f"{file_path}: no edge arrays among {sorted(names)}")
+        weights = next((data[key] for key in ('weights', 'weight') if key in names), None)
+        node_ids = np.sort(data['node_ids']) if 'node_ids' in names else None
+    meta = {'format': 'npz', 'source': os.path.abspath(file_path)}
+    return CSRGraph.from_labels(u, v, weights=weights, node_ids=node_ids, meta=meta)
+
+
+def _read_parquet(file_path, chunk_bytes=None):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet input needs the 'pyarrow' package (pip install pyarrow)") from None
+    names = pq.read_schema(file_path).names
+    pair = _edge_columns(names) or tuple(names[:2])
+    weight = next((key for key in ('weights', 'weight') if key in names), None)
+    table = pq.read_table(file_path, columns=list(pair) + ([weight] if weight else []))
+    u, v = (table.column(name).to_numpy() for name in pair)
+    weights = table.column(weight).to_numpy() if weight else None
+    meta = {'format': 'parquet', 'source': os.path.abspath(file_path)}
+    return CSRGraph.from_labels(u, v, weights=weights, meta=meta)
+
+
+_READERS = {
+    'mtx': _parse_mtx, 'edgelist': _parse_edgelist,
+    'npy': _read_npy, 'npz': _read_npz, 'parquet': _read_parquet,
+}
+
+
+def mapping_path(out_path):
+    """Path of the node-mapping sidecar of an .mtx file: `<base>.nodes.npy`."""
+    return split_extensions(out_path)[0] + '.nodes.npy'
+
+
+def load_node_mapping(out_path):
+    """Original labels of the nodes of a remapped .mtx file (entry i is node i + 1)."""
+    return np.load(mapping_path(out_path))
+
+
+def permutation_dir():
+    """Directory for relabeling keys from NETGUC_PERMUTATION_DIR, or None.
+
+    A relabeling key maps the input's nodes to the anonymized ones, so it
+    undoes the anonymization: keys are only written when this is set, and
+    never next to the output they belong to.
+    """
+    value = os.environ.get('NETGUC_PERMUTATION_DIR', '').strip()
+    return os.path.abspath(value) if value else None
+
+
+def permutation_path(out_path, directory):
+    """Path of the relabeling key of an .mtx file: `<directory>/<base>.perm.npy`."""
+    return os.path.join(directory, os.path.basename(split_extensions(out_path)[0]) + '.perm.npy')
+
+
+def load_permutation(out_path, directory):
+    """New node IDs of a relabeled .mtx file (entry i is the new ID of the
+    input's i-th node by label)."""
+    return np.load(permutation_path(out_path, directory))
+
+
+def _open_output(out_path, compression):
+    if compression is None:
+        return open(out_path, 'wb')
+    if compression == 'gzip':
+        return gzip.open(out_path, 'wb', compresslevel=COMPRESS_LEVEL['gzip'])
+    if compression == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("zstd output needs the 'zstandard' package (pip install zstandard)") from None
+        cctx = zstandard.ZstdCompressor(level=COMPRESS_LEVEL['zstd'])
+        return cctx.stream_writer(open(out_path, 'wb'), closefd=True)
+    raise ValueError(f"unknown compression: {compression!r}")
+
+
+def _edge_arrays(G):
+    """(labels, u, v) of a CSRGraph or NetworkX graph: node labels in node
+    order and the 0-based node positions of every edge's endpoints."""
+    if isinstance(G, CSRGraph):
+        return G.node_ids, G.src, G.dst
+    labels = list(G.nodes())
+    position = {node: i for i, node in enumerate(labels)}
+    m = G.number_of_edges()
+    u = np.fromiter((position[a] for a, _ in G.edges()), dtype=np.int64, count=m)
+    v = np.fromiter((position[b] for _, b in G.edges()), dtype=np.int64, count=m)
+    return labels, u, v
+
+
+def _write_edges(fh, u, v):
+    """Write `u v` lines in chunks of WRITE_CHUNK_EDGES, formatted in C."""
+    for start in range(0, len(u), WRITE_CHUNK_EDGES):
+        stop = min(start + WRITE_CHUNK_EDGES, len(u))
+        pairs = np.empty(2 * (stop - start), dtype=np.int64)
+        pairs[0::2] = u[start:stop]
+        pairs[1::2] = v[start:stop]
+        fh.write((b'%d %d\n' * (stop - start)) % tuple(pairs.tolist()))
+
+
+def save_graph_as_mtx(G, out_path=None, comment=None, remap_to_one_based=True, compression=None):
+    """Save a graph to Matrix Market (.mtx) coordinate format.
+
+        - `G` is a `CSRGraph` or a NetworkX graph.
         - By default (`remap_to_one_based=True`) nodes are remapped to 1..n in the
-            output file to match typical MTX files. If `remap_to_one_based=False`,
-            the node labels from `G.nodes()` are written verbatim (they must be
-            integers to be written directly).
+            output file to match typical MTX files, and the original labels are
+            saved next to it in a `.npy` sidecar (see `mapping_path`,
+            `load_node_mapping`). If `remap_to_one_based=False`, the node labels
+            are written verbatim (they must be integers to be written directly).
         - Writes a symmetric `pattern` matrix for undirected graphs (one entry per edge).
+        - Edges are formatted in large chunks and written as bytes.
 
     Parameters:
-    - G: networkx.Graph-like object with integer or hashable node labels.
+    - G: CSRGraph or networkx.Graph-like object with integer or hashable node labels.
     - out_path: destination path. If None, raises ValueError.
     - comment: optional comment string written as a `%` line.
+    - compression: None, 'gzip' or 'zstd' (needs the `zstandard` package);
+      by default taken from the extension (`.gz`, `.zst`).
 
     Returns the path written.
     """
     if out_path is None:
         raise ValueError("out_path must be provided")
 
-    nodes = list(G.nodes())
+    labels, u, v = _edge_arrays(G)
+    m = len(u)
 
     if remap_to_one_based:
-        # Build a deterministic mapping of nodes -> 1..n
-        mapping = {node: i + 1 for i, node in enumerate(nodes)}
-        n = len(nodes)
-
-        # For undirected graphs, write each edge once. Preserve the edge order from G.edges().
-        edges = []
-        for u, v in G.edges():
-            uu = mapping[u]
-            vv = mapping[v]
-            edges.append((uu, vv))
-
-        m = len(edges)
+        n = len(labels)
+        u, v = u + 1, v + 1
     else:
         # Use node labels as-is. They must be integers for MTX coordinate format.
         try:
-            int_nodes = [int(n) for n in nodes]
-        except Exception:
+            labels = np.asarray(labels, dtype=np.int64)
+        except (TypeError, ValueError):
             raise ValueError("All node labels must be integers when remap_to_one_based=False")
-        n = max(int_nodes) if int_nodes else 0
+        n = int(labels.max()) if len(labels) else 0
+        u, v = labels[u], labels[v]
 
-        # Write edges using original labels
-        edges = []
-        for u, v in G.edges():
-            edges.append((int(u), int(v)))
+    sidecar = mapping_path(out_path) if remap_to_one_based else None
+    lines = [f"node_mapping: {os.path.basename(sidecar)} (entry i is the original label of node i+1)"] if sidecar else []
+    write_mtx(out_path, n, m, [(np.asarray(u), np.asarray(v))], comment, compression, lines)
+    if sidecar:
+        mapping = np.asarray(labels)
+        if mapping.dtype == object:
+            mapping = mapping.astype(str)
+        np.save(sidecar, mapping)
+    return out_path
 
-        m = len(edges)
 
+@telemetry.timed("write")
+def write_mtx(out_path, n, m, chunks, comment=None, compression=None, comments=()):
+    """Write a symmetric pattern .mtx of `m` edges among labels 1..n from
+    `chunks`, an iterable of (u, v) label arrays (e.g. streamed from disk).
+
+    `compression` is as in `save_graph_as_mtx`; `comments` are extra `%`
+    lines after `comment`. Returns the path written.
+    """
+    if compression is None:
+        compression = COMPRESSION.get(os.path.splitext(out_path)[1])
     # Ensure directory exists
     os.makedirs(os.path.dirname(os.path.abspath(out_path)) or '.', exist_ok=True)
 
-    with open(out_path, 'w', encoding='utf-8') as fh:
-        fh.write('%%MatrixMarket matrix coordinate pattern symmetric\n')
-        if comment:
-            fh.write(f"% {comment}\n")
-        if remap_to_one_based:
-            fh.write(f"% node_mapping: original_label->new_label (1-based)\n")
-            # optionally include mapping details
-            for orig, new in mapping.items():
-                fh.write(f"% {orig} -> {new}\n")
-            fh.write(f"{n} {n} {m}\n")
-            for u, v in edges:
-                fh.write(f"{u} {v}\n")
-        else:
-            fh.write(f"{n} {n} {m}\n")
-            for u, v in edges:
-                fh.write(f"{u} {v}\n")
+    lines = ['%%MatrixMarket matrix coordinate pattern symmetric']
+    lines += [f"% {line}" for line in ([comment] if comment else []) + list(comments)]
+    lines.append(f"{n} {n} {m}")
+
+    with _open_output(out_path, compression) as fh:
+        fh.write(('\n'.join(lines) + '\n').encode('utf-8'))
+        for u, v in chunks:
+            _write_edges(fh, u, v)
 
     return out_path
@@ -0,0 +1,45 @@
+import json
+import os
+from scripts.core import verify
+from scripts.utils.util_mtx import base_name, load_graph
+
+# Registry metadata, read without importing this file (scripts/core/registry.py)
+SCRIPT = {"category": "Utilities", "outputs_graph": False, "description": "Structural-integrity checks of an anonymized output"}
+
+def run(file_path, k, original=None):
+    """
+    Check the structural integrity of an anonymized output against the
+    chain's input file (`original`, filled in by the chain runner): a simple
+    graph, a .mtx body matching its size line, and the invariants of the
+    anonymizer named in the file's comment (see `scripts/core/verify.py`).
+    The report is saved as JSON next to the input file; the stage fails if
+    any check does.
+    """
+
+    # The file is read as written, not from the binary cache
+    graph = load_graph(file_path, use_cache=False)
+    if original is None or os.path.abspath(original) == os.path.abspath(file_path):
+        print("No anonymization ran before this step; checking the file on its own.")
+        base_graph, script = graph, None
+    else:
+        base_graph, script = load_graph(original), verify.producer(file_path)
+
+    report = verify.verify(base_graph, graph, script, file_path=file_path)
+    report["original_file"] = original or file_path
+    report["anonymized_file"] = file_path
+    for line in verify.format_report(report):
+        print(line)
+
+    # Save the report next to the checked file
+    try:
+        base = base_name(file_path)
+        out_path = os.path.join(os.path.dirname(file_path), f"{base}_verification.json")
+        with open(out_path, "w") as fh:
+            json.dump(report, fh, indent=2)
+        print(f"Saved verification report to: {out_path}")
+    except Exception as e:
+        print(f"Failed to save report: {e}")
+
+    if not report["ok"]:
+        failed = [c["name"] for c in report["checks"] if not c["ok"]]
+        raise RuntimeError(f"integrity check(s) failed: {', '.join(failed)}")
@@ -0,0 +1,18 @@
+import os
+import sys
+
+import pytest
+
+# Tests import the package as `scripts.*`, like main.py and cli.py do.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+
+@pytest.fixture(autouse=True)
+def _isolated(tmp_path, monkeypatch):
+    # keep the graph cache and scratch files in the test's directory, and
+    # every figure off-screen
+    monkeypatch.setenv("NETGUC_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setenv("NETGUC_SCRATCH_DIR", str(tmp_path / "scratch"))
+    monkeypatch.setenv("NETGUC_RENDER", "off")
+    monkeypatch.delenv("NETGUC_PERMUTATION_DIR", raising=False)
@@ -16,5 +16,12 @@
 # make sure to import networkx as nx in the test file
 # If you can think of any other ways to check the pipeline integrity, please add them here.
 
-
-
+# These checks are implemented without NetworkX in scripts/core/verify.py and run as
+# the util_verify pipeline stage (and in the benchmark suite's verify stage):
+#  -- degree sequence equality for the switch and naive anonymizers, edge count preservation,
+#     no self loops or duplicate edges, a .mtx body matching its size line, and a
+#     round trip through a temporary file
+#  -- isomorphism of the naive anonymization through its relabeling key (NETGUC_PERMUTATION_DIR) or the
+#     canonical relabeling, with Weisfeiler-Lehman colour refinement as the fallback
+# The pytest files next to this one (test_*.py) exercise these checks and the core modules;
+# run them with `python -m pytest testing` from the repository root.
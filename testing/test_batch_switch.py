@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from scripts.anonymization import random_add_delete
+from scripts.core.batch_switch import _contains, _first_owner, batch_switch
+from scripts.core.graph import CSRGraph
+
+
+def _graph(seed, n=60, m=240):
+    u, v = np.random.default_rng(seed).integers(0, n, size=(2, m))
+    keep = u != v
+    return CSRGraph.from_labels(u[keep], v[keep], node_ids=np.arange(n))
+
+
+def _assert_simple_with_same_degrees(graph, src, dst):
+    keys = np.sort(np.minimum(src, dst) * graph.number_of_nodes() + np.maximum(src, dst))
+    assert np.all(src != dst)
+    assert np.all(keys[1:] != keys[:-1])
+    degree = np.bincount(np.concatenate([src, dst]), minlength=graph.number_of_nodes())
+    assert np.array_equal(degree, graph.degree())
+
+
+@pytest.mark.parametrize("batch_size", [1, 16, 256])
+def test_batches_keep_a_simple_graph_with_the_degree_sequence(batch_size):
+    graph = _graph(0)
+    src, dst, stats = batch_switch(graph.src, graph.dst, graph.number_of_nodes(), 3000,
+                                   np.random.default_rng(1), batch_size=batch_size)
+    _assert_simple_with_same_degrees(graph, src, dst)
+    assert stats["attempted"] == 3000
+    assert stats["accepted"] + stats["invalid"] + stats["existing"] + stats["conflict"] == 3000
+    assert stats["accepted"] > 0
+    assert stats["acceptance_rate"] == stats["accepted"] / 3000
+    if batch_size == 1:
+        assert stats["conflict"] == 0
+
+
+def test_inputs_are_not_modified():
+    graph = _graph(1)
+    src, dst = graph.src.copy(), graph.dst.copy()
+    batch_switch(graph.src, graph.dst, graph.number_of_nodes(), 500, np.random.default_rng(0))
+    assert np.array_equal(graph.src, src) and np.array_equal(graph.dst, dst)
+
+
+def test_worker_generators_give_reproducible_results():
+    graph = _graph(2)
+    runs = [batch_switch(graph.src, graph.dst, graph.number_of_nodes(), 2000,
+                         [np.random.default_rng(s) for s in (3, 4)], batch_size=64)
+            for _ in range(2)]
+    assert np.array_equal(runs[0][0], runs[1][0]) and np.array_equal(runs[0][1], runs[1][1])
+    _assert_simple_with_same_degrees(graph, runs[0][0], runs[0][1])
+
+
+def test_first_owner_picks_the_earliest_candidate():
+    # values are shared across both columns: candidate 1's first value (1) is
+    # candidate 0's second
+    first, second = _first_owner(np.array([5, 1, 5, 2]), np.array([1, 7, 9, 2]))
+    assert first.tolist() == [0, 0, 0, 3]
+    assert second.tolist() == [0, 1, 2, 3]
+
+
+def test_contains():
+    keys = np.array([2, 5, 9])
+    assert _contains(keys, np.array([9, 0, 5, 10, 2])).tolist() == [True, False, True, False, True]
+
+
+@pytest.mark.parametrize("mode", ["sequential", "batch"])
+def test_random_add_delete_modes(mode):
+    graph = _graph(3)
+    out, stats = random_add_delete.anonymize(graph, 1000, mode=mode, seed=5)
+    assert out.node_ids.tolist() == graph.node_ids.tolist()
+    _assert_simple_with_same_degrees(graph, np.asarray(out.src), np.asarray(out.dst))
+    again, _ = random_add_delete.anonymize(graph, 1000, mode=mode, seed=5)
+    assert np.array_equal(out.edge_keys(), again.edge_keys())
+
+
+def test_batch_engine_is_opt_in(monkeypatch):
+    graph = _graph(4)
+    # neither a large k nor several workers switch engines on their own
+    _, stats = random_add_delete.anonymize(graph, 200_000, seed=0, workers=2)
+    assert "conflict" not in stats
+    monkeypatch.setenv("NETGUC_SWITCH_MODE", "batch")
+    _, stats = random_add_delete.anonymize(graph, 1000, seed=0)
+    assert "conflict" in stats
+    monkeypatch.setenv("NETGUC_SWITCH_MODE", "auto")
+    with pytest.raises(ValueError):
+        random_add_delete.anonymize(graph, 1000, seed=0)
@@ -0,0 +1,57 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from scripts.core import betweenness
+from scripts.core.graph import CSRGraph
+
+
+def _graphs():
+    disconnected = nx.disjoint_union(nx.cycle_graph(7), nx.star_graph(5))
+    disconnected.add_nodes_from([100, 101])
+    return {
+        "karate": nx.karate_club_graph(),
+        "path": nx.path_graph(9),
+        "grid": nx.grid_2d_graph(5, 6),
+        "disconnected": disconnected,
+        "gnp": nx.gnp_random_graph(80, 0.05, seed=3),
+    }
+
+
+def _csr(G):
+    """The CSRGraph of G; node i is the i-th node of sorted(G)."""
+    nodes = sorted(G)
+    index = {node: i for i, node in enumerate(nodes)}
+    u, v = zip(*((index[a], index[b]) for a, b in G.edges()))
+    return CSRGraph.from_labels(np.array(u), np.array(v), node_ids=np.arange(len(nodes))), nodes
+
+
+@pytest.mark.parametrize("name", sorted(_graphs()))
+def test_exact_matches_networkx(name):
+    G = _graphs()[name]
+    graph, nodes = _csr(G)
+    expected = nx.betweenness_centrality(G, normalized=True)
+    np.testing.assert_allclose(betweenness.exact(graph), [expected[v] for v in nodes], atol=1e-12)
+
+
+def test_exact_is_the_same_with_workers():
+    graph, _ = _csr(_graphs()["gnp"])
+    np.testing.assert_allclose(betweenness.exact(graph, workers=3), betweenness.exact(graph), atol=1e-12)
+
+
+@pytest.mark.parametrize("name", ["karate", "grid", "gnp"])
+def test_approximate_is_within_epsilon(name):
+    graph, _ = _csr(_graphs()[name])
+    exact = betweenness.exact(graph)
+    values, info = betweenness.approximate(graph, epsilon=0.05, delta=0.1, seed=7)
+    assert info["samples"] == betweenness.sample_size(info["vertex_diameter"], 0.05, 0.1)
+    n = graph.number_of_nodes()
+    assert info["epsilon"] == pytest.approx(0.05 * n / (n - 2))
+    assert np.abs(values - exact).max() <= info["epsilon"]
+
+
+def test_approximate_is_reproducible():
+    graph, _ = _csr(_graphs()["gnp"])
+    a, _ = betweenness.approximate(graph, epsilon=0.1, seed=11)
+    b, _ = betweenness.approximate(graph, epsilon=0.1, seed=11)
+    np.testing.assert_array_equal(a, b)
@@ -0,0 +1,85 @@
+import os
+
+import numpy as np
+
+from scripts.core import cache
+from scripts.core.graph import CSRGraph
+from scripts.utils.util_mtx import load_graph, save_graph_as_mtx
+
+
+def _write(path, seed, m=200, top=40):
+    u, v = np.random.default_rng(seed).integers(1, top + 1, size=(2, m))
+    save_graph_as_mtx(CSRGraph.from_labels(u, v), str(path), remap_to_one_based=False)
+    return str(path)
+
+
+def _entries():
+    return sorted(name for name in os.listdir(cache.cache_dir()) if name.endswith(".csr"))
+
+
+def test_store_and_load_round_trip(tmp_path):
+    path = _write(tmp_path / "g.mtx", 0)
+    graph = load_graph(path, use_cache=False)
+    entry = cache.store(path, graph)
+    assert entry == cache.entry_path(path) and os.path.exists(entry)
+    loaded = cache.load(path)
+    for name in ("node_ids", "src", "dst", "indptr", "indices"):
+        assert np.array_equal(getattr(loaded, name), getattr(graph, name))
+    assert loaded.meta["format"] == "mtx"
+
+
+def test_eviction_drops_least_recently_used_entries(tmp_path):
+    paths = [_write(tmp_path / f"g{i}.mtx", i) for i in range(3)]
+    for i, path in enumerate(paths):
+        cache.store(path, load_graph(path, use_cache=False))
+        # distinct, increasing use times: g0 oldest, g2 newest
+        os.utime(cache.entry_path(path), (1e9 + i, 1e9 + i))
+    assert len(_entries()) == 3
+
+    # a cache hit marks g0 as the most recently used entry
+    assert cache.load(paths[0]) is not None
+    size = os.path.getsize(cache.entry_path(paths[0]))
+    cache.evict(limit=2 * size + size // 2)
+    assert cache.load(paths[1]) is None
+    assert cache.load(paths[0]) is not None and cache.load(paths[2]) is not None
+
+
+def test_size_limit_is_enforced_on_store_but_keeps_the_new_entry(tmp_path, monkeypatch):
+    monkeypatch.setenv("NETGUC_CACHE_MAX_BYTES", "1")
+    first, second = _write(tmp_path / "a.mtx", 1), _write(tmp_path / "b.mtx", 2)
+    load_graph(first)
+    load_graph(second)
+    assert _entries() == [os.path.basename(cache.entry_path(second))]
+
+
+def test_changed_source_invalidates_the_entry(tmp_path):
+    path = _write(tmp_path / "g.mtx", 3)
+    before = load_graph(path)
+    assert isinstance(load_graph(path).src, np.memmap)
+
+    with open(path, "a") as fh:
+        fh.write("1 41\n")
+    after = load_graph(path)
+    assert not isinstance(after.src, np.memmap)
+    assert 41 in after.node_ids.tolist() and 41 not in before.node_ids.tolist()
+
+
+def test_same_size_edit_with_restored_mtime_is_a_miss(tmp_path):
+    path = tmp_path / "g.mtx"
+    path.write_text("%%MatrixMarket matrix coordinate pattern symmetric\n3 3 2\n1 2\n2 3\n")
+    load_graph(str(path))
+    st = os.stat(path)
+    assert cache.load(str(path)) is not None
+
+    # same size, same mtime: only the content fingerprint tells them apart
+    path.write_text("%%MatrixMarket matrix coordinate pattern symmetric\n3 3 2\n1 3\n2 3\n")
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert cache.load(str(path)) is None
+    u, v = load_graph(str(path)).edge_labels()
+    assert sorted(zip(u.tolist(), v.tolist())) == [(1, 3), (2, 3)]
+
+
+def test_disabled_cache_writes_nothing(tmp_path, monkeypatch):
+    monkeypatch.setenv("NETGUC_CACHE", "0")
+    load_graph(_write(tmp_path / "g.mtx", 4))
+    assert not os.path.exists(cache.cache_dir())
@@ -0,0 +1,83 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from scripts.core import closeness
+from scripts.core.graph import CSRGraph
+
+
+def _graphs():
+    disconnected = nx.disjoint_union(nx.cycle_graph(7), nx.star_graph(5))
+    disconnected.add_nodes_from([100, 101])
+    return {
+        "karate": nx.karate_club_graph(),
+        "path": nx.path_graph(9),
+        "grid": nx.grid_2d_graph(5, 6),
+        "disconnected": disconnected,
+        # more than one 64-source word of BFS
+        "gnp": nx.gnp_random_graph(150, 0.03, seed=3),
+    }
+
+
+def _csr(G):
+    """The CSRGraph of G; node i is the i-th node of sorted(G)."""
+    nodes = sorted(G)
+    index = {node: i for i, node in enumerate(nodes)}
+    u, v = zip(*((index[a], index[b]) for a, b in G.edges()))
+    return CSRGraph.from_labels(np.array(u), np.array(v), node_ids=np.arange(len(nodes))), nodes
+
+
+@pytest.mark.parametrize("name", sorted(_graphs()))
+def test_exact_matches_networkx(name):
+    G = _graphs()[name]
+    graph, nodes = _csr(G)
+    expected = nx.closeness_centrality(G)
+    np.testing.assert_allclose(closeness.exact(graph), [expected[v] for v in nodes], atol=1e-12)
+
+
+@pytest.mark.parametrize("name", sorted(_graphs()))
+def test_exact_harmonic_matches_networkx(name):
+    G = _graphs()[name]
+    graph, nodes = _csr(G)
+    expected = nx.harmonic_centrality(G)
+    values = closeness.exact(graph, harmonic=True) * (len(nodes) - 1)
+    np.testing.assert_allclose(values, [expected[v] for v in nodes], atol=1e-12)
+
+
+def test_exact_is_the_same_with_workers():
+    graph, _ = _csr(_graphs()["gnp"])
+    np.testing.assert_allclose(closeness.exact(graph, workers=3), closeness.exact(graph), atol=1e-12)
+
+
+def _sampled_graph():
+    # large enough that the pivots are fewer than the nodes
+    G = nx.connected_watts_strogatz_graph(400, 6, 0.1, seed=5)
+    G.add_edges_from([(400, 401), (401, 402)])
+    return _csr(G)[0]
+
+
+def test_approximate_harmonic_is_within_epsilon():
+    graph = _sampled_graph()
+    exact = closeness.exact(graph, harmonic=True)
+    values, low, high, info = closeness.approximate(graph, harmonic=True, epsilon=0.2, seed=7)
+    assert info["pivots"] == closeness.sample_size(graph.number_of_nodes(), 0.2, closeness.DELTA)
+    assert info["pivots"] < graph.number_of_nodes()
+    assert np.abs(values - exact).max() <= info["epsilon"]
+    assert np.all((low <= exact) & (exact <= high))
+
+
+def test_approximate_closeness_bounds_hold():
+    graph = _sampled_graph()
+    exact = closeness.exact(graph)
+    values, low, high, info = closeness.approximate(graph, epsilon=0.2, seed=7)
+    assert info["pivots"] < graph.number_of_nodes()
+    assert np.all(low <= values) and np.all(values <= high)
+    assert np.all((low <= exact + 1e-12) & (exact <= high + 1e-12))
+
+
+def test_approximate_falls_back_to_exact_on_small_graphs():
+    graph, _ = _csr(_graphs()["karate"])
+    values, low, high, info = closeness.approximate(graph, epsilon=0.2, seed=7)
+    assert info["epsilon"] == 0.0
+    np.testing.assert_array_equal(values, closeness.exact(graph))
+    np.testing.assert_array_equal(low, high)
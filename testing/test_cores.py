@@ -0,0 +1,52 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from scripts.core import cores
+from scripts.core.graph import CSRGraph
+
+
+def _graphs():
+    disconnected = nx.disjoint_union(nx.complete_graph(6), nx.cycle_graph(5))
+    disconnected.add_nodes_from([100, 101])
+    return {
+        "karate": nx.karate_club_graph(),
+        "path": nx.path_graph(9),
+        "grid": nx.grid_2d_graph(5, 6),
+        "disconnected": disconnected,
+        "powerlaw": nx.barabasi_albert_graph(300, 4, seed=3),
+        "gnp": nx.gnp_random_graph(200, 0.08, seed=3),
+    }
+
+
+def _csr(G):
+    """The CSRGraph of G; node i is the i-th node of sorted(G)."""
+    nodes = sorted(G)
+    index = {node: i for i, node in enumerate(nodes)}
+    u, v = zip(*((index[a], index[b]) for a, b in G.edges()))
+    return CSRGraph.from_labels(np.array(u), np.array(v), node_ids=np.arange(len(nodes))), nodes
+
+
+@pytest.mark.parametrize("name", sorted(_graphs()))
+def test_core_number_matches_networkx(name):
+    G = _graphs()[name]
+    graph, nodes = _csr(G)
+    expected = nx.core_number(G)
+    assert cores.core_number(graph).tolist() == [expected[v] for v in nodes]
+
+
+def test_self_loops_are_ignored():
+    G = nx.karate_club_graph()
+    graph, nodes = _csr(G)
+    looped = graph.with_edges(np.r_[graph.src, [0, 5]], np.r_[graph.dst, [0, 5]])
+    expected = nx.core_number(G)
+    assert cores.core_number(looped).tolist() == [expected[v] for v in nodes]
+
+
+@pytest.mark.parametrize("name", sorted(_graphs()))
+def test_profile_matches_networkx_cores_and_shells(name):
+    G = _graphs()[name]
+    core = cores.core_number(_csr(G)[0])
+    for k, core_size, shell_size in cores.profile(core):
+        assert core_size == nx.k_core(G, k).number_of_nodes()
+        assert shell_size == nx.k_shell(G, k).number_of_nodes()
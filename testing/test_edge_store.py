@@ -0,0 +1,58 @@
+import numpy as np
+
+from scripts.core.edge_store import EdgeStore, switch_edges
+from scripts.core.graph import CSRGraph
+
+
+def _graph(seed, n=40, m=120):
+    u, v = np.random.default_rng(seed).integers(0, n, size=(2, m))
+    keep = u != v
+    return CSRGraph.from_labels(u[keep], v[keep], node_ids=np.arange(n))
+
+
+def _edges(store):
+    src, dst = store.arrays()
+    return {(min(a, b), max(a, b)) for a, b in zip(src.tolist(), dst.tolist())}
+
+
+def _assert_consistent(store):
+    assert len(store.pos) == len(store) == len(_edges(store))
+    for i in range(len(store)):
+        assert store.pos[store.key(*store.edge_at(i))] == i
+
+
+def test_add_remove_and_lookup():
+    store = EdgeStore([0, 1], [1, 2], 5)
+    assert store.has_edge(1, 0) and store.has_edge(2, 1) and not store.has_edge(0, 2)
+    assert store.add(2, 0) and not store.add(0, 2)
+    # removing slot 0 moves the last edge, (2, 0), into it
+    assert store.remove(1, 0) and not store.remove(0, 1)
+    assert store.edge_at(0) == (2, 0)
+    assert store.remove_at(0) == (2, 0)
+    store.replace_at(0, 4, 3)
+    assert _edges(store) == {(3, 4)}
+    _assert_consistent(store)
+
+
+def test_switches_preserve_degrees_and_keep_a_simple_graph():
+    graph = _graph(0)
+    store = EdgeStore(graph.src, graph.dst, graph.number_of_nodes())
+    accepted = switch_edges(store, 2000, np.random.default_rng(1), chunk=100)
+    assert 0 < accepted <= 2000
+    _assert_consistent(store)
+    src, dst = store.arrays()
+    assert np.all(src != dst)
+    out = graph.with_edges(src, dst)
+    assert out.number_of_edges() == graph.number_of_edges()
+    assert np.array_equal(out.degree(), graph.degree())
+    assert _edges(store) != {(a, b) for a, b in zip(graph.src.tolist(), graph.dst.tolist())}
+
+
+def test_switches_are_reproducible():
+    graph = _graph(2)
+    runs = []
+    for _ in range(2):
+        store = EdgeStore(graph.src, graph.dst, graph.number_of_nodes())
+        switch_edges(store, 500, np.random.default_rng(7))
+        runs.append(store.arrays())
+    assert all(np.array_equal(a, b) for a, b in zip(*runs))
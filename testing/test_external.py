@@ -0,0 +1,111 @@
+import numpy as np
+import pytest
+
+from scripts.anonymization import random_add_delete, random_walk
+from scripts.core import external, verify
+from scripts.core.graph import CSRGraph
+from scripts.utils.util_mtx import load_graph, save_graph_as_mtx
+
+# 64 KiB: the smallest chunks, and the delta log merges many times
+BUDGET = 1 << 16
+
+
+def _graph(seed=0, n=3000, m=24000):
+    u, v = np.random.default_rng(seed).integers(1, n + 1, size=(2, m))
+    keep = u != v
+    return CSRGraph.from_labels(u[keep], v[keep])
+
+
+def _dense(n=24):
+    """A complete graph minus a few edges: most walk proposals collide."""
+    u, v = np.triu_indices(n, 1)
+    keep = np.random.default_rng(0).random(len(u)) > 0.05
+    return CSRGraph.from_labels(u[keep] + 1, v[keep] + 1)
+
+
+def _written(path):
+    """The graph in `path`, after checking the file has no duplicate or cut-off entries."""
+    graph = load_graph(str(path), use_cache=False)
+    assert verify.file_consistency(str(path), graph)[0]
+    return graph
+
+
+def _assert_simple(graph):
+    assert not np.any(np.asarray(graph.src) == np.asarray(graph.dst))
+    keys = np.asarray(graph.edge_keys())
+    assert np.all(keys[1:] > keys[:-1])
+
+
+def test_switch_keeps_degrees_across_generations(tmp_path):
+    graph = _graph()
+    out = tmp_path / "s.mtx"
+    stats = external.switch_to_mtx(graph, 30000, str(out), np.random.default_rng(1), budget=BUDGET, batch_size=2048)
+    assert stats["generations"] > 2
+    assert stats["accepted"] > 0
+    written = _written(out)
+    _assert_simple(written)
+    assert written.number_of_edges() == graph.number_of_edges()
+    assert np.array_equal(np.sort(written.degree()), np.sort(graph.degree()))
+    assert written.node_ids.tolist() == graph.node_ids.tolist()
+
+
+@pytest.mark.parametrize("make, k", [(_graph, 3), (_dense, 2), (_dense, 5)])
+def test_walk_keeps_edge_count_and_a_simple_graph(tmp_path, make, k):
+    graph = make()
+    out = tmp_path / "w.mtx"
+    external.walk_to_mtx(graph, k, str(out), np.random.default_rng(2), budget=BUDGET)
+    written = _written(out)
+    _assert_simple(written)
+    assert written.number_of_edges() == graph.number_of_edges()
+
+
+def test_key_ranges_split_the_sort_into_buckets(tmp_path):
+    keys = np.random.default_rng(3).integers(0, 1 << 40, 50000)
+    bounds = external._key_ranges(keys, 8)
+    assert len(bounds) == 8 and bounds == sorted(bounds)
+    with external.Scratch(str(tmp_path)) as scratch:
+        stored = scratch.array("keys", np.int64, len(keys))
+        stored[:] = keys
+        acc_keys, acc_ids, rejected = external._first_proposals(stored, scratch, 4096)
+        unique, first = np.unique(keys, return_index=True)
+        assert np.array_equal(acc_keys, unique) and np.array_equal(acc_ids, first)
+        assert len(rejected) == len(keys) - len(unique)
+
+
+def _runs(tmp_path, monkeypatch, capsys, script, k):
+    path = str(tmp_path / "g.mtx")
+    save_graph_as_mtx(_graph(4, n=400, m=3000), path, remap_to_one_based=False)
+    monkeypatch.setenv("NETGUC_MEMORY_BUDGET", str(BUDGET))
+    outputs = {}
+    for mode in ("off", "on"):
+        monkeypatch.setenv("NETGUC_OUT_OF_CORE", mode)
+        outputs[mode] = _written(script.run(path, k, seed=5))
+        assert ("out of core" in capsys.readouterr().out) == (mode == "on")
+    return load_graph(path), outputs
+
+
+def test_out_of_core_switch_has_the_in_memory_invariants(tmp_path, monkeypatch, capsys):
+    graph, outputs = _runs(tmp_path, monkeypatch, capsys, random_add_delete, 2000)
+    for out in outputs.values():
+        report = verify.verify(graph, out, "random_add_delete")
+        assert report["ok"], verify.format_report(report)
+
+
+def test_out_of_core_walk_has_the_in_memory_invariants(tmp_path, monkeypatch, capsys):
+    graph, outputs = _runs(tmp_path, monkeypatch, capsys, random_walk, 3)
+    assert outputs["on"].number_of_edges() == outputs["off"].number_of_edges() == graph.number_of_edges()
+    for out in outputs.values():
+        report = verify.verify(graph, out, "random_walk")
+        assert report["ok"], verify.format_report(report)
+
+
+def test_enabled_follows_mode_and_budget(monkeypatch):
+    graph = _graph(n=100, m=1000)
+    monkeypatch.setenv("NETGUC_OUT_OF_CORE", "auto")
+    assert external.enabled(graph, budget=1000)
+    assert not external.enabled(graph, budget=1 << 30)
+    monkeypatch.setenv("NETGUC_OUT_OF_CORE", "off")
+    assert not external.enabled(graph, budget=1000)
+    monkeypatch.setenv("NETGUC_OUT_OF_CORE", "sometimes")
+    with pytest.raises(ValueError):
+        external.mode()
@@ -0,0 +1,139 @@
+import bz2
+import gzip
+import lzma
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from scripts.utils.util_mtx import detect_format, load_graph
+
+# 0..29 in a ring plus chords, and node 40 hanging off node 0
+U = np.r_[np.arange(30), np.arange(0, 30, 3), 0]
+V = np.r_[(np.arange(30) + 1) % 30, (np.arange(0, 30, 3) + 11) % 30, 40]
+
+
+def _expected(u=U, v=V):
+    G = nx.Graph()
+    G.add_edges_from(zip(u.tolist(), v.tolist()))
+    return G
+
+
+def _assert_graph(graph, G, format):
+    assert graph.meta["format"] == format
+    assert graph.node_ids.tolist() == sorted(G.nodes())
+    u, v = graph.edge_labels()
+    assert {frozenset(e) for e in zip(u.tolist(), v.tolist())} == {frozenset(e) for e in G.edges()}
+
+
+def _mtx_text():
+    lines = ["%%MatrixMarket matrix coordinate pattern symmetric", "% ring", "41 41 %d" % len(U)]
+    lines += [f"{a + 1} {b + 1}" for a, b in zip(U, V)]
+    return "\n".join(lines) + "\n"
+
+
+def _snap_text():
+    lines = ["# Directed graph: ring.txt", "# FromNodeId\tToNodeId"]
+    lines += [f"{a}\t{b}" for a, b in zip(U, V)]
+    return "\n".join(lines) + "\n"
+
+
+def _zstd(data):
+    zstandard = pytest.importorskip("zstandard")
+    return zstandard.ZstdCompressor().compress(data)
+
+
+COMPRESSORS = {"": lambda data: data, ".gz": gzip.compress, ".bz2": bz2.compress,
+               ".xz": lzma.compress, ".zst": _zstd}
+
+
+@pytest.mark.parametrize("suffix", sorted(COMPRESSORS))
+def test_mtx_compressed_or_not(tmp_path, suffix):
+    path = tmp_path / ("g.mtx" + suffix)
+    path.write_bytes(COMPRESSORS[suffix](_mtx_text().encode()))
+    graph = load_graph(str(path), chunk_bytes=128, use_cache=False)
+    _assert_graph(graph, _expected(U + 1, V + 1), "mtx")
+
+
+@pytest.mark.parametrize("suffix", sorted(COMPRESSORS))
+def test_snap_edge_list_compressed_or_not(tmp_path, suffix):
+    path = tmp_path / ("g.txt" + suffix)
+    path.write_bytes(COMPRESSORS[suffix](_snap_text().encode()))
+    graph = load_graph(str(path), chunk_bytes=128, use_cache=False)
+    _assert_graph(graph, _expected(), "edgelist")
+
+
+def test_csv_with_header_and_extra_columns(tmp_path):
+    path = tmp_path / "g.csv"
+    path.write_text("src,dst,weight\n" + "".join(f"{a},{b},1.5\n" for a, b in zip(U, V)))
+    _assert_graph(load_graph(str(path), use_cache=False), _expected(), "edgelist")
+
+
+def test_tsv_edge_list(tmp_path):
+    path = tmp_path / "g.tsv"
+    path.write_text("".join(f"{a}\t{b}\n" for a, b in zip(U, V)))
+    _assert_graph(load_graph(str(path), use_cache=False), _expected(), "edgelist")
+
+
+@pytest.mark.parametrize("layout", ["rows", "columns"])
+def test_npy_edge_array(tmp_path, layout):
+    edges = np.stack([U, V], axis=1 if layout == "rows" else 0)
+    path = tmp_path / "g.npy"
+    np.save(path, edges)
+    graph = load_graph(str(path), use_cache=False)
+    _assert_graph(graph, _expected(), "npy")
+
+
+def test_npy_rejects_other_shapes(tmp_path):
+    path = tmp_path / "g.npy"
+    np.save(path, np.arange(12).reshape(3, 4))
+    with pytest.raises(ValueError):
+        load_graph(str(path), use_cache=False)
+
+
+@pytest.mark.parametrize("names", [("src", "dst"), ("u", "v"), ("row", "col"), ("source", "target")])
+def test_npz_named_columns(tmp_path, names):
+    path = tmp_path / "g.npz"
+    np.savez(path, **{names[0]: U, names[1]: V})
+    _assert_graph(load_graph(str(path), use_cache=False), _expected(), "npz")
+
+
+def test_npz_edges_weights_and_isolated_nodes(tmp_path):
+    path = tmp_path / "g.npz"
+    weights = np.arange(len(U), dtype=float)
+    np.savez(path, edges=np.stack([U, V], axis=1), weights=weights, node_ids=np.arange(45)[::-1])
+    graph = load_graph(str(path), use_cache=False)
+    G = _expected()
+    G.add_nodes_from(range(45))
+    _assert_graph(graph, G, "npz")
+    assert graph.number_of_nodes() == 45
+    assert sorted(graph.weights.tolist()) == weights.tolist()
+
+
+def test_parquet_edge_table(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / "g.parquet"
+    pq.write_table(pa.table({"source": U, "target": V, "weight": np.ones(len(U))}), path)
+    graph = load_graph(str(path), use_cache=False)
+    _assert_graph(graph, _expected(), "parquet")
+    assert graph.weights.tolist() == [1.0] * graph.number_of_edges()
+
+
+def test_unknown_extensions_are_sniffed(tmp_path):
+    mtx, snap, npy = tmp_path / "a.data", tmp_path / "b.data", tmp_path / "c.data"
+    mtx.write_bytes(gzip.compress(_mtx_text().encode()))
+    snap.write_text(_snap_text())
+    with open(npy, "wb") as fh:
+        np.save(fh, np.stack([U, V], axis=1))
+    assert [detect_format(str(p)) for p in (mtx, snap, npy)] == ["mtx", "edgelist", "npy"]
+    _assert_graph(load_graph(str(snap), use_cache=False), _expected(), "edgelist")
+
+
+def test_compressed_input_is_cached(tmp_path):
+    path = tmp_path / "g.mtx.gz"
+    path.write_bytes(gzip.compress(_mtx_text().encode()))
+    load_graph(str(path))
+    graph = load_graph(str(path))
+    assert isinstance(graph.src, np.memmap)
+    _assert_graph(graph, _expected(U + 1, V + 1), "mtx")
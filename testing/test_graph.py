@@ -0,0 +1,144 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from scripts.core.graph import CSRGraph, build_csr, connected_components
+from scripts.utils import util_mtx
+from scripts.utils.util_mtx import load_graph, load_node_mapping, save_graph_as_mtx
+
+
+def _random_labels(rng, m, top):
+    u, v = rng.integers(0, top, size=(2, m))
+    return u, v
+
+
+def _networkx(u, v):
+    G = nx.Graph()
+    G.add_edges_from(zip(u.tolist(), v.tolist()))
+    return G
+
+
+def _assert_matches(graph, G):
+    assert graph.node_ids.tolist() == sorted(G.nodes())
+    assert graph.number_of_edges() == G.number_of_edges()
+    u, v = graph.edge_labels()
+    assert {frozenset(e) for e in zip(u.tolist(), v.tolist())} == {frozenset(e) for e in G.edges()}
+    for i, label in enumerate(graph.node_ids.tolist()):
+        nbrs = graph.node_ids[graph.neighbors(i)].tolist()
+        assert nbrs == sorted(G.neighbors(label))
+        assert graph.degree()[i] == len(nbrs)
+
+
+# dense labels go through a lookup table, sparse ones through a binary search
+@pytest.mark.parametrize("scale, offset", [(1, 0), (16661, 10 ** 12)])
+def test_from_labels_matches_networkx(scale, offset):
+    rng = np.random.default_rng(0)
+    u, v = _random_labels(rng, 400, 60)
+    u, v = u * scale + offset, v * scale + offset
+    graph = CSRGraph.from_labels(u, v)
+    _assert_matches(graph, _networkx(u, v))
+    assert graph.number_connected_components() == nx.number_connected_components(_networkx(u, v))
+
+
+def test_edges_are_compact_sorted_and_unique():
+    graph = CSRGraph.from_labels(np.array([5, 3, 3, 9, 5]), np.array([3, 5, 9, 9, 7]))
+    assert graph.node_ids.tolist() == [3, 5, 7, 9]
+    assert np.all(graph.src <= graph.dst)
+    keys = graph.edge_keys()
+    assert np.all(keys[1:] > keys[:-1])
+    # the self loop (9, 9) is stored once in its row
+    assert graph.neighbors(3).tolist() == [0, 3]
+
+
+def test_reversed_duplicates_keep_the_first_weight():
+    graph = CSRGraph.from_labels(np.array([1, 2, 1]), np.array([2, 1, 3]), weights=np.array([0.5, 7.0, 2.0]))
+    assert graph.number_of_edges() == 2
+    assert graph.weights.tolist() == [0.5, 2.0]
+
+
+def test_with_edges_keeps_the_node_set():
+    graph = CSRGraph.from_labels(np.array([10, 20, 30]), np.array([20, 30, 40]))
+    out = graph.with_edges(np.array([0]), np.array([3]))
+    assert out.node_ids.tolist() == graph.node_ids.tolist()
+    assert out.number_of_edges() == 1
+    assert out.degree().tolist() == [1, 0, 0, 1]
+
+
+def test_connected_components_labels():
+    indptr, indices = build_csr(np.array([0, 1, 3, 5]), np.array([1, 2, 4, 5]), 7)
+    labels = connected_components(indptr, indices)
+    assert labels.tolist() == [0, 0, 0, 3, 3, 5, 6]
+
+
+def test_mtx_round_trip_in_small_blocks(tmp_path):
+    rng = np.random.default_rng(1)
+    u, v = _random_labels(rng, 300, 80)
+    u, v = u + 1, v + 1
+    graph = CSRGraph.from_labels(u, v)
+    path = str(tmp_path / "g.mtx")
+    save_graph_as_mtx(graph, path, remap_to_one_based=False)
+    loaded = load_graph(path, chunk_bytes=64, use_cache=False)
+    _assert_matches(loaded, _networkx(u, v))
+
+
+def test_mtx_reader_accepts_general_weighted_files(tmp_path):
+    path = tmp_path / "w.mtx"
+    path.write_text(
+        "%%MatrixMarket matrix coordinate real general\n"
+        "% a comment\n"
+        "4 4 4\n"
+        "1 2 0.5\n"
+        "2 1 9.0\n"
+        "% another comment\n"
+        "3 4 1.5\n"
+        "4 4 2.0\n"
+    )
+    graph = load_graph(str(path), use_cache=False)
+    assert graph.node_ids.tolist() == [1, 2, 3, 4]
+    assert graph.number_of_edges() == 3
+    assert graph.weights.tolist() == [0.5, 1.5, 2.0]
+
+
+def test_cached_load_is_identical(tmp_path):
+    rng = np.random.default_rng(2)
+    u, v = _random_labels(rng, 200, 40)
+    path = str(tmp_path / "g.mtx")
+    save_graph_as_mtx(CSRGraph.from_labels(u + 1, v + 1), path, remap_to_one_based=False)
+    first, second = load_graph(path), load_graph(path)
+    for name in ("node_ids", "src", "dst", "indptr", "indices"):
+        assert np.array_equal(getattr(first, name), getattr(second, name))
+    assert isinstance(second.src, np.memmap)
+
+
+@pytest.mark.parametrize("suffix, magic", [(".mtx.gz", b"\x1f\x8b"), (".mtx.zst", b"\x28\xb5\x2f\xfd")])
+def test_compressed_output_round_trip(tmp_path, monkeypatch, suffix, magic):
+    if suffix == ".mtx.zst":
+        pytest.importorskip("zstandard")
+    # several write chunks per file
+    monkeypatch.setattr(util_mtx, "WRITE_CHUNK_EDGES", 64)
+    rng = np.random.default_rng(3)
+    u, v = _random_labels(rng, 500, 90)
+    u, v = u * 7 + 3, v * 7 + 3
+    graph = CSRGraph.from_labels(u, v)
+    path = str(tmp_path / ("g" + suffix))
+    save_graph_as_mtx(graph, path, comment="compressed")
+    with open(path, "rb") as fh:
+        assert fh.read(len(magic)) == magic
+
+    loaded = load_graph(path, use_cache=False)
+    assert loaded.node_ids.tolist() == list(range(1, graph.number_of_nodes() + 1))
+    mapping = load_node_mapping(path)
+    assert util_mtx.mapping_path(path) == str(tmp_path / "g.nodes.npy")
+    lu, lv = loaded.edge_labels()
+    _assert_matches(CSRGraph.from_labels(mapping[lu - 1], mapping[lv - 1]), _networkx(u, v))
+
+
+def test_explicit_compression_and_unknown_codec(tmp_path):
+    graph = CSRGraph.from_labels(np.array([1, 2]), np.array([2, 3]))
+    path = str(tmp_path / "g.mtx")
+    save_graph_as_mtx(graph, path, remap_to_one_based=False, compression="gzip")
+    with open(path, "rb") as fh:
+        assert fh.read(2) == b"\x1f\x8b"
+    assert load_graph(path, use_cache=False).number_of_edges() == 2
+    with pytest.raises(ValueError):
+        save_graph_as_mtx(graph, str(tmp_path / "h.mtx"), compression="lz4")
@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+from scripts.core import cores, evaluate, incremental
+from scripts.core.graph import CSRGraph
+
+KEYS = ("betweenness", "closeness", "harmonic", "dist_sum", "harm_sum")
+
+
+def _graph(rng, n=60, m=110):
+    u, v = rng.integers(0, n, size=(2, m))
+    keep = u != v
+    return CSRGraph.from_labels(u[keep], v[keep], node_ids=np.arange(n))
+
+
+def _perturb(graph, rng, remove, add):
+    """The graph with `remove` random edges dropped and `add` random non-edges added."""
+    n = graph.number_of_nodes()
+    keep = np.ones(graph.number_of_edges(), dtype=bool)
+    keep[rng.choice(len(keep), size=remove, replace=False)] = False
+    src, dst = list(graph.src[keep]), list(graph.dst[keep])
+    present = set(graph.edge_keys().tolist())
+    while add:
+        a, b = sorted(rng.choice(n, size=2, replace=False).tolist())
+        if a * n + b not in present:
+            present.add(a * n + b)
+            src.append(a)
+            dst.append(b)
+            add -= 1
+    return graph.with_edges(np.array(src), np.array(dst))
+
+
+def _assert_same(updated, full):
+    for key in KEYS:
+        np.testing.assert_allclose(updated[key], full[key], rtol=1e-9, atol=1e-9, err_msg=key)
+    assert np.array_equal(updated["core"], full["core"])
+    assert updated["components"] == full["components"]
+    assert updated["edges"] == full["edges"]
+
+
+@pytest.mark.parametrize("seed", range(8))
+@pytest.mark.parametrize("remove, add", [(1, 0), (0, 1), (3, 3), (8, 2)])
+def test_update_matches_full_recomputation(seed, remove, add):
+    rng = np.random.default_rng(seed)
+    before = _graph(rng)
+    after = _perturb(before, rng, remove, add)
+    values = evaluate.centralities(before, mode="exact")
+    full = evaluate.centralities(after, mode="exact")
+    # max_affected=1 keeps every update incremental, however many sources it touches
+    _assert_same(incremental.update(before, after, values, max_affected=1.0), full)
+    _assert_same(incremental.update(before, after, values), full)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_centralities_with_base_match_full_recomputation(seed):
+    rng = np.random.default_rng(100 + seed)
+    before = _graph(rng, n=80, m=200)
+    after = _perturb(before, rng, 5, 5)
+    values = evaluate.centralities(before, mode="exact")
+    based = evaluate.centralities(after, mode="exact", base=(before, values))
+    _assert_same(based, evaluate.centralities(after, mode="exact"))
+    for k in (1, 2, 5):
+        a, b = evaluate.utilities(based, k), evaluate.utilities(evaluate.centralities(after, mode="exact"), k)
+        for metric in evaluate.METRICS:
+            assert a[metric] == pytest.approx(b[metric]), metric
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_core_numbers_follow_many_edits(seed):
+    rng = np.random.default_rng(200 + seed)
+    before = _graph(rng, n=50, m=150)
+    after = _perturb(before, rng, 20, 20)
+    removed, added = incremental.edge_diff(before, after)
+    core = cores.core_number(before)
+    expected = cores.core_number(after)
+    assert np.array_equal(incremental.update_core_number(before, core, removed, added), expected)
+    assert np.array_equal(incremental.update_core_number(before, core, removed, added, after), expected)
+
+
+def test_edge_diff():
+    rng = np.random.default_rng(0)
+    before = _graph(rng)
+    after = _perturb(before, rng, 4, 6)
+    (ru, rv), (au, av) = incremental.edge_diff(before, after)
+    old = set(zip(before.src.tolist(), before.dst.tolist()))
+    new = set(zip(after.src.tolist(), after.dst.tolist()))
+    assert set(zip(ru.tolist(), rv.tolist())) == old - new
+    assert set(zip(au.tolist(), av.tolist())) == new - old
+    assert len(ru) == 4 and len(au) == 6
+
+
+def test_update_needs_same_nodes():
+    rng = np.random.default_rng(0)
+    before = _graph(rng)
+    other = CSRGraph.from_labels(before.node_ids[before.src] + 1, before.node_ids[before.dst] + 1)
+    assert incremental.update(before, other, evaluate.centralities(before, mode="exact")) is None
@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+
+from scripts.anonymization import naive_anonymization
+from scripts.core import verify
+from scripts.core.verify import read_header
+from scripts.core.graph import CSRGraph
+from scripts.utils.util_mtx import load_graph, load_permutation, save_graph_as_mtx
+
+
+def _input(tmp_path):
+    rng = np.random.default_rng(1)
+    u, v = rng.integers(5, 300, size=(2, 900))
+    keep = u != v
+    path = str(tmp_path / "g.mtx")
+    save_graph_as_mtx(CSRGraph.from_labels(u[keep], v[keep]), path, remap_to_one_based=False)
+    return path
+
+
+@pytest.mark.parametrize("order", naive_anonymization.ORDERS)
+def test_relabeling_maps_input_edges_onto_output(tmp_path, order):
+    graph = load_graph(_input(tmp_path))
+    anon, stats = naive_anonymization.anonymize(graph, order=order, seed=3)
+    ids = stats["ids"]
+    assert np.array_equal(np.sort(ids), np.arange(1, graph.number_of_nodes() + 1))
+    assert verify.permuted_edges(graph, anon, ids)[0]
+
+
+def _checks(path, out):
+    report = verify.verify(load_graph(path), load_graph(out, use_cache=False), verify.producer(out), file_path=out)
+    return report, {c["name"]: c for c in report["checks"]}
+
+
+def test_no_relabeling_key_by_default(tmp_path, monkeypatch):
+    monkeypatch.delenv("NETGUC_NAIVE_ORDER", raising=False)
+    path = _input(tmp_path)
+    out = naive_anonymization.run(path, 1, seed=3)
+    assert not list(tmp_path.rglob("*.perm.npy"))
+    # without the key, verification falls back to WL
+    report, checks = _checks(path, out)
+    assert report["ok"] and "WL-equivalent" in checks["isomorphism"]["detail"]
+
+
+def test_opt_in_key_proves_isomorphism(tmp_path, monkeypatch):
+    monkeypatch.delenv("NETGUC_NAIVE_ORDER", raising=False)
+    keys = tmp_path / "keys"
+    monkeypatch.setenv("NETGUC_PERMUTATION_DIR", str(keys))
+    path = _input(tmp_path)
+    out = naive_anonymization.run(path, 1, seed=3)
+    assert [p.name for p in keys.iterdir()] == ["g_anonymized.perm.npy"]
+    assert not list(tmp_path.glob("*.perm.npy"))
+    report, checks = _checks(path, out)
+    assert report["ok"] and "saved relabeling" in checks["isomorphism"]["detail"]
+
+
+def test_key_is_never_written_next_to_the_output(tmp_path, monkeypatch):
+    monkeypatch.setenv("NETGUC_PERMUTATION_DIR", str(tmp_path))
+    out = naive_anonymization.run(_input(tmp_path), 1, seed=3)
+    assert out is not None
+    assert not list(tmp_path.rglob("*.perm.npy"))
+
+
+def test_tampered_output_fails_under_the_saved_relabeling(tmp_path, monkeypatch):
+    keys = str(tmp_path / "keys")
+    monkeypatch.setenv("NETGUC_PERMUTATION_DIR", keys)
+    path = _input(tmp_path)
+    out = naive_anonymization.run(path, 1, seed=3)
+    graph, anon = load_graph(path), load_graph(out, use_cache=False)
+    # one degree-preserving switch: same degrees, different edges
+    src, dst = np.array(anon.src), np.array(anon.dst)
+    edges = set(zip(src.tolist(), dst.tolist()))
+    for i in range(1, len(src)):
+        a, b, c, d = src[0], dst[0], src[i], dst[i]
+        if len({a, b, c, d}) == 4 and (min(a, d), max(a, d)) not in edges and (min(b, c), max(b, c)) not in edges:
+            dst[0], dst[i] = d, b
+            break
+    else:
+        pytest.fail("no valid switch in the test graph")
+    switched = anon.with_edges(src, dst)
+    ok, detail = verify.isomorphism(graph, switched, permutation=load_permutation(out, keys))
+    assert not ok and "saved relabeling" in detail
+
+
+def test_permutation_must_cover_the_input(tmp_path):
+    graph = load_graph(_input(tmp_path))
+    anon, stats = naive_anonymization.anonymize(graph, order="random", seed=0)
+    ids = stats["ids"].copy()
+    ids[0] = ids[1]
+    assert not verify.permuted_edges(graph, anon, ids)[0]
+    assert not verify.permuted_edges(graph, anon, ids[:-1])[0]
+
+
+@pytest.mark.parametrize("order", naive_anonymization.ORDERS)
+def test_output_is_valid_one_based_matrix_market(tmp_path, monkeypatch, order):
+    monkeypatch.setenv("NETGUC_NAIVE_ORDER", order)
+    path = _input(tmp_path)
+    n = load_graph(path).number_of_nodes()
+    out = naive_anonymization.run(path, 1, seed=3)
+    header = read_header(out)
+    assert header["rows"] == header["cols"] == n
+    written = load_graph(out, use_cache=False)
+    assert written.node_ids.tolist() == list(range(1, n + 1))
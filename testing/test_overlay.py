@@ -0,0 +1,112 @@
+import networkx as nx
+import numpy as np
+
+from scripts.anonymization import random_switch
+from scripts.core.graph import CSRGraph
+from scripts.core.overlay import OverlayGraph
+from scripts.utils.util_mtx import load_graph, save_graph_as_mtx
+
+
+def _graph(seed=0, n=40, m=120):
+    u, v = np.random.default_rng(seed).integers(0, n, size=(2, m))
+    keep = u != v
+    return CSRGraph.from_labels(u[keep], v[keep], node_ids=np.arange(n))
+
+
+def _snapshot(graph):
+    return {name: np.array(getattr(graph, name)) for name in ("node_ids", "src", "dst", "indptr", "indices")}
+
+
+def _assert_unchanged(graph, snapshot):
+    for name, arr in snapshot.items():
+        assert np.array_equal(getattr(graph, name), arr)
+
+
+def _networkx(overlay):
+    G = nx.Graph()
+    G.add_nodes_from(range(overlay.n))
+    G.add_edges_from(zip(*(a.tolist() for a in overlay.arrays())))
+    return G
+
+
+def test_edits_leave_the_base_untouched():
+    graph = _graph()
+    before = _snapshot(graph)
+    overlay = OverlayGraph(graph)
+    u, v = int(graph.src[0]), int(graph.dst[0])
+    assert overlay.remove(u, v)
+    a, b = next((a, b) for a in range(40) for b in range(a + 1, 40) if not overlay.has_edge(a, b))
+    overlay.add(a, b)
+    _assert_unchanged(graph, before)
+    assert overlay.base_has_edge(u, v) and not overlay.has_edge(u, v)
+    assert overlay.has_edge(a, b) and not overlay.base_has_edge(a, b)
+    assert v not in overlay.neighbors(u) and v in graph.neighbors(u).tolist()
+
+
+def test_two_overlays_on_one_base_are_isolated():
+    graph = _graph(1)
+    first, second = OverlayGraph(graph), OverlayGraph(graph)
+    u, v = int(graph.src[3]), int(graph.dst[3])
+    first.remove(u, v)
+    a, b = next((a, b) for a in range(40) for b in range(a + 1, 40) if not first.has_edge(a, b))
+    first.add(a, b)
+    assert second.has_edge(u, v) and not second.has_edge(a, b)
+    assert len(second) == graph.number_of_edges()
+    assert np.array_equal(second.to_graph().edge_keys(), graph.edge_keys())
+
+
+def test_random_edits_match_networkx():
+    graph = _graph(2)
+    overlay = OverlayGraph(graph)
+    G = _networkx(overlay)
+    rng = np.random.default_rng(3)
+    for _ in range(400):
+        a, b = (int(x) for x in rng.integers(0, 40, size=2))
+        if a == b:
+            continue
+        if overlay.has_edge(a, b):
+            assert overlay.remove(a, b)
+            G.remove_edge(a, b)
+        else:
+            assert not overlay.remove(a, b)
+            overlay.add(a, b)
+            G.add_edge(a, b)
+    assert len(overlay) == G.number_of_edges()
+    for node in range(40):
+        assert sorted(overlay.neighbors(node)) == sorted(G.neighbors(node))
+        assert overlay.degree(node) == G.degree(node)
+    out = overlay.to_graph()
+    assert {frozenset(e) for e in zip(out.src.tolist(), out.dst.tolist())} == {frozenset(e) for e in G.edges()}
+
+
+def test_removed_base_edge_comes_back_into_its_slot():
+    graph = _graph(4)
+    overlay = OverlayGraph(graph)
+    u, v = int(graph.src[5]), int(graph.dst[5])
+    overlay.remove(u, v)
+    assert overlay.edge_at(5) is None
+    overlay.add(u, v)
+    assert overlay.edge_at(5) == (u, v)
+    assert overlay.slots() == graph.number_of_edges() and not overlay.removed_nbrs.get(u)
+
+
+def test_random_slot_skips_holes():
+    graph = _graph(5)
+    overlay = OverlayGraph(graph)
+    for i in range(0, graph.number_of_edges(), 2):
+        overlay.remove_at(i)
+    uniform = iter(np.random.default_rng(6).random(10000).tolist())
+    assert all(overlay.random_slot(uniform) % 2 for _ in range(200))
+
+
+def test_add_delete_does_not_modify_a_memory_mapped_input(tmp_path):
+    path = str(tmp_path / "g.mtx")
+    save_graph_as_mtx(_graph(7), path, remap_to_one_based=False)
+    load_graph(path)
+    graph = load_graph(path)
+    assert isinstance(graph.src, np.memmap)
+    before = _snapshot(graph)
+    out, done = random_switch.anonymize(graph, 50, seed=1)
+    assert done == 50
+    _assert_unchanged(graph, before)
+    assert not np.array_equal(out.edge_keys(), graph.edge_keys())
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from scripts.anonymization import random_add_delete, random_switch, random_walk
+from scripts.core import betweenness
+from scripts.core.graph import CSRGraph
+from scripts.core.parallel import WorkerPool, shared_arrays, spawn_rngs, split
+
+
+def _graph(seed=0, n=200, m=800):
+    u, v = np.random.default_rng(seed).integers(0, n, size=(2, m))
+    keep = u != v
+    return CSRGraph.from_labels(u[keep], v[keep])
+
+
+def _double(start, stop):
+    return shared_arrays()["values"][start:stop] * 2
+
+
+def test_split_covers_the_range_in_order():
+    chunks = split(10, 3)
+    assert chunks[0][0] == 0 and chunks[-1][1] == 10
+    assert all(a[1] == b[0] for a, b in zip(chunks, chunks[1:]))
+    assert split(2, 4) == [(0, 0), (0, 1), (1, 1), (1, 2)]
+
+
+def test_spawned_generators_do_not_depend_on_the_count():
+    short = [r.random() for r in spawn_rngs(7, 2)]
+    long = [r.random() for r in spawn_rngs(7, 5)]
+    assert long[:2] == short
+    assert len(set(long)) == 5
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_pool_shares_arrays_and_keeps_task_order(workers):
+    values = np.arange(100)
+    with WorkerPool({"values": values}, workers) as pool:
+        parts = pool.map(_double, split(len(values), 7))
+    assert np.concatenate(parts).tolist() == (values * 2).tolist()
+
+
+def _anonymize(name, graph, seed, workers):
+    if name == "random_walk":
+        return random_walk.anonymize(graph, 3, seed=seed, workers=workers)[0]
+    if name == "random_switch":
+        return random_switch.anonymize(graph, 200, seed=seed, workers=workers)[0]
+    mode = name.split(":")[1]
+    return random_add_delete.anonymize(graph, 500, mode=mode, batch_size=64, seed=seed, workers=workers)[0]
+
+
+@pytest.mark.parametrize("name", ["random_walk", "random_switch", "random_add_delete:batch",
+                                  "random_add_delete:sequential"])
+def test_same_seed_gives_the_same_output_for_any_worker_count(name):
+    graph = _graph()
+    one, three = (_anonymize(name, graph, 5, workers) for workers in (1, 3))
+    assert np.array_equal(one.edge_keys(), three.edge_keys())
+    assert not np.array_equal(one.edge_keys(), _anonymize(name, graph, 6, 1).edge_keys())
+
+
+def test_sampled_betweenness_is_the_same_for_any_worker_count():
+    graph = _graph(1)
+    one, _ = betweenness.approximate(graph, epsilon=0.1, seed=3, workers=1)
+    three, _ = betweenness.approximate(graph, epsilon=0.1, seed=3, workers=3)
+    np.testing.assert_array_equal(one, three)
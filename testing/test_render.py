@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from scripts.core import render
+from scripts.core.graph import CSRGraph
+
+
+@pytest.fixture(autouse=True)
+def _fresh_layouts():
+    render.reset()
+    yield
+    render.reset()
+
+
+def _ring(n=30, step=1):
+    u = np.arange(1, n + 1)
+    return CSRGraph.from_labels(u, (u + step - 1) % n + 1)
+
+
+def test_same_graph_hits_the_cache():
+    first = render.layout(_ring(), "full")
+    assert render.layout(_ring(), "full") is first
+    assert render.layout(_ring(), "thumbnail") is not first
+
+
+def test_same_nodes_with_other_edges_get_their_own_layout():
+    ring, chords = _ring(), _ring(step=7)
+    assert ring.node_ids.tolist() == chords.node_ids.tolist()
+    first = render.layout(ring, "full")
+    second = render.layout(chords, "full")
+    assert second is not first
+    assert render.layout(ring, "full") is first
+
+
+def test_a_chain_shares_the_layout_of_its_input():
+    render.reset(chain=True)
+    ring = _ring()
+    first = render.layout(ring, "full")
+    assert render.layout(_ring(step=7), "full") is first
+    # an output that lost a node still reuses the input's positions
+    smaller = ring.with_edges(ring.src[ring.src > 0], ring.dst[ring.src > 0])
+    assert render.layout(CSRGraph.from_labels(*smaller.edge_labels()), "full") is first
+
+
+def test_reset_ends_the_chain():
+    render.reset(chain=True)
+    first = render.layout(_ring(), "full")
+    render.reset()
+    assert render.layout(_ring(step=7), "full") is not first
+
+
+def test_spectral_layout_is_used_for_larger_graphs(monkeypatch):
+    monkeypatch.setattr(render, "SPRING_MAX_NODES", 10)
+    entry = render.layout(_ring(), "full")
+    assert entry["pos"].shape == (30, 2)
+    assert np.abs(entry["pos"]).max() <= 1 + 1e-9
@@ -0,0 +1,72 @@
+import csv
+
+import numpy as np
+
+from scripts.core.graph import CSRGraph
+from scripts.core.sweep import columns, finished_cells, run_sweep, trim_partial_row
+from scripts.utils.util_mtx import save_graph_as_mtx
+
+METRICS = ["avg_degree", "components"]
+
+
+def _input(tmp_path):
+    rng = np.random.default_rng(0)
+    u, v = rng.integers(1, 41, size=(2, 160))
+    keep = u != v
+    path = str(tmp_path / "g.mtx")
+    save_graph_as_mtx(CSRGraph.from_labels(u[keep], v[keep]), path, remap_to_one_based=False)
+    return path
+
+
+def _sweep(path, out):
+    return run_sweep(path, ["random_add_delete"], [2], [0, 1], out, metrics=METRICS)
+
+
+def _rows(out):
+    with open(out, newline="") as fh:
+        return list(csv.reader(fh))
+
+
+def test_resume_skips_finished_cells(tmp_path):
+    path, out = _input(tmp_path), str(tmp_path / "sweep.csv")
+    assert _sweep(path, out) == 2
+    assert _sweep(path, out) == 0
+    assert len(_rows(out)) == 3
+
+
+def test_resume_reruns_a_row_cut_off_mid_write(tmp_path):
+    path, out = _input(tmp_path), str(tmp_path / "sweep.csv")
+    _sweep(path, out)
+    with open(out, "rb") as fh:
+        data = fh.read()
+    # killed while writing the last row: no newline, trailing columns missing
+    with open(out, "wb") as fh:
+        fh.write(data[:data.rstrip(b"\r\n").rfind(b",") + 1])
+
+    assert _sweep(path, out) == 1
+    rows = _rows(out)
+    header = columns(METRICS)
+    assert rows[0] == header
+    assert len(rows) == 3 and all(len(row) == len(header) and all(row) for row in rows)
+    assert {row[3] for row in rows[1:]} == {"0", "1"}
+
+
+def test_truncated_rows_are_not_finished(tmp_path):
+    out = tmp_path / "sweep.csv"
+    header = columns(METRICS)
+    full = ["/in.mtx", "random_walk", "3", "0"] + ["1"] * (len(header) - 4)
+    cut = ["/in.mtx", "random_walk", "3", "1", ""]
+    empty = ["/in.mtx", "random_walk", "3", "2"] + [""] * (len(header) - 4)
+    out.write_text("\n".join(",".join(row) for row in (header, full, cut, empty)) + "\n")
+    assert finished_cells(str(out), header) == {("/in.mtx", "random_walk", "3", "0")}
+
+
+def test_trim_partial_row(tmp_path):
+    out = tmp_path / "rows.csv"
+    out.write_bytes(b"a,b\n1,2\n3,")
+    assert trim_partial_row(str(out), chunk=2) == 2
+    assert out.read_bytes() == b"a,b\n1,2\n"
+    assert trim_partial_row(str(out)) == 0
+    out.write_bytes(b"a,b")
+    assert trim_partial_row(str(out)) == 3
+    assert out.read_bytes() == b""
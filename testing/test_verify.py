@@ -0,0 +1,137 @@
+import numpy as np
+import pytest
+
+from scripts.core import verify
+from scripts.core.graph import CSRGraph
+from scripts.utils import util_verify
+from scripts.utils.util_mtx import load_graph, save_graph_as_mtx
+
+
+def _graph(seed, n=80, m=240):
+    u, v = np.random.default_rng(seed).integers(1, n + 1, size=(2, m))
+    keep = u != v
+    return CSRGraph.from_labels(u[keep], v[keep])
+
+
+def _relabel(graph, ids):
+    """`graph` with compact node i renamed to ids[i]."""
+    return CSRGraph.from_labels(ids[graph.src], ids[graph.dst])
+
+
+def _switch(graph):
+    """One degree-preserving switch: same degrees, different edges."""
+    src, dst = np.array(graph.src), np.array(graph.dst)
+    keys = set(graph.edge_keys().tolist())
+    n = graph.number_of_nodes()
+    for i in range(1, len(src)):
+        a, b, c, d = src[0], dst[0], src[i], dst[i]
+        if len({a, b, c, d}) == 4 and min(a, d) * n + max(a, d) not in keys and min(b, c) * n + max(b, c) not in keys:
+            dst[0], dst[i] = d, b
+            return graph.with_edges(src, dst)
+    pytest.fail("no valid switch in the test graph")
+
+
+def test_simple_graph_flags_duplicates_and_new_self_loops():
+    graph = _graph(0)
+    assert verify.simple_graph(graph, graph)[0]
+    nodes = np.arange(3)
+    duplicated = CSRGraph(nodes, np.array([0, 0, 1]), np.array([1, 1, 2]))
+    assert not verify.simple_graph(graph, duplicated)[0]
+    looped = CSRGraph(nodes, np.array([0, 1, 2]), np.array([1, 2, 2]))
+    assert not verify.simple_graph(graph, looped)[0]
+
+
+def test_file_consistency_detects_a_cut_off_body(tmp_path):
+    graph = _graph(1)
+    path = tmp_path / "g.mtx"
+    save_graph_as_mtx(graph, str(path), remap_to_one_based=False)
+    assert verify.file_consistency(str(path), load_graph(str(path), use_cache=False))[0]
+    lines = path.read_text().splitlines(keepends=True)
+    path.write_text("".join(lines[:-5]))
+    assert not verify.file_consistency(str(path), load_graph(str(path), use_cache=False))[0]
+
+
+def test_file_consistency_rejects_zero_labels(tmp_path):
+    path = tmp_path / "zero.mtx"
+    path.write_text("%%MatrixMarket matrix coordinate pattern symmetric\n2 2 2\n0 1\n2 1\n")
+    ok, detail = verify.file_consistency(str(path), load_graph(str(path), use_cache=False))
+    assert not ok and "labels 0..2" in detail
+
+
+def test_round_trip_runs_for_outputs_read_from_their_file(tmp_path):
+    graph = _graph(8)
+    path = str(tmp_path / "g.mtx")
+    save_graph_as_mtx(graph, path, remap_to_one_based=False)
+    written = load_graph(path, use_cache=False)
+    report = verify.verify(graph, written, "random_add_delete", file_path=path)
+    names = [c["name"] for c in report["checks"]]
+    assert report["ok"] and "round trip" in names and "written file" not in names
+    assert verify.round_trip(CSRGraph.from_labels(np.array([0, 7]), np.array([7, 10 ** 9])))[0]
+
+
+def test_degree_sequence_and_edge_count():
+    graph = _graph(2)
+    switched = _switch(graph)
+    assert verify.degree_sequence(graph, switched)[0]
+    assert verify.edge_count(graph, switched)[0]
+    fewer = graph.with_edges(graph.src[1:], graph.dst[1:])
+    assert not verify.edge_count(graph, fewer)[0]
+    assert not verify.degree_sequence(graph, fewer)[0]
+
+
+@pytest.mark.parametrize("order", ["label", "degree"])
+def test_canonical_relabelings_prove_isomorphism(order):
+    graph = _graph(3)
+    n = graph.number_of_nodes()
+    ids = np.arange(n)
+    if order == "degree":
+        ids[np.argsort(graph.degree(), kind="stable")] = np.arange(n)
+    ok, detail = verify.isomorphism(graph, _relabel(graph, ids))
+    assert ok and f"{order} order" in detail
+
+
+def test_random_relabeling_without_permutation_is_only_wl_equivalent():
+    graph = _graph(4)
+    ids = np.random.default_rng(0).permutation(graph.number_of_nodes())
+    ok, detail = verify.isomorphism(graph, _relabel(graph, ids))
+    assert ok and "WL-equivalent" in detail
+    ok, detail = verify.isomorphism(graph, _relabel(graph, ids), permutation=ids)
+    assert ok and "saved relabeling" in detail
+
+
+def test_wl_disproves_a_switched_graph():
+    graph = _graph(5)
+    ok, detail = verify.isomorphism(graph, _switch(graph))
+    assert not ok and "WL colours differ" in detail
+
+
+def test_wl_cannot_separate_regular_graphs():
+    # a 6-cycle and two triangles: both 2-regular, not isomorphic
+    cycle = CSRGraph.from_labels(np.arange(6), (np.arange(6) + 1) % 6)
+    triangles = CSRGraph.from_labels(np.array([0, 1, 2, 3, 4, 5]), np.array([1, 2, 0, 4, 5, 3]))
+    ok, detail = verify.isomorphism(cycle, triangles)
+    assert ok and "not proven" in detail
+
+
+def test_nodes_without_edges_are_ignored():
+    graph = _graph(6)
+    padded = CSRGraph.from_labels(graph.node_ids[graph.src], graph.node_ids[graph.dst],
+                                  node_ids=np.arange(graph.node_ids[-1] + 10))
+    assert verify.degree_sequence(graph, padded)[0]
+    assert verify.isomorphism(graph, padded)[0]
+
+
+def test_util_verify_reports_and_fails(tmp_path):
+    graph = _graph(7)
+    original = str(tmp_path / "g.mtx")
+    save_graph_as_mtx(graph, original, remap_to_one_based=False)
+    out = str(tmp_path / "g_switched.mtx")
+    save_graph_as_mtx(_switch(graph), out, comment="random_add_delete output", remap_to_one_based=False)
+    assert verify.producer(out) == "random_add_delete"
+    util_verify.run(out, 1, original=original)
+    assert (tmp_path / "g_switched_verification.json").exists()
+
+    # the same switch is not a valid naive relabeling
+    save_graph_as_mtx(_switch(graph), out, comment="naive_anonymization output", remap_to_one_based=False)
+    with pytest.raises(RuntimeError, match="isomorphism"):
+        util_verify.run(out, 1, original=original)
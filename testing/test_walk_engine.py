@@ -0,0 +1,92 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from scripts.core.graph import CSRGraph
+from scripts.core.walk_engine import random_neighbor, random_walks, walk_anonymize
+
+
+def _csr(G):
+    u, v = zip(*G.edges())
+    return CSRGraph.from_labels(np.array(u), np.array(v), node_ids=np.arange(G.number_of_nodes()))
+
+
+def _assert_simple_one_per_edge(graph, u, x):
+    n = graph.number_of_nodes()
+    assert len(u) == len(x) == graph.number_of_edges()
+    assert np.all(u != x)
+    keys = np.minimum(u, x) * n + np.maximum(u, x)
+    assert len(np.unique(keys)) == len(keys)
+    # every output edge keeps its source endpoint
+    assert np.array_equal(u, graph.src)
+
+
+def test_walks_stay_on_edges_and_isolated_walkers_stay_put():
+    G = nx.path_graph(5)
+    G.add_node(5)
+    graph = _csr(G)
+    rng = np.random.default_rng(0)
+    ends = random_walks(graph.indptr, graph.indices, np.array([0, 5, 2]), 1, rng)
+    assert ends[0] == 1 and ends[1] == 5 and ends[2] in (1, 3)
+    # on a path, parity of the position flips with every step
+    ends = random_walks(graph.indptr, graph.indices, np.zeros(50, dtype=np.int64), 3, rng)
+    assert np.all(ends % 2 == 1)
+
+
+def test_random_neighbor_excludes_and_reports_dead_ends():
+    graph = _csr(nx.star_graph(3))
+    rng = np.random.default_rng(1)
+    picked, ok = random_neighbor(graph.indptr, graph.indices, np.array([0, 1, 0]), rng, exclude=1)
+    assert ok.tolist() == [True, False, True]
+    assert picked[0] in (2, 3) and picked[2] in (2, 3) and picked[1] == -1
+
+
+@pytest.mark.parametrize("k", [1, 2, 5])
+def test_complete_graph_keeps_every_edge(k):
+    # no non-edge exists: proposals can only trade edges among themselves,
+    # and the rest fall back to their original edge
+    graph = _csr(nx.complete_graph(12))
+    u, x, stats = walk_anonymize(graph, k, np.random.default_rng(k))
+    _assert_simple_one_per_edge(graph, u, x)
+    assert np.array_equal(graph.with_edges(u, x).edge_keys(), graph.edge_keys())
+    assert stats["duplicates_avoided"] > 0
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_dense_graph_stays_simple(seed):
+    graph = _csr(nx.gnp_random_graph(30, 0.8, seed=seed))
+    u, x, stats = walk_anonymize(graph, 3, np.random.default_rng(seed))
+    _assert_simple_one_per_edge(graph, u, x)
+    assert stats["duplicates_avoided"] > 0
+
+
+@pytest.mark.parametrize("k", [1, 2, 3])
+def test_leaves_and_dead_ends(k):
+    # stars and paths: many walks come back to u, and a leaf's only
+    # neighbour is the edge it came from
+    G = nx.disjoint_union(nx.star_graph(6), nx.path_graph(7))
+    G = nx.disjoint_union(G, nx.complete_graph(2))
+    graph = _csr(G)
+    u, x, stats = walk_anonymize(graph, k, np.random.default_rng(k))
+    _assert_simple_one_per_edge(graph, u, x)
+    if k % 2:
+        # an odd walk from a leaf of the star ends on the centre
+        assert stats["self_loops_redirected"] > 0
+
+
+def test_self_loop_redirect_uses_another_neighbour():
+    # (1, 2) on a triangle with a tail: a 2-step walk from 2 ending at 1 is
+    # redirected to a neighbour of 1 other than 2
+    graph = _csr(nx.Graph([(0, 1), (1, 2), (0, 2), (2, 3)]))
+    endpoints = graph.src.copy()
+    u, x, stats = walk_anonymize(graph, 2, np.random.default_rng(0), endpoints=endpoints)
+    assert stats["self_loops_redirected"] == graph.number_of_edges()
+    _assert_simple_one_per_edge(graph, u, x)
+
+
+def test_precomputed_endpoints_are_used():
+    graph = _csr(nx.cycle_graph(10))
+    ends = (graph.dst + 1) % 10
+    u, x, _ = walk_anonymize(graph, 1, np.random.default_rng(0), endpoints=ends)
+    expected = np.where(ends == u, -1, ends)
+    assert np.array_equal(x[expected >= 0], expected[expected >= 0])